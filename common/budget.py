@@ -0,0 +1,53 @@
+# common/budget.py
+import multiprocessing
+
+
+class RiskBudget:
+    """Stake budget shared by every worker process of a sharded runner.
+
+    Tracks the total stake of open contracts and the realised P/L across all
+    processes. `reserve()` refuses a stake that would take open exposure past
+    `max_open_stake`, and refuses everything once losses reach `max_loss`.
+    """
+
+    def __init__(self, max_open_stake, max_loss=None, ctx=None):
+        ctx = ctx or multiprocessing
+        self.max_open_stake = max_open_stake
+        self.max_loss = max_loss
+        self._lock = ctx.Lock()
+        self._open_stake = ctx.Value("d", 0.0, lock=False)
+        self._pnl = ctx.Value("d", 0.0, lock=False)
+        self._trades = ctx.Value("q", 0, lock=False)
+        self._wins = ctx.Value("q", 0, lock=False)
+        self._rejected = ctx.Value("q", 0, lock=False)
+
+    def reserve(self, stake, force=False):
+        """Reserve `stake` for an order; `force` counts a contract that already exists (a late fill) regardless."""
+        with self._lock:
+            halted = self.max_loss is not None and -self._pnl.value >= self.max_loss
+            if not force and (halted or self._open_stake.value + stake > self.max_open_stake):
+                self._rejected.value += 1
+                return False
+            self._open_stake.value += stake
+            return True
+
+    def release(self, stake, profit=None):
+        """Return a reserved stake; pass `profit` when the contract settled."""
+        with self._lock:
+            self._open_stake.value = max(0.0, self._open_stake.value - stake)
+            if profit is not None:
+                self._pnl.value += profit
+                self._trades.value += 1
+                if profit > 0:
+                    self._wins.value += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "open_stake": self._open_stake.value,
+                "pnl": self._pnl.value,
+                "trades": self._trades.value,
+                "wins": self._wins.value,
+                "rejected": self._rejected.value,
+                "halted": self.max_loss is not None and -self._pnl.value >= self.max_loss,
+            }
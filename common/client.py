@@ -0,0 +1,231 @@
+# common/client.py
+"""asyncio connection core shared by the digit_matches and hedge bots.
+
+One connection runs three tasks joined by bounded queues:
+
+    receive  -> inbox  -> decision (on_message) -> outbox -> send
+
+Receiving never waits on the handler, so ticks keep being read while a
+decision is in progress. Slow side effects (CSV writes, console output)
+go through `offload()`, which runs them on a worker thread so they never
+sit between a tick and the order it triggers.
+
+`send()` and the handler signatures mirror websocket-client's
+WebSocketApp, so Trader classes and bot handlers work unchanged.
+
+`run()` covers one connection and can be awaited again on the same client
+to reconnect; common/supervisor.py does that in a loop. With
+`idle_timeout` set, a connection that has received nothing for that long
+is treated as dead and closed, instead of waiting for TCP to notice.
+"""
+import asyncio
+import json
+import queue
+import threading
+import time
+
+import websockets
+
+from common.metrics import LatencyStats, TIMINGS
+
+TICK_MARKERS = ('"msg_type":"tick"', '"msg_type": "tick"')
+
+
+class ClientClosed(ConnectionError):
+    pass
+
+
+class IdleTimeout(ConnectionError):
+    pass
+
+
+class DerivClient:
+    def __init__(self, url, on_message, on_open=None, on_error=None, on_close=None,
+                 inbox_size=1000, outbox_size=1000, offload_size=1000, ping_interval=30, idle_timeout=None,
+                 close_timeout=2):
+        self.url = url
+        self.on_message = on_message
+        self.on_open = on_open
+        self.on_error = on_error
+        self.on_close = on_close
+        self.inbox_size = inbox_size
+        self.outbox_size = outbox_size
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        self.close_timeout = close_timeout
+        self.last_received = 0.0  # perf_counter of the latest message read from the socket
+        self.loop = None
+        self._loop_thread = None
+        self.websocket = None
+        self.inbox = None
+        self.outbox = None
+        self.connected = False
+        self.dropped_ticks = 0
+        self.dropped_offloads = 0
+        self.overflowed_offloads = 0  # jobs queued beyond offload_size because they could not be dropped
+        self.current_stamp = None  # receive time of the message being handled
+        self.tick_to_send = LatencyStats()
+        self.offload_size = offload_size
+        self._offload = queue.Queue()  # bounded by offload() itself, so a full queue never blocks
+        self._offload_thread = None
+
+    # === Public API (called from handlers) ===
+    def send(self, message):
+        """Queue a message for the send task; safe to call from any thread.
+
+        Raises ClientClosed if the connection is down or the send queue is full.
+        """
+        if not self.connected:
+            raise ClientClosed("Connection is not open")
+        item = (message, self.current_stamp)
+        if self.loop is not None and threading.get_ident() != self._loop_thread:
+            # The loop thread enqueues it later and cannot raise to this caller, so check here
+            if self.outbox.full():
+                raise ClientClosed("Send queue is full")
+            self.loop.call_soon_threadsafe(self._enqueue_from_thread, item)
+        else:
+            self._enqueue(item)
+
+    def offload(self, fn, *args, droppable=False):
+        """Run a slow side effect on the worker thread, in submission order.
+
+        Never blocks the caller. Once `offload_size` jobs are waiting, droppable
+        jobs (e.g. redraws) are skipped; others (e.g. trade log rows) are
+        queued anyway and counted in `overflowed_offloads`.
+        """
+        if self._offload_thread is None:
+            self._offload_thread = threading.Thread(target=self._offload_worker, daemon=True)
+            self._offload_thread.start()
+        if self._offload.qsize() >= self.offload_size:
+            if droppable:
+                self.dropped_offloads += 1
+                return
+            self.overflowed_offloads += 1
+        self._offload.put_nowait((fn, args))
+
+    def close(self):
+        if self.loop is not None and self.websocket is not None:
+            asyncio.run_coroutine_threadsafe(self.websocket.close(), self.loop)
+
+    # === Connection lifecycle ===
+    async def run(self):
+        """Connect, run until the connection closes, then call on_close."""
+        self.loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self.inbox = asyncio.Queue(maxsize=self.inbox_size)
+        self.outbox = asyncio.Queue(maxsize=self.outbox_size)
+        code, reason = None, None
+        try:
+            async with websockets.connect(self.url, max_queue=None, ping_interval=None,
+                                          close_timeout=self.close_timeout) as websocket:
+                self.websocket = websocket
+                self.connected = True
+                self.last_received = time.perf_counter()
+                tasks = [asyncio.create_task(self._receive()),
+                         asyncio.create_task(self._decide()),
+                         asyncio.create_task(self._send())]
+                if self.ping_interval or self.idle_timeout:
+                    tasks.append(asyncio.create_task(self._keep_alive()))
+                self._call(self.on_open, self)
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in pending:
+                    task.cancel()
+                for task in done:
+                    if not task.cancelled() and task.exception() and not isinstance(task.exception(), websockets.ConnectionClosed):
+                        if isinstance(task.exception(), IdleTimeout):
+                            websocket.transport.abort()  # the peer is gone; don't wait for a closing handshake
+                        self._call(self.on_error, self, task.exception())
+                code, reason = websocket.close_code, websocket.close_reason
+        except (OSError, websockets.WebSocketException) as e:
+            self._call(self.on_error, self, e)
+        finally:
+            self.connected = False
+            self.websocket = None
+        await asyncio.to_thread(self.drain)
+        self._call(self.on_close, self, code, reason)
+
+    async def _receive(self):
+        async for raw in self.websocket:
+            self.last_received = received = time.perf_counter()
+            item = (received, raw)
+            try:
+                self.inbox.put_nowait(item)
+            except asyncio.QueueFull:
+                if any(marker in raw for marker in TICK_MARKERS):
+                    # A newer tick will follow; never stall the socket for a stale one.
+                    self.dropped_ticks += 1
+                else:
+                    await self.inbox.put(item)
+
+    async def _decide(self):
+        while True:
+            stamp, raw = await self.inbox.get()
+            self.current_stamp = stamp
+            started = time.perf_counter()
+            TIMINGS.add("inbox_wait", started - stamp)
+            try:
+                self.on_message(self, raw)
+            except Exception as e:
+                self._call(self.on_error, self, e)
+            finally:
+                self.current_stamp = None
+                TIMINGS.add("handle", time.perf_counter() - started)
+            await asyncio.sleep(0)  # let the receive task run between messages
+
+    async def _send(self):
+        while True:
+            message, stamp = await self.outbox.get()
+            started = time.perf_counter()
+            await self.websocket.send(message)
+            sent = time.perf_counter()
+            TIMINGS.add("socket_send", sent - started)
+            if stamp is not None and '"buy"' in message:
+                self.tick_to_send.add(sent - stamp)
+                TIMINGS.add("tick_to_send", sent - stamp)
+
+    async def _keep_alive(self):
+        # Pings every ping_interval; with idle_timeout, also checks for silence a few times per timeout
+        step = min(filter(None, (self.ping_interval, self.idle_timeout and self.idle_timeout / 4)))
+        next_ping = time.perf_counter() + (self.ping_interval or float("inf"))
+        while True:
+            await asyncio.sleep(step)
+            now = time.perf_counter()
+            if self.idle_timeout and now - self.last_received > self.idle_timeout:
+                raise IdleTimeout(f"Nothing received for {now - self.last_received:.1f}s")
+            if now >= next_ping:
+                next_ping = now + self.ping_interval
+                self._enqueue((json.dumps({"ping": 1}), None))
+
+    def _enqueue(self, item):
+        try:
+            self.outbox.put_nowait(item)
+        except asyncio.QueueFull:
+            raise ClientClosed("Send queue is full") from None
+
+    def _enqueue_from_thread(self, item):
+        # The queue filled up after send() checked it; report it, as there is no caller to raise to
+        try:
+            self._enqueue(item)
+        except ClientClosed as e:
+            self._call(self.on_error, self, e)
+
+    def _offload_worker(self):
+        while True:
+            fn, args = self._offload.get()
+            try:
+                fn(*args)
+            except Exception as e:
+                self._call(self.on_error, self, e)
+            finally:
+                self._offload.task_done()
+
+    def drain(self):
+        """Block until every offloaded job has run."""
+        if self._offload_thread is not None:
+            self._offload.join()
+
+    @staticmethod
+    def _call(callback, *args):
+        if callback:
+            callback(*args)
+
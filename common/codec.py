@@ -0,0 +1,168 @@
+# common/codec.py
+"""Message encoding shared by both bot folders.
+
+* `loads` / `dumps` use orjson when it is installed and the stdlib json
+  module otherwise (or when DERIV_JSON_BACKEND=json). `dumps` always returns
+  str, since the Deriv API only accepts text frames.
+* `OrderTemplate` keeps a `buy` request serialised, with only req_id, stake
+  and barrier left to fill in, so placing an order does not build and encode
+  a nested dict. `proposal_buy` renders a buy by proposal id
+  (common/proposals.py) the same way.
+* `Dispatcher` routes raw messages by msg_type through a table. The type is
+  read from the raw text, and messages nobody handles are never decoded.
+  Responses to requests made through a RequestLayer go to their callbacks.
+"""
+import json
+import os
+from functools import lru_cache
+
+from common.metrics import TIMINGS
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+if orjson is not None and os.getenv("DERIV_JSON_BACKEND", "orjson") != "json":
+    BACKEND = "orjson"
+    loads = orjson.loads
+
+    def dumps(obj):
+        return orjson.dumps(obj).decode()
+else:
+    BACKEND = "json"
+    loads = json.loads
+    _encoder = json.JSONEncoder(separators=(",", ":"))
+
+    def dumps(obj):
+        return _encoder.encode(obj)
+
+_MSG_TYPE = '"msg_type"'
+
+
+def peek_msg_type(raw):
+    """msg_type of a raw JSON message without decoding it, or None.
+
+    Only a message with a single "msg_type" key is read in place. If there
+    are more (a nested object with its own msg_type), the message is decoded
+    to find the top-level one.
+    """
+    if isinstance(raw, bytes):
+        raw = raw.decode()
+    key = raw.rfind(_MSG_TYPE)  # Deriv puts msg_type near the end
+    if key < 0:
+        return None
+    if raw.find(_MSG_TYPE, 0, key) >= 0:
+        data = loads(raw)
+        return data.get("msg_type") if isinstance(data, dict) else None
+    start = raw.find('"', key + len(_MSG_TYPE)) + 1
+    end = raw.find('"', start)
+    if start <= 0 or end < 0:
+        return None
+    return raw[start:end]
+
+
+class Dispatcher:
+    """msg_type -> handler(client, data) table usable directly as an on_message callback.
+
+    Messages carrying an `error` go to `on_error(client, data)` first and
+    then to their msg_type handler as before, so handlers that clean up
+    after failed requests still see them.
+
+    With a `requests` layer (common/rpc.py), responses to requests sent
+    through it go to that request's callback instead of the msg_type handler.
+    """
+
+    def __init__(self, handlers=None, on_error=None, requests=None):
+        self.handlers = dict(handlers or {})
+        self.on_error = on_error
+        self.requests = requests
+        self.skipped = 0
+
+    def on(self, msg_type):
+        """Decorator registering a handler for `msg_type`."""
+        def register(handler):
+            self.handlers[msg_type] = handler
+            return handler
+        return register
+
+    def __call__(self, client, raw):
+        handler = self.handlers.get(peek_msg_type(raw))
+        tracked = (self.requests is not None and (self.requests.pending or self.requests.late)
+                   and '"req_id"' in raw)
+        if handler is None and not tracked and (self.on_error is None or '"error"' not in raw):
+            self.skipped += 1
+            return None
+        with TIMINGS.stage("decode"):
+            data = loads(raw)
+        if self.on_error is not None and "error" in data:
+            self.on_error(client, data)
+        if tracked and self.requests.resolve(data):
+            return None
+        if handler is not None:
+            return handler(client, data)
+        return None
+
+
+def _number(value):
+    # Same text json.dumps would produce for a stake
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+class OrderTemplate:
+    """A `buy` request for one symbol and contract type, serialised once.
+
+    `render()` fills in req_id, stake (as both price and amount) and barrier.
+    The output is identical to json.dumps of the equivalent dict, without the
+    spaces.
+    """
+
+    def __init__(self, symbol, contract_type, duration=5, duration_unit="t", currency="USD", basis="stake"):
+        self.symbol = symbol
+        self.contract_type = contract_type
+        self.duration = duration
+        self.duration_unit = duration_unit
+        self.currency = currency
+        self.basis = basis
+        marker = "\x00"
+        text = dumps({
+            "buy": 1,
+            "req_id": marker + "R",
+            "price": marker + "P",
+            "parameters": {
+                "amount": marker + "A",
+                "basis": basis,
+                "contract_type": contract_type,
+                "currency": currency,
+                "duration": duration,
+                "duration_unit": duration_unit,
+                "symbol": symbol,
+                "barrier": marker + "B",
+            }
+        })
+        # Split around the quoted markers; the numbers go in unquoted, the barrier quoted
+        head, rest = text.split('"\\u0000R"')
+        mid1, rest = rest.split('"\\u0000P"')
+        mid2, rest = rest.split('"\\u0000A"')
+        mid3, tail = rest.split('"\\u0000B"')
+        self._parts = (head, mid1, mid2, mid3, tail)
+        self._barriers = {}
+
+    def render(self, req_id, stake, barrier):
+        head, mid1, mid2, mid3, tail = self._parts
+        quoted = self._barriers.get(barrier)
+        if quoted is None:
+            quoted = self._barriers[barrier] = dumps(str(barrier))
+        stake = _number(stake)
+        return f"{head}{req_id}{mid1}{stake}{mid2}{stake}{mid3}{quoted}{tail}"
+
+
+def proposal_buy(req_id, proposal_id, price):
+    """A `buy` request for a proposal id, at most `price`; same text as json.dumps without the spaces."""
+    return f'{{"buy":{dumps(str(proposal_id))},"price":{_number(price)},"req_id":{req_id}}}'
+
+
+@lru_cache(maxsize=None)
+def order_template(symbol, contract_type, duration=5, duration_unit="t"):
+    """Shared OrderTemplate per symbol, contract type and duration."""
+    return OrderTemplate(symbol, contract_type, duration, duration_unit)
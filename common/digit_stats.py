@@ -0,0 +1,236 @@
+# common/digit_stats.py
+"""Running statistics of the last-digit stream and the regime flags built on them.
+
+The selectors only look at short-window frequency counts. On a fair digit
+stream every count pattern is noise. `DigitStats` keeps, for several
+window lengths, the statistics that say whether the stream departs from
+uniform, independent digits. Each one is updated in O(1) as a digit enters
+and another leaves:
+
+* the chi-square statistic of the digit counts (9 degrees of freedom),
+* the Shannon entropy of the counts and its G-test against log2(10) bits,
+* the digit-transition matrix: the share of repeats (a digit following
+  itself, 1 in 10 on a fair stream) and, for windows long enough to
+  expect 5 pairs per cell, the chi-square of all 100 transitions,
+* the run lengths (maximal stretches of one digit) and how many runs are
+  longer than a fair stream would plausibly produce in the window.
+
+    stats = DigitStats(windows=(50, 100, 500), alpha=0.01)
+    stats.append(digit)
+    if stats.has_edge():
+        ...
+    stats.regime()  # {100: frozenset({'skewed'}), ...}
+
+A window reports flags only once it is full. `alpha` is the chance that
+a fair stream raises any flag on a given tick. It is split evenly
+(Bonferroni) across every window and the TESTS distinct tests. The
+chi-square and G-tests of the counts count as one test.
+"""
+import math
+from collections import Counter, deque
+from statistics import NormalDist
+
+SKEWED = "skewed"  # digit counts fail the chi-square uniformity test
+LOW_ENTROPY = "low_entropy"  # entropy well below log2(10) bits (G-test)
+STICKY = "sticky"  # digits repeat more often than 1 in 10
+ALTERNATING = "alternating"  # digits repeat less often than 1 in 10
+DEPENDENT = "dependent"  # the 100 transitions fail the chi-square test
+LONG_RUN = "long_run"  # a run longer than the window should hold
+# Distinct tests, for splitting alpha: SKEWED and LOW_ENTROPY test the same null hypothesis (uniform counts),
+# and STICKY/ALTERNATING are the two sides of one test of the repeats
+TESTS = 4
+
+MIN_PAIRS_PER_CELL = 5  # expected count per transition cell before DEPENDENT is tested
+LN10 = math.log(10)
+
+
+def chi_square_critical(df, alpha):
+    """Upper `alpha` quantile of the chi-square distribution (Wilson-Hilferty approximation)."""
+    z = NormalDist().inv_cdf(1 - alpha)
+    h = 2 / (9 * df)
+    return df * (1 - h + z * math.sqrt(h)) ** 3
+
+
+class WindowStats:
+    """Statistics of the last `size` digits, updated as each digit enters and leaves."""
+
+    def __init__(self, size, alpha=0.01):
+        self.size = size
+        self._digits = deque()
+        self._counts = [0] * 10
+        self._sum_sq = 0  # sum of counts squared
+        self._sum_xlogx = 0.0  # sum of c * ln(c)
+        self._xlogx = [0.0] + [c * math.log(c) for c in range(1, size + 1)]
+        self._transitions = [0] * 100  # 10 * previous + next, for pairs inside the window
+        self._transition_sum_sq = 0
+        self._repeats = 0
+        self._runs = deque()  # lengths of the runs in the window, oldest first
+        self._long_runs = 0  # runs of at least long_run digits
+        self.chi_square_limit = chi_square_critical(9, alpha)
+        self.transition_limit = chi_square_critical(99, alpha)
+        self.z_limit = NormalDist().inv_cdf(1 - alpha / 2)
+        # A fair stream starts about 0.9 * size runs, each this long with chance 0.1 ** (length - 1)
+        self.long_run = 1 + max(1, math.ceil(math.log10(0.9 * size / alpha)))
+        # The same limits on the running sums of a full window, so flags() is a few comparisons
+        pairs = size - 1
+        self._max_sum_sq = size * (self.chi_square_limit + size) / 10
+        self._max_sum_xlogx = self.chi_square_limit / 2 - size * (LN10 - math.log(size))
+        self._max_repeats = 0.1 * pairs + self.z_limit * math.sqrt(0.09 * pairs)
+        self._min_repeats = 0.1 * pairs - self.z_limit * math.sqrt(0.09 * pairs)
+        tested = pairs / 100 >= MIN_PAIRS_PER_CELL
+        self._max_transition_sum_sq = pairs * (self.transition_limit + pairs) / 100 if tested else math.inf
+
+    def append(self, digit):
+        counts, transitions, runs = self._counts, self._transitions, self._runs
+        if len(self._digits) == self.size:
+            old = self._digits.popleft()
+            c = counts[old]
+            self._sum_sq -= 2 * c - 1
+            self._sum_xlogx += self._xlogx[c - 1] - self._xlogx[c]
+            counts[old] = c - 1
+            pair = 10 * old + self._digits[0]
+            t = transitions[pair]
+            self._transition_sum_sq -= 2 * t - 1
+            transitions[pair] = t - 1
+            if pair % 11 == 0:  # 0->0, 1->1, ...
+                self._repeats -= 1
+            if runs[0] == self.long_run:
+                self._long_runs -= 1
+            if runs[0] == 1:
+                runs.popleft()
+            else:
+                runs[0] -= 1
+        if self._digits:
+            previous = self._digits[-1]
+            pair = 10 * previous + digit
+            t = transitions[pair]
+            self._transition_sum_sq += 2 * t + 1
+            transitions[pair] = t + 1
+            if previous == digit:
+                self._repeats += 1
+                runs[-1] += 1
+                if runs[-1] == self.long_run:
+                    self._long_runs += 1
+            else:
+                runs.append(1)
+        else:
+            runs.append(1)
+        self._digits.append(digit)
+        c = counts[digit]
+        self._sum_sq += 2 * c + 1
+        self._sum_xlogx += self._xlogx[c + 1] - self._xlogx[c]
+        counts[digit] = c + 1
+
+    def __len__(self):
+        return len(self._digits)
+
+    def full(self):
+        return len(self._digits) == self.size
+
+    def counts(self):
+        return self._counts
+
+    def chi_square(self):
+        """Pearson statistic of the digit counts against 10 equal cells."""
+        n = len(self._digits)
+        return 10 * self._sum_sq / n - n if n else 0.0
+
+    def entropy(self):
+        """Shannon entropy of the digit counts in bits (log2(10) = 3.32 at most)."""
+        n = len(self._digits)
+        return (math.log(n) - self._sum_xlogx / n) / math.log(2) if n else 0.0
+
+    def g_statistic(self):
+        """G-test statistic of the counts: 2n times the entropy deficit in nats."""
+        n = len(self._digits)
+        return 2 * n * (LN10 - math.log(n)) + 2 * self._sum_xlogx if n else 0.0
+
+    def repeat_rate(self):
+        pairs = len(self._digits) - 1
+        return self._repeats / pairs if pairs > 0 else 0.0
+
+    def repeat_z(self):
+        """Repeats against the Binomial(pairs, 0.1) a fair stream gives, as a z-score."""
+        pairs = len(self._digits) - 1
+        return (self._repeats - 0.1 * pairs) / math.sqrt(0.09 * pairs) if pairs > 0 else 0.0
+
+    def transitions(self):
+        """10x10 counts of (previous digit, next digit) pairs in the window."""
+        return [self._transitions[10 * a:10 * a + 10] for a in range(10)]
+
+    def transition_chi_square(self):
+        """Pearson statistic of the transitions against 100 equal cells (99 degrees of freedom)."""
+        pairs = len(self._digits) - 1
+        return 100 * self._transition_sum_sq / pairs - pairs if pairs > 0 else 0.0
+
+    def run_lengths(self):
+        """Counter of run length -> runs in the window (the oldest run is cut at the window's edge)."""
+        return Counter(self._runs)
+
+    def longest_run(self):
+        return max(self._runs, default=0)
+
+    def has_edge(self):
+        """Whether flags() is non-empty, without building it."""
+        return len(self._digits) == self.size and (
+            self._sum_sq > self._max_sum_sq or self._sum_xlogx > self._max_sum_xlogx
+            or not self._min_repeats <= self._repeats <= self._max_repeats
+            or self._transition_sum_sq > self._max_transition_sum_sq or self._long_runs > 0)
+
+    def flags(self):
+        """Regime flags of a full window; empty while it is filling."""
+        if not self.full():
+            return frozenset()
+        flags = set()
+        if self._sum_sq > self._max_sum_sq:
+            flags.add(SKEWED)
+        if self._sum_xlogx > self._max_sum_xlogx:
+            flags.add(LOW_ENTROPY)
+        if self._repeats > self._max_repeats:
+            flags.add(STICKY)
+        elif self._repeats < self._min_repeats:
+            flags.add(ALTERNATING)
+        if self._transition_sum_sq > self._max_transition_sum_sq:
+            flags.add(DEPENDENT)
+        if self._long_runs:
+            flags.add(LONG_RUN)
+        return frozenset(flags)
+
+
+class DigitStats:
+    """WindowStats over several window lengths, with the combined regime cached per tick."""
+
+    def __init__(self, windows=(50, 100, 500), alpha=0.01):
+        self.alpha = alpha
+        test_alpha = alpha / (len(windows) * TESTS)
+        self.windows = {size: WindowStats(size, test_alpha) for size in sorted(set(windows))}
+        self._stats = list(self.windows.values())
+        self._regime = None
+        self._edge = None
+
+    def append(self, digit):
+        for window in self._stats:
+            window.append(digit)
+        self._regime = self._edge = None
+
+    def extend(self, digits):
+        for digit in digits:
+            self.append(digit)
+
+    def regime(self):
+        """{window size: flags} for the windows that raised any."""
+        if self._regime is None:
+            flags = {size: window.flags() for size, window in self.windows.items()}
+            self._regime = {size: found for size, found in flags.items() if found}
+        return self._regime
+
+    def has_edge(self):
+        """Whether any full window departs measurably from uniform, independent digits."""
+        if self._edge is None:
+            self._edge = any(window.has_edge() for window in self._stats)
+        return self._edge
+
+    def describe(self):
+        """Short text of the current flags, e.g. 'skewed@100 sticky@500', or 'noise'."""
+        regime = self.regime()
+        return " ".join(f"{flag}@{size}" for size, flags in regime.items() for flag in sorted(flags)) or "noise"
@@ -0,0 +1,13 @@
+# common/endpoint.py
+"""Where the bots connect.
+
+`WS_URL` is the Deriv WebSocket API unless DERIV_WS_URL (in the
+environment or .env) points elsewhere, e.g. at a local stub server
+(common/stub_server.py). Connect to f"{WS_URL}?app_id={APP_ID}".
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+WS_URL = os.getenv("DERIV_WS_URL", "wss://ws.derivws.com/websockets/v3")
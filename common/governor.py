@@ -0,0 +1,194 @@
+# common/governor.py
+"""Client-side rate limiting for orders: token buckets, priority lanes, coalescing.
+
+Deriv limits how many requests an account may make per minute (see
+`api_call_limits` in the `website_status` response). Going over the limit
+gets requests rejected, usually at the worst moment, in the middle of a
+burst. `OrderGovernor` sits in front of the Trader send paths and keeps
+them under it:
+
+    governor = OrderGovernor(rate=2.5, burst=10, symbol_rate=1, symbol_burst=4)
+    governor.submit(send_buy, symbol="1HZ10V", lane="coverage", key=("1HZ10V", 7, tick_no))
+    ...
+    governor.pump()  # on every tick and response: sends what the buckets now allow
+
+Each send takes a token from the account bucket and from its symbol's
+bucket. When either is empty the send is queued in its lane. Lanes drain
+in LANES order, so hedge legs and settlement subscriptions go ahead of
+queued speculative trades, proposal subscriptions (common/proposals.py)
+come last, and a lane waiting on the account bucket is not overtaken by a
+lower one. Within a lane, a send blocked only by its
+own symbol's bucket does not hold up other symbols.
+
+A queued send whose `key` matches a new one absorbs it: two queued buys
+for the same digit chosen on the same tick would go out together and bet
+on it twice. Keys include that tick, so a coverage run staggered over
+several ticks keeps one queued buy per tick.
+With `replace=True` the new send takes the queued one's place instead,
+for orders where only the newest choice counts (a hedge's digits).
+Beyond `max_queued` sends, new ones are refused (DROPPED), except in the
+settlement lane. Queued sends older than `max_wait` seconds are dropped, since an order
+that waited that long no longer reflects the tick it was chosen on, and
+`cancel(key)` drops one its caller no longer wants.
+"""
+import time
+from collections import OrderedDict
+
+LANES = ("hedge", "settlement", "trade", "coverage", "quote")  # highest priority first
+# Never refused for a full queue: a dropped contract subscription leaves the contract unsettled
+UNBOUNDED_LANES = ("settlement",)
+
+SENT, QUEUED, MERGED, DROPPED = "sent", "queued", "merged", "dropped"
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated", "clock")
+
+    def __init__(self, rate, burst, clock=time.time):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.clock = clock
+        self.updated = clock()
+
+    def available(self, cost=1):
+        now = self.clock()
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens >= cost
+
+    def take(self, cost=1):
+        self.tokens -= cost
+
+
+class _Queued:
+    __slots__ = ("action", "symbol", "cost", "expires")
+
+    def __init__(self, action, symbol, cost, expires):
+        self.action = action
+        self.symbol = symbol
+        self.cost = cost
+        self.expires = expires
+
+
+class OrderGovernor:
+    def __init__(self, rate, burst, symbol_rate=None, symbol_burst=None, max_wait=2.0, max_queued=200,
+                 clock=time.time):
+        self.account = TokenBucket(rate, burst, clock)
+        self.symbol_rate = symbol_rate  # None: no per-symbol limit
+        self.symbol_burst = symbol_burst or burst
+        self.max_wait = max_wait
+        self.max_queued = max_queued
+        self.clock = clock
+        self.symbols = {}  # symbol -> TokenBucket
+        self.lanes = {lane: OrderedDict() for lane in LANES}  # key -> _Queued, oldest first
+        self._keys = {}  # coalescing key -> lane it is queued in
+        self._blocked = len(LANES)  # first lane left waiting on the account bucket by pump()
+        self._pumping = False
+        self.sent = self.merged = self.dropped = 0
+
+    @property
+    def queued(self):
+        return sum(len(queue) for queue in self.lanes.values())
+
+    def _bucket(self, symbol):
+        if symbol is None or self.symbol_rate is None:
+            return None
+        bucket = self.symbols.get(symbol)
+        if bucket is None:
+            bucket = self.symbols[symbol] = TokenBucket(self.symbol_rate, self.symbol_burst, self.clock)
+        return bucket
+
+    def submit(self, action, symbol=None, lane="trade", key=None, cost=1, max_wait=None, replace=False):
+        """Call `action()` now if the buckets allow it, else queue it; returns SENT, QUEUED, MERGED or DROPPED.
+
+        `cost` is the number of requests `action` makes (2 for a two-leg hedge).
+        `key` identifies duplicates, e.g. (symbol, digit, tick) for a digit buy. A
+        duplicate is MERGED into the queued send; with `replace`, the queued
+        send keeps its place but becomes this one (action, cost and max_wait).
+        """
+        self.pump()
+        if key is not None and key in self._keys:
+            queued_lane = self._keys[key]
+            if LANES.index(lane) < LANES.index(queued_lane):  # promote the queued send to the higher lane
+                self.lanes[lane][key] = self.lanes[queued_lane].pop(key)
+                self._keys[key] = lane
+            if replace:
+                expires = self.clock() + (self.max_wait if max_wait is None else max_wait)
+                self.lanes[self._keys[key]][key] = _Queued(action, symbol, cost, expires)
+            self.merged += 1
+            return MERGED
+        bucket = self._bucket(symbol)
+        if (LANES.index(lane) < self._blocked and self.account.available(cost)
+                and (bucket is None or bucket.available(cost))):
+            self._send(action, bucket, cost)
+            return SENT
+        if self.queued >= self.max_queued and lane not in UNBOUNDED_LANES:
+            self.dropped += 1
+            return DROPPED
+        expires = self.clock() + (self.max_wait if max_wait is None else max_wait)
+        if key is None:
+            key = object()
+        else:
+            self._keys[key] = lane
+        self.lanes[lane][key] = _Queued(action, symbol, cost, expires)
+        return QUEUED
+
+    def cancel(self, key):
+        """Take the queued send with `key` out of its lane; returns whether there was one."""
+        lane = self._keys.get(key)
+        if lane is None:
+            return False
+        self._remove(self.lanes[lane], key)
+        return True
+
+    def pump(self):
+        """Send queued actions, highest lane first, while the buckets allow; returns how many went out."""
+        if self._pumping:  # an action submitted more (e.g. a buy answered synchronously); the outer pump goes on
+            return 0
+        self._blocked = len(LANES)
+        if not self.queued:
+            return 0
+        self._pumping = True
+        try:
+            return self._drain()
+        finally:
+            self._pumping = False
+
+    def _drain(self):
+        now = self.clock()
+        sent = 0
+        for index, lane in enumerate(LANES):
+            queue = self.lanes[lane]
+            for key in list(queue):
+                item = queue.get(key)
+                if item is None:
+                    continue
+                if item.expires < now:
+                    self._remove(queue, key)
+                    self.dropped += 1
+                    continue
+                if not self.account.available(item.cost):
+                    self._blocked = index
+                    return sent
+                bucket = self._bucket(item.symbol)
+                if bucket is not None and not bucket.available(item.cost):
+                    continue
+                self._remove(queue, key)
+                self._send(item.action, bucket, item.cost)
+                sent += 1
+        return sent
+
+    def _remove(self, queue, key):
+        del queue[key]
+        self._keys.pop(key, None)
+
+    def _send(self, action, bucket, cost):
+        self.account.take(cost)
+        if bucket is not None:
+            bucket.take(cost)
+        self.sent += 1
+        action()
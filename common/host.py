@@ -0,0 +1,278 @@
+# common/host.py
+"""Run several strategies in one process over one connection per account.
+
+Each bot script exposes `create_plugin(host)`, which returns a `Plugin`.
+The host owns the connection, the authorisation, the balance and tick
+subscriptions, and the tick archives. It decodes each tick once and passes
+it to every plug-in trading that symbol:
+
+    python -m common.host digit_matches/match_bot.py digit_matches/match_bot_mid.py hedge/md_hedge_bot.py
+
+Run on their own, the scripts go through the same host with a single
+plug-in (`run_host`).
+
+The bot folders use flat imports (`from config import ...`,
+`from trader import Trader`), and both have a `config` and a `trader`
+module. `load_script` imports each script with its own folder first on
+sys.path and takes that folder's modules back out of sys.modules
+afterwards, so every plug-in keeps the modules of its own folder.
+
+Plug-ins share the account-wide RequestLayer and OrderGovernor: the host
+takes them from the first plug-in's trader (built from that bot's
+config.py), and later plug-ins are created with them. The ProposalCache
+(common/proposals.py) is shared the same way: the host passes `proposal`
+updates to it and subscribes it again after every authorisation. Each
+plug-in keeps its own Trader, strategy state, risk budget and trade log.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+from collections import defaultdict
+
+from dotenv import load_dotenv
+from tabulate import tabulate
+
+from common.client import DerivClient
+from common.codec import Dispatcher, dumps
+from common.endpoint import WS_URL
+from common.metrics import install_signal_handlers
+from common.supervisor import ConnectionSupervisor
+from common.tick_archive import history_request, open_archive
+from common.ticks import last_digit
+
+HISTORY_DIGITS = 100  # archived digits handed to warm_start
+
+
+class Plugin:
+    """A strategy run by StrategyHost. Subclasses override the hooks they need."""
+
+    name = "plugin"
+    symbol = None  # ticks this plug-in receives
+    trader = None  # its Trader, if it has one; the host shares requests/governor through it
+
+    def on_authorize(self, data):
+        """The connection is authorised (again, after a reconnect)."""
+
+    def on_balance(self, data):
+        pass
+
+    def warm_start(self, digits):
+        """Last digits from the tick archive or a ticks_history response, oldest first."""
+
+    def on_tick(self, tick, digit):
+        pass
+
+    def owns(self, contract_id):
+        """Whether proposal_open_contract updates for `contract_id` belong to this plug-in."""
+        return False
+
+    def on_contract_update(self, data):
+        pass
+
+    def stats(self):
+        """Counters for the host's summary table."""
+        return {}
+
+    def close(self):
+        pass
+
+
+class StrategyHost:
+    def __init__(self, url, api_token, archive_dir=None, history_count=1000, idle_timeout=10, shared=False):
+        self.api_token = api_token
+        self.shared = shared  # several plug-ins: separate trade logs and budgets, no dashboards
+        self.archive_dir = archive_dir
+        self.history_count = history_count
+        self.plugins = []
+        self.by_symbol = defaultdict(list)  # symbol -> plug-ins receiving its ticks
+        self.archives = {}  # symbol -> TickArchive or None
+        self.requests = None  # account-wide RequestLayer and OrderGovernor, from the first trader
+        self.governor = None
+        self.proposals = None  # connection-wide ProposalCache, from the first trader that has one
+        self.dispatch = Dispatcher({
+            "authorize": self.on_authorize,
+            "balance": self.on_balance,
+            "history": self.on_history,
+            "tick": self.on_tick,
+            "proposal_open_contract": self.on_contract_update,
+            "proposal": self.on_proposal,
+        }, on_error=self.on_api_error)
+        self.client = DerivClient(url, on_message=self.dispatch, on_open=self.on_open, idle_timeout=idle_timeout)
+
+    def add(self, factory):
+        """Create a plug-in with `factory(host)` and start routing to it."""
+        plugin = factory(self)
+        self.plugins.append(plugin)
+        trader = plugin.trader
+        if trader is not None and self.requests is None:
+            self.requests = self.dispatch.requests = trader.requests
+            self.governor = trader.governor
+        if self.proposals is None and getattr(trader, "proposals", None) is not None:
+            self.proposals = trader.proposals
+        if plugin.symbol is not None:
+            if plugin.symbol not in self.archives:
+                self.archives[plugin.symbol] = open_archive(self.archive_dir, plugin.symbol)
+            archive = self.archives[plugin.symbol]
+            self.by_symbol[plugin.symbol].append(plugin)
+            if archive is not None:
+                self._call(plugin, "warm_start", archive.digits(HISTORY_DIGITS))
+        return plugin
+
+    def trade_log(self, name):
+        """Trade journal path for a plug-in: the usual trade_log.csv alone, one per plug-in otherwise."""
+        return f"trade_log_{name}.csv" if self.shared else "trade_log.csv"
+
+    def _call(self, plugin, hook, *args):
+        # One plug-in's failure must not stop the others
+        try:
+            return getattr(plugin, hook)(*args)
+        except Exception as e:
+            print(f"❌ {plugin.name}.{hook} failed: {e}")
+            return None
+
+    # === Connection ===
+    def on_open(self, client):
+        print(f"🔌 Connected. Authorizing {len(self.plugins)} plug-in(s)...")
+        client.send(json.dumps({"authorize": self.api_token}))
+
+    def on_api_error(self, client, data):
+        print(f"❌ API Error ({data.get('msg_type')}): {data['error'].get('message')}")
+
+    def on_authorize(self, client, data):
+        if "error" in data:
+            return
+        print("✅ Authorized.")
+        if self.proposals is not None:
+            self.proposals.resubscribe()  # before the plug-ins want their contracts again
+        for plugin in self.plugins:
+            self._call(plugin, "on_authorize", data)
+        try:
+            client.send(dumps({"balance": 1, "subscribe": 1}))
+            for symbol in self.by_symbol:
+                archive = self.archives[symbol]
+                # History since the archive's newest tick, then the live stream on the same subscription
+                request = (history_request(archive, symbol, self.history_count) if archive is not None
+                           else {"ticks": symbol, "subscribe": 1})
+                client.send(dumps(request))
+        except Exception as e:
+            print(f"❌ Subscription failed: {e}")
+
+    def on_balance(self, client, data):
+        if "error" in data:
+            return
+        for plugin in self.plugins:
+            self._call(plugin, "on_balance", data)
+
+    def on_history(self, client, data):
+        symbol = data.get("echo_req", {}).get("ticks_history")
+        archive = self.archives.get(symbol)
+        if "error" in data or archive is None:
+            return
+        added = archive.add_history(data)
+        digits = archive.digits(min(added, HISTORY_DIGITS))
+        for plugin in self.by_symbol[symbol]:
+            self._call(plugin, "warm_start", digits)
+
+    def on_tick(self, client, data):
+        tick = data["tick"]
+        symbol = tick.get("symbol")
+        archive = self.archives.get(symbol)
+        if archive is not None and not archive.append(tick["epoch"], tick["quote"]) and tick["epoch"] == archive.last_epoch:
+            return  # the newest archived tick again
+        digit = last_digit(tick["quote"])
+        for plugin in self.by_symbol.get(symbol, ()):
+            self._call(plugin, "on_tick", tick, digit)
+
+    def on_contract_update(self, client, data):
+        contract_id = data.get("proposal_open_contract", {}).get("contract_id")
+        for plugin in self.plugins:
+            if plugin.owns(contract_id):
+                self._call(plugin, "on_contract_update", data)
+                return
+
+    def on_proposal(self, client, data):
+        if self.proposals is not None:
+            self.proposals.on_proposal(data)
+
+    # === Lifecycle ===
+    def run(self):
+        install_signal_handlers()
+        on_disconnect = self.requests.fail_all if self.requests is not None else None
+        try:
+            ConnectionSupervisor(self.client, on_disconnect=on_disconnect).run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        for plugin in self.plugins:
+            self._call(plugin, "close")
+        for archive in self.archives.values():
+            if archive is not None:
+                archive.close()
+        if self.shared:
+            print(self.summary())
+
+    def summary(self):
+        rows = [{"plug-in": plugin.name, "symbol": plugin.symbol, **(self._call(plugin, "stats") or {})}
+                for plugin in self.plugins]
+        table = tabulate(rows, headers="keys", tablefmt="fancy_grid", floatfmt=".2f")
+        if self.proposals is None:
+            return table
+        stats = self.proposals.stats()
+        return (f"{table}\nProposals: {stats['quotes']} quotes, {stats['hits']} orders bought by proposal id, "
+                f"{stats['misses']} with parameters")
+
+
+def load_script(path):
+    """Import a bot script as a module, with its folder's flat imports kept apart from other folders'."""
+    path = os.path.abspath(path)
+    folder = os.path.dirname(path)
+    local = {os.path.splitext(f)[0] for f in os.listdir(folder) if f.endswith(".py")}
+    stashed = {name: sys.modules.pop(name) for name in local if name in sys.modules}
+    sys.path.insert(0, folder)
+    try:
+        name = f"plugin_{os.path.basename(folder)}_{os.path.splitext(os.path.basename(path))[0]}"
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(folder)
+        for name in local:
+            sys.modules.pop(name, None)
+        sys.modules.update(stashed)
+    if not hasattr(module, "create_plugin"):
+        raise ValueError(f"{path} has no create_plugin(host)")
+    return module
+
+
+def _endpoint():
+    load_dotenv()
+    return f"{WS_URL}?app_id={os.getenv('APP_ID')}", os.getenv("API_TOKEN")
+
+
+def run_host(factories, archive_dir=None, history_count=1000, idle_timeout=10):
+    """Run plug-ins from `factories` (callables taking the host) over one connection until stopped."""
+    url, api_token = _endpoint()
+    host = StrategyHost(url, api_token, archive_dir, history_count, idle_timeout, shared=len(factories) > 1)
+    for factory in factories:
+        host.add(factory)
+    host.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several bot scripts as plug-ins over one connection.")
+    parser.add_argument("scripts", nargs="+", help="Bot scripts with a create_plugin(host), e.g. digit_matches/match_bot.py")
+    parser.add_argument("--archive-dir", default="tick_archive", help="Tick archive directory ('' to disable)")
+    parser.add_argument("--history-count", type=int, default=1000, help="Ticks fetched for an empty archive")
+    parser.add_argument("--idle-timeout", type=float, default=10)
+    args = parser.parse_args()
+    factories = [load_script(script).create_plugin for script in args.scripts]
+    run_host(factories, args.archive_dir or None, args.history_count, args.idle_timeout)
+
+
+if __name__ == "__main__":
+    main()
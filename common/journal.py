@@ -0,0 +1,123 @@
+# common/journal.py
+"""Buffered trade journal written from a background thread.
+
+Rows are appended to an in-memory batch on the caller's thread (no I/O) and
+written by a worker once `flush_size` rows are waiting or `flush_interval`
+seconds have passed. `close()` (also run at interpreter exit) writes what is
+left and fsyncs the file.
+
+Two formats are supported:
+
+* ``csv``    - the existing trade_log.csv layout
+* ``binary`` - fixed 26-byte little-endian records, see RECORD
+"""
+import atexit
+import csv
+import os
+import struct
+import threading
+import time
+
+CSV_HEADER = ["Timestamp", "Digit", "Stake", "Outcome", "Profit"]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+MAGIC = b"TRJ1"
+RECORD = struct.Struct("<dbdBd")  # epoch, digit (-1 if unknown), stake, outcome code, profit
+OUTCOMES = ["pending", "win", "loss"]
+OUTCOME_CODES = {name: code for code, name in enumerate(OUTCOMES)}
+
+
+class TradeJournal:
+    def __init__(self, path, fmt="csv", flush_size=256, flush_interval=1.0):
+        if fmt not in ("csv", "binary"):
+            raise ValueError(f"Unknown journal format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._pending = []
+        self._cond = threading.Condition()  # guards _pending only, so record() never waits on I/O
+        self._io_lock = threading.Lock()  # serialises batches so rows stay in order
+        self._closed = False
+        self._file = self._open()
+        self._worker = threading.Thread(target=self._run, name="trade-journal", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def _open(self):
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        if self.fmt == "csv":
+            f = open(self.path, "a", newline="")
+            if new:
+                csv.writer(f).writerow(CSV_HEADER)
+        else:
+            f = open(self.path, "ab")
+            if new:
+                f.write(MAGIC)
+        return f
+
+    def record(self, epoch, digit, stake, outcome, profit):
+        """Queue one trade row; never touches the file on the caller's thread."""
+        with self._cond:
+            if self._closed:
+                raise ValueError("Journal is closed")
+            self._pending.append((epoch, digit, stake, outcome, profit))
+            if len(self._pending) >= self.flush_size:
+                self._cond.notify()
+
+    def flush(self):
+        """Write everything queued so far before returning."""
+        with self._io_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            self._write(batch)
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._worker.join()
+        with self._io_lock:
+            os.fsync(self._file.fileno())
+            self._file.close()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self.flush_size:
+                    self._cond.wait(self.flush_interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def _write(self, batch):
+        if not batch:
+            return
+        if self.fmt == "csv":
+            writer = csv.writer(self._file)
+            writer.writerows([time.strftime(TIMESTAMP_FORMAT, time.localtime(epoch)), digit, stake, outcome, profit]
+                             for epoch, digit, stake, outcome, profit in batch)
+        else:
+            self._file.write(b"".join(
+                RECORD.pack(epoch, -1 if digit is None else int(digit), stake, OUTCOME_CODES.get(outcome, 0), profit)
+                for epoch, digit, stake, outcome, profit in batch))
+        self._file.flush()
+        self.written += len(batch)
+
+
+def read_binary_journal(path):
+    """Yield (epoch, digit, stake, outcome, profit) rows from a binary journal."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a binary trade journal")
+        while True:
+            chunk = f.read(RECORD.size * 4096)
+            if not chunk:
+                return
+            for epoch, digit, stake, code, profit in RECORD.iter_unpack(chunk[:len(chunk) - len(chunk) % RECORD.size]):
+                yield epoch, None if digit < 0 else digit, stake, OUTCOMES[code], profit
@@ -0,0 +1,173 @@
+# common/legs.py
+"""Multi-leg orders: several `buy` requests sent back to back and tracked as one.
+
+A hedge only works if every leg fills. `LegOrderBook.submit()` takes
+payloads that are already serialised and sends them in a tight loop, so the
+gap between the first and last leg is just the cost of queueing them. That
+gap is recorded as the `leg_send_skew` stage, and the spread of the
+responses as `leg_fill_skew`.
+
+Legs are sent through a RequestLayer (common/rpc.py), which ties each
+response to its leg and times out legs that never answer. An order is
+resolved once every leg has answered or timed out. If some legs filled and others did
+not, the filled legs are orphans, and `orphan_action` decides what happens
+to them:
+
+* ``sell``   - sell them back at market (``{"sell": id, "price": 0}``)
+* ``cancel`` - cancel them (``{"cancel": id}``; only for contracts bought
+  with deal cancellation)
+* ``alert``  - leave them open and report
+
+In every case `on_orphan(order)` is called, and by default it prints the
+order.
+"""
+import time
+from collections import OrderedDict
+from functools import partial
+
+from common.metrics import TIMINGS
+
+ORPHAN_ACTIONS = ("sell", "cancel", "alert")
+
+
+class Leg:
+    __slots__ = ("name", "req_id", "message", "stake", "sent_at", "answered_at", "contract_id", "error")
+
+    def __init__(self, name, req_id, message, stake):
+        self.name = name
+        self.req_id = req_id
+        self.message = message
+        self.stake = stake
+        self.sent_at = None  # perf_counter() when the leg went out
+        self.answered_at = None
+        self.contract_id = None
+        self.error = None
+
+    @property
+    def filled(self):
+        return self.contract_id is not None
+
+
+class LegOrder:
+    """One multi-leg order and the state of each leg."""
+
+    def __init__(self, order_id, legs, created_at):
+        self.order_id = order_id
+        self.legs = legs
+        self.created_at = created_at
+        self.resolved = False
+        self.orphans = []
+
+    @property
+    def sent(self):
+        return all(leg.sent_at is not None for leg in self.legs)
+
+    @property
+    def status(self):
+        if not self.resolved:
+            return "pending"
+        filled = sum(leg.filled for leg in self.legs)
+        if filled == len(self.legs):
+            return "filled"
+        return "orphaned" if filled else "failed"
+
+    @property
+    def send_skew(self):
+        sent = [leg.sent_at for leg in self.legs if leg.sent_at is not None]
+        return max(sent) - min(sent) if sent else 0.0
+
+    @property
+    def fill_skew(self):
+        answered = [leg.answered_at for leg in self.legs if leg.answered_at is not None]
+        return max(answered) - min(answered) if answered else 0.0
+
+    def describe(self):
+        return ", ".join(f"{leg.name}: {leg.contract_id if leg.filled else leg.error or 'pending'}" for leg in self.legs)
+
+
+class LegOrderBook:
+    def __init__(self, requests, orphan_action="alert", timeout=None, on_orphan=None, clock=time.time):
+        if orphan_action not in ORPHAN_ACTIONS:
+            raise ValueError(f"Unknown orphan action: {orphan_action}")
+        self.requests = requests
+        self.orphan_action = orphan_action
+        self.timeout = timeout  # per-leg response timeout; None uses the request layer's
+        self.on_orphan = on_orphan or self.report_orphan
+        self.clock = clock
+        self.orders = OrderedDict()  # order_id -> LegOrder awaiting responses
+        self._next_id = 1
+        self.filled = self.failed = self.orphaned = 0
+
+    def submit(self, legs):
+        """Send (name, req_id, message, stake) legs back to back; returns the LegOrder.
+
+        `req_id`s come from the request layer's `next_id()`. A leg whose send
+        raises (or finds the in-flight window full) is marked failed; legs
+        already sent still count, so the order can end up orphaned.
+        """
+        order = LegOrder(self._next_id, [Leg(*leg) for leg in legs], self.clock())
+        self._next_id += 1
+        self.orders[order.order_id] = order
+        send, timeout = self.requests.send, self.timeout
+        for leg in order.legs:
+            try:
+                send(leg.message, leg.req_id, "buy", partial(self._on_buy, order, leg), timeout)
+            except Exception as e:
+                leg.error = f"send failed: {e}"
+                leg.answered_at = time.perf_counter()
+                continue
+            if leg.answered_at is None:  # a synchronous transport may already have answered
+                leg.sent_at = time.perf_counter()
+        TIMINGS.add("leg_send_skew", order.send_skew)
+        if not order.resolved and all(leg.answered_at is not None for leg in order.legs):
+            self._resolve(order)
+        return order
+
+    def _on_buy(self, order, leg, data):
+        """Record a leg's buy response, or the error the request layer gives it on timeout."""
+        leg.answered_at = time.perf_counter()
+        if leg.sent_at is None:
+            leg.sent_at = leg.answered_at
+        if "error" in data:
+            leg.error = data["error"].get("message", "rejected")
+        else:
+            leg.contract_id = data.get("buy", {}).get("contract_id")
+            if leg.contract_id is None:
+                leg.error = "no contract id"
+        if not order.resolved and all(l.answered_at is not None for l in order.legs):
+            self._resolve(order)
+
+    def _resolve(self, order):
+        order.resolved = True
+        self.orders.pop(order.order_id, None)
+        TIMINGS.add("leg_fill_skew", order.fill_skew)
+        status = order.status
+        if status == "filled":
+            self.filled += 1
+            return
+        if status == "failed":
+            self.failed += 1
+            return
+        self.orphaned += 1
+        order.orphans = [leg for leg in order.legs if leg.filled]
+        if self.orphan_action != "alert":
+            for leg in order.orphans:
+                request = {"sell": leg.contract_id, "price": 0} if self.orphan_action == "sell" else {"cancel": leg.contract_id}
+                try:
+                    self.requests.request(request, partial(self._on_unwound, leg))
+                except Exception as e:
+                    print(f"❌ Could not {self.orphan_action} orphaned leg {leg.name}: {e}")
+        self.on_orphan(order)
+
+    def _on_unwound(self, leg, data):
+        if "error" in data:
+            print(f"❌ Could not {self.orphan_action} orphaned leg {leg.name}: {data['error'].get('message')}")
+        elif "sell" in data:
+            print(f"↩️ Sold orphaned leg {leg.name} for ${float(data['sell'].get('sold_for', 0)):.2f}")
+        else:
+            print(f"↩️ Cancelled orphaned leg {leg.name}")
+
+    def report_orphan(self, order):
+        action = {"sell": "selling", "cancel": "cancelling", "alert": "left open"}[self.orphan_action]
+        print(f"⚠️ Hedge order {order.order_id} filled one-sided ({order.describe()}); "
+              f"{action} {len(order.orphans)} orphaned leg(s)")
@@ -0,0 +1,245 @@
+# common/metrics.py
+"""Latency statistics, per-stage timings and an on-demand sampling profiler.
+
+`TIMINGS` is the process-wide stage registry. Hot-path code records into it
+with either
+
+    with TIMINGS.stage("stake"):
+        stake = self.calculate_stake()
+
+or `TIMINGS.add("buy_rtt", seconds)` when the start and end happen in
+different places. Each stage is a fixed-size log-bucketed histogram, so
+recording is a few integer operations and memory never grows.
+
+`install_signal_handlers()` lets a running bot be inspected without a
+restart: SIGUSR1 samples every thread's stack for a few seconds and writes
+collapsed stacks (flamegraph.pl / speedscope input) next to the bot, SIGUSR2
+prints the stage table.
+"""
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from tabulate import tabulate
+
+
+class LatencyStats:
+    """Bounded sample of latencies in seconds, e.g. tick-to-buy."""
+
+    def __init__(self, size=10000):
+        self.samples = deque(maxlen=size)
+
+    def add(self, value):
+        self.samples.append(value)
+
+    def percentile(self, pct):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    def __len__(self):
+        return len(self.samples)
+
+
+class Histogram:
+    """Latency histogram with power-of-two nanosecond buckets.
+
+    Bucket i holds values below 2**i ns, so percentiles are upper bounds
+    within a factor of two; count, total and max are exact.
+    """
+
+    BUCKETS = 40  # up to ~550 s
+
+    def __init__(self):
+        self.buckets = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        ns = int(seconds * 1e9)
+        self.buckets[min(max(ns, 0).bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, pct):
+        if not self.count:
+            return 0.0
+        rank = pct * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min((1 << i) / 1e9, self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class _Stage:
+    __slots__ = ("timings", "name", "started")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class StageTimings:
+    """Named histograms for the stages between a tick arriving and a buy leaving."""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = {}
+
+    def add(self, name, seconds):
+        if not self.enabled:
+            return
+        histogram = self.stages.get(name)
+        if histogram is None:
+            histogram = self.stages[name] = Histogram()
+        histogram.add(seconds)
+
+    def stage(self, name):
+        return _Stage(self, name) if self.enabled else _NULL_STAGE
+
+    def reset(self):
+        self.stages = {}
+
+    def rows(self):
+        return [[name, h.count, f"{h.mean() * 1e6:.1f}", f"{h.percentile(0.5) * 1e6:.1f}",
+                 f"{h.percentile(0.99) * 1e6:.1f}", f"{h.max * 1e6:.1f}", f"{h.total:.3f}"]
+                for name, h in sorted(self.stages.items())]
+
+    def report(self):
+        return tabulate(self.rows(), headers=["Stage", "Count", "Mean µs", "p50 µs", "p99 µs", "Max µs", "Total s"],
+                        tablefmt="fancy_grid")
+
+
+TIMINGS = StageTimings(enabled=os.getenv("DERIV_TIMINGS", "1") != "0")
+
+
+class SamplingProfiler:
+    """Samples the stacks of all other threads at a fixed interval.
+
+    Runs on its own thread, so the bot keeps trading while it is sampled;
+    the cost is one `sys._current_frames()` walk per interval.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds, out=None):
+        """Sample for `seconds` in the background, then write collapsed stacks to `out`."""
+        if self.running:
+            return False
+        self._thread = threading.Thread(target=self.run, args=(seconds, out), name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return True
+
+    def run(self, seconds, out=None):
+        self.stacks = Counter()
+        self.samples = 0
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                self.stacks[self._collapse(names.get(ident, str(ident)), frame)] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+        if out:
+            self.write(out)
+        print(self.summary())
+
+    @staticmethod
+    def _collapse(thread_name, frame):
+        calls = []
+        while frame is not None:
+            code = frame.f_code
+            calls.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        calls.append(thread_name)
+        return ";".join(reversed(calls))
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def top(self, limit=15):
+        """Leaf functions by share of samples."""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [(leaf, count, count / total) for leaf, count in leaves.most_common(limit)]
+
+    def summary(self, limit=15):
+        rows = [[leaf, count, f"{share:.1%}"] for leaf, count, share in self.top(limit)]
+        return (f"Profiled {self.samples} samples\n"
+                + tabulate(rows, headers=["Function", "Samples", "Share"], tablefmt="fancy_grid"))
+
+
+PROFILER = SamplingProfiler()
+
+
+def install_signal_handlers(seconds=None, out_dir="."):
+    """SIGUSR1 profiles the process for `seconds`, SIGUSR2 prints TIMINGS.
+
+    `seconds` defaults to $DERIV_PROFILE_SECONDS, or 10.
+
+    A no-op where those signals do not exist (Windows).
+    """
+    if not hasattr(signal, "SIGUSR1"):
+        return False
+    if seconds is None:
+        seconds = float(os.getenv("DERIV_PROFILE_SECONDS", "10"))
+
+    def profile(signum, frame):
+        out = os.path.join(out_dir, f"profile-{os.getpid()}-{int(time.time())}.txt")
+        if PROFILER.start(seconds, out):
+            print(f"Profiling for {seconds}s, collapsed stacks -> {out}")
+
+    def report(signum, frame):
+        print(TIMINGS.report())
+
+    signal.signal(signal.SIGUSR1, profile)
+    signal.signal(signal.SIGUSR2, report)
+    return True
@@ -0,0 +1,377 @@
+# common/proposals.py
+"""Live `proposal` subscriptions, so orders can be bought by proposal id at a known payout.
+
+A `buy` with `parameters` makes the server price the contract at order
+time, and the payout is only seen in the response. A proposal
+subscription prices the contract ahead of time and re-prices it on every
+tick. Each update carries a proposal id that buys exactly that contract
+with `{"buy": id, "price": ask_price}`.
+
+    proposals = ProposalCache(requests, client.send, governor=governor)
+    dispatch.handlers["proposal"] = lambda client, data: proposals.on_proposal(data)
+
+    template = order_template("1HZ10V", "DIGITMATCH")
+    proposals.want(template, range(10), stake)        # subscribe ahead of time, as far as the limit allows
+    quote = proposals.take(template, digit, stake)    # a fresh, unused quote or None
+    message = (proposal_buy(req_id, quote.id, quote.ask_price) if quote
+               else template.render(req_id, stake, digit))
+
+Contracts are the OrderTemplates the traders already buy with (symbol,
+contract type and duration), plus a barrier. A proposal id buys once, so
+`take()` hands each quote out once and the next update brings a new one.
+A quote is only used when it is younger than `max_age` seconds and its
+stake is within `stake_tolerance` (a fraction) of the stake asked for.
+The trade then goes out at the quote's stake. A miss falls back to a
+`buy` with parameters and subscribes that contract at that stake for
+next time. Subscriptions are per stake, so traders with different stakes
+on the same contract do not re-price each other's.
+
+Deriv limits how many proposal subscriptions a connection may hold
+(`max_proposal_subscription` in website_status -> api_call_limits). At
+most `max_subscriptions` are live; `resubscribe()` asks the server for
+the account's limit and uses it from then on. A trader `want()`s the set
+of contracts it may buy; they are subscribed while there is room, and
+again after a reconnect or when the limit is known. A miss in `take()`
+watches its contract even when the cache is full, and forgets the least
+recently used one.
+
+The cache is meant to be shared by every trader on a connection, like the
+RequestLayer it sends through. With a `governor` (common/governor.py),
+subscribes and forgets wait for rate-limit tokens: subscribes in its
+lowest lane, behind every order, and forgets, which free server slots,
+with the contract subscriptions ahead of orders. After a reconnect, call `resubscribe()` once the
+connection is authorised and before traders `want()` their contracts.
+"""
+import time
+from collections import OrderedDict
+from functools import partial
+
+from common.codec import dumps
+from common.governor import DROPPED
+
+DROPPED_CODES = ("ConnectionClosed", "RequestTimeout", "NotSent", "RateLimit")  # worth subscribing again later
+
+
+class Quote:
+    __slots__ = ("id", "stake", "ask_price", "payout", "spot", "received_at")
+
+    def __init__(self, id, stake, ask_price, payout, spot, received_at):
+        self.id = id
+        self.stake = stake
+        self.ask_price = ask_price
+        self.payout = payout
+        self.spot = spot
+        self.received_at = received_at
+
+    @property
+    def payout_rate(self):
+        """Profit per unit stake if the contract wins."""
+        return self.payout / self.ask_price - 1 if self.ask_price else 0.0
+
+
+WAITING, QUEUED, OPEN, FAILED = "waiting", "queued", "open", "failed"  # _Entry.state
+
+
+class _Entry:
+    __slots__ = ("template", "barrier", "stake", "key", "req_id", "subscription_id", "quote", "error", "state")
+
+    def __init__(self, template, barrier, stake):
+        self.template = template
+        self.barrier = barrier
+        self.stake = stake
+        self.key = (template, barrier, round(stake, 2))
+        self.req_id = None
+        self.subscription_id = None
+        self.quote = None  # latest unused quote
+        self.error = None  # why the contract is not offered; not retried while the entry is kept
+        # WAITING for a free server slot, QUEUED in the governor, OPEN (sent or live) or FAILED
+        self.state = WAITING
+
+
+class ProposalCache:
+    def __init__(self, requests, send, max_subscriptions=5, max_age=3.0, stake_tolerance=0.0, clock=time.time,
+                 governor=None):
+        self.requests = requests
+        self._send = send  # raw send, for `forget`
+        self.governor = governor
+        self.max_subscriptions = max_subscriptions  # until the server reports the account's limit
+        self.limit_known = False
+        self.max_age = max_age
+        self.stake_tolerance = stake_tolerance
+        self.clock = clock
+        self._entries = OrderedDict()  # (template, barrier, stake) -> _Entry, least recently used first
+        self._by_subscription = {}  # subscription id -> _Entry
+        self._by_req_id = {}  # req_id -> _Entry, for stream errors without a subscription id
+        self._payout_rates = {}  # (template, barrier) -> last known profit per unit stake
+        self._wanted = {}  # template -> (barriers, stake), subscribed while there is room
+        # Server slots still held by dropped subscriptions, until their forget is sent
+        self._closing = 0
+        self._connection = 0  # bumped by resubscribe(), so work queued for an old connection is skipped
+        self.hits = 0
+        self.misses = 0
+        self.updates = 0
+
+    # === Subscriptions ===
+    def watch(self, template, barriers, stake):
+        """Keep proposals for `template` on each of `barriers` at `stake` live, forgetting the least recently used."""
+        for barrier in barriers:
+            entry = self._find(template, str(barrier), stake)
+            if entry is not None:
+                self._entries.move_to_end(entry.key)
+                continue
+            self._add(template, str(barrier), stake)
+            while len(self._entries) > self.max_subscriptions:
+                self._drop(next(iter(self._entries.values())))
+        self._open()
+
+    def want(self, template, barriers, stake):
+        """Subscribe `template` on `barriers` at `stake` while there is room, now and after reconnects.
+
+        Replaces what was wanted for `template` before; its contracts at another
+        stake are forgotten, since the trader no longer buys at that stake.
+        """
+        barriers = [str(barrier) for barrier in barriers]
+        self._wanted[template] = (barriers, stake)
+        for entry in list(self._entries.values()):
+            if entry.template is template and not self._stake_matches(entry.stake, stake):
+                self._drop(entry)
+        self._fill()
+        self._open()
+
+    def _fill(self):
+        # Wanted contracts take free places only; they never evict
+        for template, (barriers, stake) in self._wanted.items():
+            for barrier in barriers:
+                if len(self._entries) >= self.max_subscriptions:
+                    return
+                if self._find(template, barrier, stake) is None:
+                    self._add(template, barrier, stake)
+
+    def _open(self):
+        """Subscribe waiting entries, most recently used first, while the server has free slots."""
+        used = self._closing + sum(entry.state in (QUEUED, OPEN) for entry in self._entries.values())
+        for entry in reversed(list(self._entries.values())):
+            if used >= self.max_subscriptions:
+                return
+            if entry.state == WAITING:
+                if not self._subscribe(entry):
+                    return
+                used += 1
+
+    def set_limit(self, max_subscriptions):
+        """Use the account's proposal subscription limit: forget the least recently used beyond it, or fill up to it."""
+        self.max_subscriptions = max_subscriptions
+        self.limit_known = True
+        while len(self._entries) > max_subscriptions:
+            self._drop(next(iter(self._entries.values())))
+        self._fill()
+        self._open()
+
+    def _on_website_status(self, data):
+        limit = data.get("website_status", {}).get("api_call_limits", {}).get("max_proposal_subscription", {})
+        if "max" in limit:
+            self.set_limit(int(limit["max"]))
+
+    def _find(self, template, barrier, stake):
+        # Linear, but there are only max_subscriptions entries
+        for entry in self._entries.values():
+            if entry.template is template and entry.barrier == barrier and self._stake_matches(entry.stake, stake):
+                return entry
+        return None
+
+    def _add(self, template, barrier, stake):
+        entry = _Entry(template, barrier, stake)
+        self._entries[entry.key] = entry
+        return entry
+
+    def _subscribe(self, entry):
+        """Send, or queue in the governor, the entry's subscribe; returns False if the governor refused it."""
+        if self.governor is None:
+            self._send_subscribe(entry, self._connection)
+            return True
+        entry.state = QUEUED
+        status = self.governor.submit(partial(self._send_subscribe, entry, self._connection), lane="quote",
+                                      key=("proposal",) + entry.key, max_wait=float("inf"))
+        if status == DROPPED:  # the governor's queue is full; tried again when a slot frees
+            entry.state = WAITING
+            return False
+        return True
+
+    def _send_subscribe(self, entry, connection):
+        if self._entries.get(entry.key) is not entry or entry.state == OPEN:
+            return  # dropped while waiting in the governor
+        entry.state = OPEN
+        template = entry.template
+        # Registered before sending: a synchronous transport answers inside send()
+        req_id = entry.req_id = self.requests.next_id()
+        self._by_req_id[req_id] = entry
+        entry.error = None
+        message = dumps({"proposal": 1, "amount": entry.stake, "basis": template.basis,
+                         "contract_type": template.contract_type, "currency": template.currency,
+                         "duration": template.duration, "duration_unit": template.duration_unit,
+                         "symbol": template.symbol, "barrier": entry.barrier, "subscribe": 1, "req_id": req_id})
+        try:
+            self.requests.send(message, req_id, "proposal", partial(self._on_response, entry, connection))
+        except Exception as e:  # window full or connection down; the next miss watches it again
+            print(f"❌ Proposal subscription failed: {e}")
+            self._by_req_id.pop(req_id, None)
+            self._entries.pop(entry.key, None)
+
+    def _drop(self, entry):
+        self._entries.pop(entry.key, None)
+        self._by_req_id.pop(entry.req_id, None)
+        self._by_subscription.pop(entry.subscription_id, None)
+        if entry.state == QUEUED:  # not sent yet: take it out of the governor's queue
+            self.governor.cancel(("proposal",) + entry.key)
+        if entry.state != OPEN:
+            return  # holds no server slot
+        entry.state = FAILED
+        self._closing += 1
+        if entry.subscription_id is not None:
+            self._forget(entry.subscription_id)
+        # A subscription still being opened is forgotten when its response arrives (_on_response)
+
+    def _forget(self, subscription_id):
+        # Frees a server slot, so it goes ahead of orders in a lane that is never refused
+        forget = partial(self._send_forget, subscription_id, self._connection)
+        if self.governor is None:
+            forget()
+        else:
+            self.governor.submit(forget, lane="settlement", max_wait=float("inf"))
+
+    def _send_forget(self, subscription_id, connection):
+        if connection != self._connection:
+            return  # the subscription ended with its connection
+        self._closing -= 1
+        try:
+            self._send(dumps({"forget": subscription_id}))
+        except Exception as e:
+            print(f"❌ Forget failed: {e}")
+        self._open()
+
+    def resubscribe(self):
+        """Subscribe every watched contract again, e.g. after a reconnect (old ids and quotes are gone).
+
+        The first time, also asks the server for the account's subscription limit.
+        """
+        self._connection += 1
+        self._closing = 0
+        self._by_subscription.clear()
+        self._by_req_id.clear()
+        for entry in self._entries.values():
+            entry.subscription_id = entry.quote = None
+            if entry.state != QUEUED:  # a queued subscribe goes out on the new connection anyway
+                entry.state = WAITING
+        self._fill()
+        self._open()
+        if not self.limit_known:
+            try:
+                self.requests.request({"website_status": 1}, callback=self._on_website_status)
+            except Exception as e:
+                print(f"❌ website_status request failed: {e}")
+
+    def close(self):
+        """Forget every live subscription."""
+        for entry in list(self._entries.values()):
+            self._drop(entry)
+
+    # === Updates ===
+    def _on_response(self, entry, connection, data):
+        if connection != self._connection:
+            return  # answered on, or failed with, an old connection
+        subscription_id = data.get("subscription", {}).get("id")
+        if self._entries.get(entry.key) is not entry:  # dropped while subscribing
+            if subscription_id is not None:
+                self._forget(subscription_id)
+            else:
+                self._closing -= 1
+                self._open()
+            return
+        if "error" in data:
+            self._by_req_id.pop(entry.req_id, None)
+            entry.state = FAILED
+            entry.quote = None
+            entry.error = data["error"].get("message", "error")
+            if data["error"].get("code") in DROPPED_CODES:
+                self._entries.pop(entry.key, None)  # watched again on the next miss
+            self._open()
+            return
+        if subscription_id is not None:
+            entry.subscription_id = subscription_id
+            self._by_subscription[subscription_id] = entry
+        self._update(entry, data)
+
+    def on_proposal(self, data):
+        """A `proposal` stream update; returns False if it is not for a watched contract."""
+        entry = self._by_subscription.get(data.get("subscription", {}).get("id"))
+        if entry is None:
+            entry = self._by_req_id.get(data.get("req_id"))
+            if entry is None:
+                return False
+        if "error" in data:
+            entry.quote = None  # e.g. the market closed; the subscription has ended
+            entry.error = data["error"].get("message", "error")
+            entry.state = FAILED  # no slot to give back
+            self._drop(entry)
+            self._open()
+            return True
+        self._update(entry, data)
+        return True
+
+    def _update(self, entry, data):
+        proposal = data.get("proposal") or {}
+        if "id" not in proposal:
+            return
+        ask_price = float(proposal.get("ask_price", entry.stake))
+        entry.quote = Quote(proposal["id"], entry.stake, ask_price, float(proposal.get("payout", 0)),
+                            proposal.get("spot"), self.clock())
+        self._payout_rates[(entry.template, entry.barrier)] = entry.quote.payout_rate
+        self.updates += 1
+
+    # === Orders ===
+    def _stake_matches(self, quoted, stake):
+        return abs(quoted - stake) <= max(self.stake_tolerance * stake, 0.005)
+
+    def take(self, template, barrier, stake):
+        """A fresh quote for `template` on `barrier` at about `stake`, handed out once; None on a miss.
+
+        On a miss the contract is watched at `stake`, so a later order can hit.
+        """
+        entry = self._find(template, str(barrier), stake)
+        quote = entry.quote if entry is not None else None
+        if quote is not None and self.clock() - quote.received_at <= self.max_age:
+            entry.quote = None
+            self._entries.move_to_end(entry.key)
+            self.hits += 1
+            return quote
+        self.misses += 1
+        if entry is None:
+            self.watch(template, (barrier,), stake)
+        return None
+
+    def payout_rate(self, template, barrier):
+        """Last known profit per unit stake of a winning contract, or None if it was never quoted."""
+        return self._payout_rates.get((template, str(barrier)))
+
+    def expected_value(self, template, barrier, win_probability):
+        """Expected profit per unit stake at `win_probability`, from the last quote; None if unknown."""
+        rate = self.payout_rate(template, barrier)
+        if rate is None:
+            return None
+        return win_probability * rate - (1 - win_probability)
+
+    def best_barrier(self, template, win_probabilities):
+        """(barrier, expected value) with the highest expected value among quoted barriers, or (None, None).
+
+        `win_probabilities` maps barrier -> the strategy's estimate that the contract wins.
+        """
+        best = (None, None)
+        for barrier, probability in win_probabilities.items():
+            value = self.expected_value(template, barrier, probability)
+            if value is not None and (best[1] is None or value > best[1]):
+                best = (barrier, value)
+        return best
+
+    def stats(self):
+        return {"quotes": self.updates, "hits": self.hits, "misses": self.misses,
+                "subscriptions": len(self._by_subscription)}
@@ -0,0 +1,166 @@
+# common/rpc.py
+"""req_id-tagged requests with futures, a bounded in-flight window and timeouts.
+
+Deriv echoes a request's `req_id` in its response, so a response can be
+tied to the request that caused it instead of being handled as an
+anonymous msg_type event.
+
+    requests = RequestLayer(client.send, window=100, timeout=10)
+    dispatch = Dispatcher(handlers, on_error=..., requests=requests)
+
+    future = requests.request({"balance": 1}, callback=on_balance)
+
+    req_id = requests.next_id()                # for payloads rendered with their req_id,
+    message = template.render(req_id, ...)     # e.g. OrderTemplate
+    requests.send(message, req_id, "buy", callback=trader.handle_buy)
+
+Every request resolves exactly once: with its response (errors included),
+or with a response synthesised by the layer (`RequestTimeout`,
+`ConnectionClosed`) shaped like an API error, so callbacks handle both
+with one code path. Round trips are recorded per msg_type as
+`<msg_type>_rtt` timing stages.
+
+At most `window` requests are in flight; beyond that `send()` raises
+WindowFull rather than queueing, since an order that waits for a slot is
+usually no longer worth placing.
+
+A timeout does not mean the server ignored the request: a `buy` may still
+be filled. Requests sent with `on_late` keep their req_id for `grace`
+seconds after timing out, and a response arriving in that time goes to
+`on_late(response)`. A request failed by `fail_all()` is not kept, since
+its response went to the closed connection; the caller has to ask the
+server after reconnecting (e.g. `portfolio`).
+"""
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from common.codec import dumps
+from common.metrics import TIMINGS
+
+
+class WindowFull(RuntimeError):
+    """Too many requests are waiting for a response."""
+
+
+class Request:
+    __slots__ = ("req_id", "msg_type", "sent_at", "deadline", "callback", "on_late", "future")
+
+    def __init__(self, req_id, msg_type, deadline, callback, on_late=None):
+        self.req_id = req_id
+        self.msg_type = msg_type
+        self.sent_at = time.perf_counter()
+        self.deadline = deadline
+        self.callback = callback
+        self.on_late = on_late
+        self.future = Future()
+
+
+def error_response(req_id, msg_type, code, message):
+    """A response shaped like an API error, for requests that never got one."""
+    return {"req_id": req_id, "msg_type": msg_type, "echo_req": {}, "error": {"code": code, "message": message}}
+
+
+class RequestLayer:
+    def __init__(self, send, window=100, timeout=10.0, clock=time.time, grace=60.0):
+        self._send = send
+        self.window = window
+        self.timeout = timeout
+        self.clock = clock
+        self.grace = grace
+        self.pending = {}  # req_id -> Request
+        self._deadlines = []  # heap of (deadline, req_id); entries for answered requests are skipped
+        self.late = OrderedDict()  # req_id -> (end of grace, on_late) for timed-out requests, oldest first
+        self._ids = itertools.count(1)
+        self.timed_out = 0
+        self.late_responses = 0  # answered within the grace after timing out
+        self.rejected = 0  # refused by a full window
+
+    def next_id(self):
+        return next(self._ids)
+
+    @property
+    def in_flight(self):
+        return len(self.pending)
+
+    def send(self, message, req_id, msg_type, callback=None, timeout=None, on_late=None):
+        """Send a serialised request that already carries `req_id`; returns a Future of its response.
+
+        `callback(response)` runs when it resolves, on the thread that resolves it.
+        `on_late(response)` runs for a response that arrives within `grace`
+        seconds after the request timed out.
+        If the transport raises, the request is dropped without calling back
+        and the exception propagates to the caller.
+        """
+        self.expire()
+        if len(self.pending) >= self.window:
+            self.rejected += 1
+            raise WindowFull(f"{len(self.pending)} requests already in flight")
+        request = Request(req_id, msg_type, self.clock() + (self.timeout if timeout is None else timeout), callback,
+                          on_late)
+        # Registered before sending: a synchronous transport (SimulatedExchange) answers inside send()
+        self.pending[req_id] = request
+        heapq.heappush(self._deadlines, (request.deadline, req_id))
+        try:
+            self._send(message)
+        except Exception as e:
+            self._finish(request, error_response(req_id, msg_type, "NotSent", str(e)), notify=False)
+            raise
+        return request.future
+
+    def request(self, payload, callback=None, timeout=None):
+        """Tag a request dict with a fresh req_id, serialise and send it; returns a Future."""
+        req_id = payload["req_id"] = self.next_id()
+        msg_type = next(iter(payload))
+        return self.send(dumps(payload), req_id, msg_type, callback, timeout)
+
+    def resolve(self, data):
+        """Complete the request `data` answers; returns False if it is not one of ours."""
+        request = self.pending.get(data.get("req_id"))
+        if request is None:
+            return self._resolve_late(data)
+        TIMINGS.add(f"{request.msg_type}_rtt", time.perf_counter() - request.sent_at)
+        self._finish(request, data)
+        self.expire()
+        return True
+
+    def _resolve_late(self, data):
+        late = self.late.pop(data.get("req_id"), None) if self.late else None
+        if late is None:
+            return False
+        self.late_responses += 1
+        late[1](data)
+        return True
+
+    def expire(self):
+        """Resolve requests past their deadline with a RequestTimeout error response."""
+        now = self.clock()
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] <= now:
+            _, req_id = heapq.heappop(deadlines)
+            request = self.pending.get(req_id)
+            if request is not None:
+                self.timed_out += 1
+                if request.on_late is not None:
+                    self.late[req_id] = (now + self.grace, request.on_late)
+                self._finish(request, error_response(req_id, request.msg_type, "RequestTimeout", "No response in time"))
+        if not self.pending and deadlines:
+            deadlines.clear()
+        late = self.late
+        while late and next(iter(late.values()))[0] <= now:
+            late.popitem(last=False)
+
+    def fail_all(self, code="ConnectionClosed", message="Connection closed before a response arrived"):
+        """Resolve every outstanding request with an error, e.g. when the connection drops."""
+        for request in list(self.pending.values()):
+            self._finish(request, error_response(request.req_id, request.msg_type, code, message))
+        self._deadlines.clear()
+
+    def _finish(self, request, data, notify=True):
+        del self.pending[request.req_id]
+        request.future.set_result(data)
+        # Called directly rather than as a Future callback, so exceptions reach the caller
+        if notify and request.callback is not None:
+            request.callback(data)
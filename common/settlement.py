@@ -0,0 +1,163 @@
+# common/settlement.py
+import json
+from collections import Counter
+
+from common.ticks import last_digit
+
+
+def digit_contract_won(contract_type, barrier, exit_digit):
+    if contract_type == "DIGITMATCH":
+        return exit_digit == int(barrier)
+    if contract_type == "DIGITDIFF":
+        return exit_digit != int(barrier)
+    raise ValueError(f"Unsupported contract type: {contract_type}")
+
+
+def contract_won(contract_type, barrier, entry_quote, exit_quote):
+    """Settle digit contracts on the exit digit and CALL/PUT on an absolute or relative barrier."""
+    if contract_type in ("DIGITMATCH", "DIGITDIFF"):
+        return digit_contract_won(contract_type, barrier, last_digit(exit_quote))
+    barrier = str(barrier)
+    level = entry_quote + float(barrier) if barrier[0] in "+-" else float(barrier)
+    if contract_type == "CALL":
+        return exit_quote > level
+    if contract_type == "PUT":
+        return exit_quote < level
+    raise ValueError(f"Unsupported contract type: {contract_type}")
+
+
+class ReplayClock:
+    """Callable clock driven by tick epochs instead of wall time."""
+
+    def __init__(self, now=0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class SimulatedExchange:
+    """Stands in for the websocket: accepts `buy` payloads and settles them locally.
+
+    Trader objects call `send()` exactly as they would on a live socket. Each
+    contract settles on the `duration`-th tick fed through `on_tick()` after it
+    was bought, and `on_settle` receives a dict shaped like a sold
+    `proposal_open_contract` message. `payouts` maps contract types to the
+    profit per unit stake of a win (PAYOUTS in the bots' config.py); a loss
+    loses the stake.
+    """
+
+    def __init__(self, payouts, on_settle=None, balance=0.0, on_buy=None):
+        self.payouts = dict(payouts)
+        self.on_settle = on_settle
+        self.on_buy = on_buy
+        self.balance = balance
+        self.tick_index = 0
+        self.next_contract_id = 1
+        self.open_contracts = {}  # exit tick index -> [contract]
+        self.requests = Counter()  # non-buy requests by type, kept for inspection
+
+    def send(self, message):
+        request = json.loads(message) if isinstance(message, str) else message
+        if "buy" not in request:
+            self.requests[next(iter(request), None)] += 1
+            return
+        params = request["parameters"]
+        contract_type = params["contract_type"]
+        if contract_type not in self.payouts:
+            raise ValueError(f"No payout configured for {contract_type}")
+        stake = float(params["amount"])
+        contract = {
+            "contract_id": self.next_contract_id,
+            "contract_type": contract_type,
+            "barrier": params["barrier"],
+            "buy_price": stake,
+            "payout": round(stake * (1 + self.payouts[contract_type]), 2),
+            "purchase_tick": self.tick_index,
+        }
+        self.next_contract_id += 1
+        self.balance -= stake
+        exit_index = self.tick_index + int(params.get("duration", 5))
+        self.open_contracts.setdefault(exit_index, []).append(contract)
+        if self.on_buy:
+            response = {"msg_type": "buy", "echo_req": request,
+                        "buy": {"contract_id": contract["contract_id"], "buy_price": stake, "payout": contract["payout"]}}
+            if "req_id" in request:
+                response["req_id"] = request["req_id"]
+            self.on_buy(response)
+
+    def on_tick(self, epoch, quote):
+        """Advance one tick and settle every contract expiring on it."""
+        self.tick_index += 1
+        due = self.open_contracts.pop(self.tick_index, None)
+        if not due:
+            return []
+        exit_digit = last_digit(quote)
+        for contract in due:
+            won = digit_contract_won(contract["contract_type"], contract["barrier"], exit_digit)
+            contract["profit"] = round(contract["payout"] - contract["buy_price"], 2) if won else -contract["buy_price"]
+            contract["sell_price"] = contract["payout"] if won else 0
+            contract["exit_tick"] = quote
+            contract["exit_tick_time"] = epoch
+            contract["is_sold"] = 1
+            contract["status"] = "won" if won else "lost"
+            self.balance += contract["sell_price"]
+            if self.on_settle:
+                self.on_settle(contract)
+        return due
+
+    def open_count(self):
+        return sum(len(c) for c in self.open_contracts.values())
+
+
+class BacktestReport:
+    """Running P&L, win rate and drawdown over settled contracts."""
+
+    def __init__(self):
+        self.trades = 0
+        self.wins = 0
+        self.staked = 0.0
+        self.pnl = 0.0
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+        self.ticks = 0
+
+    def record(self, contract):
+        self.trades += 1
+        self.staked += contract["buy_price"]
+        self.pnl += contract["profit"]
+        if contract["profit"] > 0:
+            self.wins += 1
+        self.peak = max(self.peak, self.pnl)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.pnl)
+
+    def summary(self):
+        return {
+            "ticks": self.ticks,
+            "trades": self.trades,
+            "wins": self.wins,
+            "win_rate": self.wins / self.trades if self.trades else 0.0,
+            "staked": round(self.staked, 2),
+            "pnl": round(self.pnl, 2),
+            "max_drawdown": round(self.max_drawdown, 2),
+        }
+
+    def rows(self):
+        s = self.summary()
+        return [
+            ["Ticks", s["ticks"]],
+            ["Trades", s["trades"]],
+            ["Win Rate", f"{s['win_rate']:.2%}"],
+            ["Total Staked", f"{s['staked']:.2f} USD"],
+            ["Total P/L", f"{s['pnl']:.2f} USD"],
+            ["Max Drawdown", f"{s['max_drawdown']:.2f} USD"],
+        ]
+
+
+def load_payouts(path, defaults):
+    """Merge a JSON payout table over `defaults` (None keeps defaults)."""
+    payouts = dict(defaults)
+    if path:
+        with open(path) as f:
+            payouts.update(json.load(f))
+    return payouts
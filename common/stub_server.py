@@ -0,0 +1,509 @@
+# common/stub_server.py
+"""Local stand-in for the subset of the Deriv WebSocket API the bots use.
+
+Run from the repository root:
+
+    python -m common.stub_server --symbols 1HZ10V,R_100 --rate 100
+
+then point any bot at it with DERIV_WS_URL=ws://localhost:8765 .
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import time
+import zlib
+from collections import OrderedDict, deque
+
+import websockets
+
+from common.metrics import LatencyStats
+from common.settlement import contract_won, load_payouts
+from common.ticks import read_ticks
+
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "digit_matches", "config.py")
+HILO_PAYOUTS = {"CALL": 0.95, "PUT": 0.95}  # hedge_hilo_bot.py settles nothing offline, so no config.py has these
+REQUEST_TYPES = ("authorize", "ticks_history", "ticks", "balance", "buy", "sell", "cancel", "proposal_open_contract",
+                 "proposal", "portfolio", "website_status", "forget", "ping")
+PROPOSAL_FIELDS = ("amount", "basis", "contract_type", "currency", "duration", "duration_unit", "symbol", "barrier")
+
+
+def config_payouts(path=CONFIG):
+    """PAYOUTS from a bot's config.py, plus the CALL/PUT rates, as the payouts the stub offers."""
+    spec = importlib.util.spec_from_file_location("_stub_config", path)
+    config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config)
+    return dict(HILO_PAYOUTS, **config.PAYOUTS)
+
+
+class TickFeed:
+    """Deterministic quote stream for one symbol (seeded random walk or recorded quotes).
+
+    `backfill` ticks are generated up front, ending now, so that
+    `ticks_history` has something to return from the first request.
+    """
+
+    def __init__(self, symbol, seed=0, quotes=None, pip_size=2, backfill=1000, history_size=10000):
+        self.symbol = symbol
+        self.pip_size = pip_size
+        self.quotes = quotes
+        self.index = 0
+        self.epoch = int(time.time()) - backfill
+        self.quote = 5000.0
+        self.rng = random.Random(seed ^ zlib.crc32(symbol.encode()))
+        self.history = deque(maxlen=history_size)  # (epoch, quote)
+        self.last_sent = 0.0  # perf_counter of the latest tick pushed to clients
+        for _ in range(backfill):
+            self.next_tick()
+        self.tick = self.next_tick()
+
+    def next_tick(self):
+        if self.quotes:
+            self.quote = self.quotes[self.index % len(self.quotes)]
+        else:
+            self.quote = round(self.quote + self.rng.gauss(0, 0.5), self.pip_size)
+        self.index += 1
+        self.epoch += 1
+        self.history.append((self.epoch, self.quote))
+        self.tick = {
+            "ask": self.quote,
+            "bid": self.quote,
+            "epoch": self.epoch,
+            "id": f"{self.symbol}-tick",
+            "pip_size": self.pip_size,
+            "quote": self.quote,
+            "symbol": self.symbol,
+        }
+        return self.tick
+
+
+class Session:
+    """State for one client connection."""
+
+    def __init__(self, websocket, queue_size):
+        self.websocket = websocket
+        self.outbox = asyncio.Queue()
+        self.queue_size = queue_size
+        self.subscriptions = {}  # subscription id -> (kind, key)
+        self.tick_subs = {}  # symbol -> subscription id
+        self.balance_sub = None
+        self.contract_subs = {}  # contract_id -> subscription id
+        self.proposal_subs = {}  # subscription id -> [proposal request, its live proposal id]
+        self.authorized = False
+        self.dropped = 0
+
+    def push(self, message, droppable=False):
+        # Ticks are shed once a slow client has fallen `queue_size` messages behind;
+        # responses and settlements are always delivered.
+        if droppable and self.outbox.qsize() >= self.queue_size:
+            self.dropped += 1
+            return
+        self.outbox.put_nowait(message)
+
+
+class StubServer:
+    def __init__(self, symbols, rate=1.0, seed=0, quotes=None, balance=10000.0,
+                 payouts=None, real_account=False, queue_size=10000):
+        self.rate = rate
+        self.seed = seed
+        self.balance = balance
+        self.payouts = config_payouts() if payouts is None else dict(payouts)
+        self.loginid = "CR0000001" if real_account else "VRTC0000001"
+        self.queue_size = queue_size
+        self.feeds = {s: TickFeed(s, seed, quotes) for s in symbols}
+        self.sessions = set()
+        self.contracts = {}  # contract_id -> contract dict
+        self.settled = deque()  # settled ids, oldest first, so soak runs stay bounded
+        self.keep_settled = 10000
+        self.expiring = {}  # (symbol, tick index) -> [contract_id]
+        self.proposals = OrderedDict()  # proposal id -> (session, contract parameters); each buys once
+        self.keep_proposals = 10000
+        self.max_proposal_subscriptions = 5  # per connection, reported in website_status
+        self.next_id = 1
+        self.ticks_sent = 0
+        self.buys = 0
+        self.latency = LatencyStats()
+
+    def _new_id(self):
+        self.next_id += 1
+        return self.next_id
+
+    # === Feeds ===
+    def feed(self, symbol):
+        feed = self.feeds.get(symbol)
+        if feed is None:
+            feed = self.feeds[symbol] = TickFeed(symbol, self.seed)
+            asyncio.get_running_loop().create_task(self.run_feed(feed))
+        return feed
+
+    async def run_feed(self, feed):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        emitted = 0
+        while True:
+            due = int((loop.time() - start) * self.rate)
+            while emitted < due:
+                self.emit_tick(feed)
+                emitted += 1
+            await asyncio.sleep(max(0.0, (emitted + 1) / self.rate - (loop.time() - start)))
+
+    def emit_tick(self, feed):
+        tick = feed.next_tick()
+        for session in self.sessions:
+            sub_id = session.tick_subs.get(feed.symbol)
+            if sub_id is not None:
+                session.push({"echo_req": {"ticks": feed.symbol, "subscribe": 1}, "msg_type": "tick",
+                              "subscription": {"id": sub_id}, "tick": dict(tick, id=sub_id)}, droppable=True)
+                self.ticks_sent += 1
+        feed.last_sent = time.perf_counter()
+        for session in self.sessions:
+            for sub_id, subscription in session.proposal_subs.items():
+                request = subscription[0]
+                if request["symbol"] != feed.symbol:
+                    continue
+                # The superseded id stays buyable until used or pushed out: a digit price does not move
+                message = self.proposal_message(session, request, sub_id)
+                subscription[1] = message["proposal"]["id"]
+                if "req_id" in request:
+                    message["req_id"] = request["req_id"]
+                session.push(message, droppable=True)
+        for contract_id in self.expiring.pop((feed.symbol, feed.index), ()):
+            self.settle(self.contracts[contract_id], feed)
+
+    # === Contracts ===
+    def settle(self, contract, feed):
+        won = contract_won(contract["contract_type"], contract["barrier"], contract["entry_spot"], feed.quote)
+        contract.update({
+            "is_sold": 1,
+            "is_expired": 1,
+            "status": "won" if won else "lost",
+            "exit_tick": feed.quote,
+            "exit_tick_time": feed.epoch,
+            "sell_price": contract["payout"] if won else 0,
+            "profit": round(contract["payout"] - contract["buy_price"], 2) if won else -contract["buy_price"],
+        })
+        self.balance += contract["sell_price"]
+        self.settled.append(contract["contract_id"])
+        if len(self.settled) > self.keep_settled:
+            self.contracts.pop(self.settled.popleft(), None)
+        session = contract.pop("session")
+        sub_id = session.contract_subs.pop(contract["contract_id"], None)
+        if sub_id is not None:
+            session.subscriptions.pop(sub_id, None)
+            session.push(self.contract_message(contract, sub_id))
+        self.push_balance()
+
+    def contract_message(self, contract, sub_id=None, echo=None):
+        body = {k: v for k, v in contract.items() if k != "session"}
+        message = {"echo_req": echo or {"proposal_open_contract": 1, "contract_id": contract["contract_id"]},
+                   "msg_type": "proposal_open_contract", "proposal_open_contract": body}
+        if sub_id is not None:
+            message["subscription"] = {"id": sub_id}
+        return message
+
+    def push_balance(self):
+        for session in self.sessions:
+            if session.balance_sub is not None:
+                session.push({"msg_type": "balance", "subscription": {"id": session.balance_sub},
+                              "balance": {"balance": round(self.balance, 2), "currency": "USD", "loginid": self.loginid}})
+
+    # === Requests ===
+    def handle(self, session, request):
+        for name in REQUEST_TYPES:
+            if name in request:
+                if name not in ("authorize", "ping", "ticks", "ticks_history", "website_status") and not session.authorized:
+                    return self.error(request, "AuthorizationRequired", "Please log in.")
+                return getattr(self, f"on_{name}")(session, request)
+        return self.error(request, "UnrecognisedRequest", "Unrecognised request.")
+
+    def error(self, request, code, message):
+        return {"echo_req": request, "msg_type": request_type(request), "error": {"code": code, "message": message}}
+
+    def on_authorize(self, session, request):
+        session.authorized = True
+        return {"msg_type": "authorize", "authorize": {"loginid": self.loginid, "balance": round(self.balance, 2),
+                                                       "currency": "USD", "is_virtual": int(self.loginid.startswith("VRTC"))}}
+
+    def on_ping(self, session, request):
+        return {"msg_type": "ping", "ping": "pong"}
+
+    def on_website_status(self, session, request):
+        return {"msg_type": "website_status", "website_status": {"site_status": "up", "api_call_limits": {
+            "max_proposal_subscription": {"applies_to": "subscribing to proposal concurrently",
+                                          "max": self.max_proposal_subscriptions}}}}
+
+    def subscribe_ticks(self, session, symbol):
+        sub_id = session.tick_subs[symbol] = f"t{self._new_id()}"
+        session.subscriptions[sub_id] = ("ticks", symbol)
+        return sub_id
+
+    def on_ticks(self, session, request):
+        symbol = request["ticks"]
+        feed = self.feed(symbol)
+        if not request.get("subscribe"):
+            return {"msg_type": "tick", "tick": feed.tick}
+        if symbol in session.tick_subs:
+            return self.error(request, "AlreadySubscribed", f"You are already subscribed to {symbol}.")
+        sub_id = self.subscribe_ticks(session, symbol)
+        # The subscribe response is the current tick, as on the live API.
+        return {"msg_type": "tick", "subscription": {"id": sub_id}, "tick": dict(feed.tick, id=sub_id)}
+
+    def on_ticks_history(self, session, request):
+        symbol = request["ticks_history"]
+        if request.get("style", "ticks") != "ticks":
+            return self.error(request, "InputValidationFailed", "Only the ticks style is supported.")
+        feed = self.feed(symbol)
+        start = int(request.get("start") or 0)
+        end = request.get("end", "latest")
+        end = feed.epoch if end == "latest" else int(end)
+        count = int(request.get("count", 5000))
+        ticks = [(epoch, quote) for epoch, quote in feed.history if start <= epoch <= end][-count:]
+        message = {"msg_type": "history", "pip_size": feed.pip_size,
+                   "history": {"times": [t[0] for t in ticks], "prices": [t[1] for t in ticks]}}
+        if request.get("subscribe"):
+            if symbol in session.tick_subs:
+                return self.error(request, "AlreadySubscribed", f"You are already subscribed to {symbol}.")
+            # Live ticks follow the history on the same subscription, as on the live API.
+            message["subscription"] = {"id": self.subscribe_ticks(session, symbol)}
+        return message
+
+    def on_balance(self, session, request):
+        message = {"msg_type": "balance", "balance": {"balance": round(self.balance, 2), "currency": "USD", "loginid": self.loginid}}
+        if request.get("subscribe"):
+            session.balance_sub = f"b{self._new_id()}"
+            session.subscriptions[session.balance_sub] = ("balance", None)
+            message["subscription"] = {"id": session.balance_sub}
+        return message
+
+    def on_buy(self, session, request):
+        if request.get("buy") == 1:
+            params = request.get("parameters") or {}
+        else:  # a proposal id
+            proposal = self.proposals.pop(str(request.get("buy")), None)
+            if proposal is None or proposal[0] is not session:
+                return self.error(request, "InvalidContractProposal", "Proposal not found or already used.")
+            params = proposal[1]
+        invalid = self.check_contract(request, params)
+        if invalid is not None:
+            return invalid
+        contract_type = params["contract_type"]
+        stake = float(params["amount"])
+        try:
+            price = float(request.get("price", stake))
+        except (TypeError, ValueError):
+            return self.error(request, "InputValidationFailed", "The price must be a number.")
+        if stake > price:
+            return self.error(request, "PriceMoved", "Contract price exceeds the maximum you specified.")
+        if stake > self.balance:
+            return self.error(request, "InsufficientBalance", "Your account balance is insufficient for this transaction.")
+        feed = self.feed(params.get("symbol"))
+        if feed.last_sent:
+            self.latency.add(time.perf_counter() - feed.last_sent)
+        self.buys += 1
+        contract_id = self._new_id()
+        duration = int(params.get("duration", 5))
+        contract = {
+            "contract_id": contract_id,
+            "contract_type": contract_type,
+            "underlying": feed.symbol,
+            "barrier": params.get("barrier"),
+            "buy_price": stake,
+            "payout": round(stake * (1 + self.payouts[contract_type]), 2),
+            "entry_spot": feed.quote,
+            "date_start": feed.epoch,
+            "is_sold": 0,
+            "status": "open",
+            "session": session,
+        }
+        self.contracts[contract_id] = contract
+        self.expiring.setdefault((feed.symbol, feed.index + duration), []).append(contract_id)
+        self.balance -= stake
+        self.push_balance()
+        return {"msg_type": "buy", "buy": {"contract_id": contract_id, "buy_price": stake, "payout": contract["payout"],
+                                           "balance_after": round(self.balance, 2), "start_time": feed.epoch,
+                                           "transaction_id": contract_id,
+                                           "longcode": f"{contract_type} {params.get('barrier')} on {feed.symbol}"}}
+
+    def on_sell(self, session, request):
+        contract = self.contracts.get(request.get("sell"))
+        if contract is None or contract["is_sold"]:
+            return self.error(request, "InvalidSellContractProposal", "This contract is not open.")
+        if contract["contract_type"].startswith("DIGIT"):
+            return self.error(request, "ResaleNotOffered", "Resale of this contract is not offered.")
+        # Sold at the current spot, as if it expired now
+        feed = self.feeds[contract["underlying"]]
+        self.settle(contract, feed)
+        for key, contract_ids in self.expiring.items():
+            if contract["contract_id"] in contract_ids:
+                contract_ids.remove(contract["contract_id"])
+                break
+        return {"msg_type": "sell", "sell": {"contract_id": contract["contract_id"], "sold_for": contract["sell_price"],
+                                             "balance_after": round(self.balance, 2), "transaction_id": self._new_id()}}
+
+    def on_cancel(self, session, request):
+        if self.contracts.get(request.get("cancel")) is None:
+            return self.error(request, "ContractNotFound", "Contract not found.")
+        return self.error(request, "CancellationNotOffered", "This contract does not include deal cancellation.")
+
+    def on_proposal_open_contract(self, session, request):
+        contract = self.contracts.get(request.get("contract_id"))
+        if contract is None:
+            return self.error(request, "ContractNotFound", "Contract not found.")
+        sub_id = None
+        if request.get("subscribe") and not contract["is_sold"]:
+            sub_id = session.contract_subs[contract["contract_id"]] = f"c{self._new_id()}"
+            session.subscriptions[sub_id] = ("proposal_open_contract", contract["contract_id"])
+        return self.contract_message(contract, sub_id, request)
+
+    def on_portfolio(self, session, request):
+        contracts = [{"contract_id": c["contract_id"], "contract_type": c["contract_type"], "symbol": c["underlying"],
+                      "buy_price": c["buy_price"], "payout": c["payout"], "purchase_time": c["date_start"],
+                      "date_start": c["date_start"], "transaction_id": c["contract_id"], "currency": "USD",
+                      "longcode": f"{c['contract_type']} {c['barrier']} on {c['underlying']}"}
+                     for c in self.contracts.values() if not c["is_sold"]]
+        return {"msg_type": "portfolio", "portfolio": {"contracts": contracts}}
+
+    def proposal_message(self, session, request, sub_id=None):
+        """Price a contract for `session` under a new proposal id."""
+        feed = self.feed(request["symbol"])
+        params = {field: request[field] for field in PROPOSAL_FIELDS if field in request}
+        proposal_id = f"p{self._new_id()}"
+        self.proposals[proposal_id] = (session, params)
+        if len(self.proposals) > self.keep_proposals:
+            self.proposals.popitem(last=False)
+        stake = float(params["amount"])
+        message = {"echo_req": request, "msg_type": "proposal",
+                   "proposal": {"id": proposal_id, "ask_price": stake,
+                                "payout": round(stake * (1 + self.payouts[params["contract_type"]]), 2),
+                                "spot": feed.quote, "spot_time": feed.epoch, "date_start": feed.epoch,
+                                "longcode": f"{params['contract_type']} {params.get('barrier')} on {feed.symbol}"}}
+        if sub_id is not None:
+            message["subscription"] = {"id": sub_id}
+        return message
+
+    def check_contract(self, request, params):
+        """An error response if `params` do not describe a contract the stub can price, else None."""
+        if params.get("contract_type") not in self.payouts:
+            return self.error(request, "InvalidContractType", f"Contract type {params.get('contract_type')} is not offered.")
+        try:
+            valid = bool(params.get("symbol")) and float(params["amount"]) > 0 and int(params.get("duration", 5)) > 0
+        except (KeyError, TypeError, ValueError):
+            valid = False
+        if not valid:
+            return self.error(request, "InputValidationFailed",
+                              "A symbol, a positive amount and a positive duration are required.")
+        return None
+
+    def on_proposal(self, session, request):
+        invalid = self.check_contract(request, request)
+        if invalid is not None:
+            return invalid
+        sub_id = None
+        if request.get("subscribe"):
+            if len(session.proposal_subs) >= self.max_proposal_subscriptions:
+                return self.error(request, "RateLimit", "You have reached the limit of proposal subscriptions.")
+            sub_id = f"p{self._new_id()}"
+            session.subscriptions[sub_id] = ("proposal", sub_id)
+        message = self.proposal_message(session, request, sub_id)
+        if sub_id is not None:
+            session.proposal_subs[sub_id] = [request, message["proposal"]["id"]]
+        return message
+
+    def on_forget(self, session, request):
+        kind, key = session.subscriptions.pop(request["forget"], (None, None))
+        if kind == "proposal":
+            _, proposal_id = session.proposal_subs.pop(key)
+            self.proposals.pop(proposal_id, None)
+        elif kind == "ticks":
+            session.tick_subs.pop(key, None)
+        elif kind == "balance":
+            session.balance_sub = None
+        elif kind == "proposal_open_contract":
+            session.contract_subs.pop(key, None)
+        return {"msg_type": "forget", "forget": int(kind is not None)}
+
+    # === Connection handling ===
+    async def serve_client(self, websocket):
+        session = Session(websocket, self.queue_size)
+        self.sessions.add(session)
+        writer = asyncio.get_running_loop().create_task(self.write_loop(session))
+        try:
+            async for raw in websocket:
+                try:
+                    request = json.loads(raw)
+                except ValueError:
+                    session.push({"msg_type": "error", "error": {"code": "InputValidationFailed", "message": "Invalid JSON"}})
+                    continue
+                response = self.handle(session, request)
+                response.setdefault("echo_req", request)
+                if "req_id" in request:
+                    response["req_id"] = request["req_id"]
+                session.push(response)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.sessions.discard(session)
+            writer.cancel()
+
+    async def write_loop(self, session):
+        while True:
+            message = await session.outbox.get()
+            await session.websocket.send(json.dumps(message))
+
+    async def report_loop(self, interval):
+        last_ticks, last_buys = 0, 0
+        while True:
+            await asyncio.sleep(interval)
+            ticks, buys = self.ticks_sent - last_ticks, self.buys - last_buys
+            last_ticks, last_buys = self.ticks_sent, self.buys
+            dropped = sum(s.dropped for s in self.sessions)
+            print(f"📊 {ticks / interval:.0f} ticks/s | {buys / interval:.1f} buys/s | "
+                  f"tick→buy p50 {self.latency.percentile(0.5) * 1000:.2f}ms p99 {self.latency.percentile(0.99) * 1000:.2f}ms | "
+                  f"clients {len(self.sessions)} | dropped ticks {dropped} | balance {self.balance:.2f}")
+
+    async def serve(self, host="localhost", port=8765, report_interval=5):
+        async with websockets.serve(self.serve_client, host, port, max_queue=None):
+            for feed in self.feeds.values():
+                asyncio.get_running_loop().create_task(self.run_feed(feed))
+            if report_interval:
+                asyncio.get_running_loop().create_task(self.report_loop(report_interval))
+            print(f"🧪 Stub Deriv API on ws://{host}:{port} | symbols {', '.join(self.feeds)} | {self.rate:g} ticks/s each")
+            await asyncio.Future()
+
+
+def request_type(request):
+    for name in REQUEST_TYPES:
+        if name in request:
+            return "history" if name == "ticks_history" else name
+    return "error"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Deriv WebSocket API.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--symbols", default="1HZ10V,R_100", help="Comma-separated symbols to stream")
+    parser.add_argument("--rate", type=float, default=1.0, help="Ticks per second per symbol")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic random walk")
+    parser.add_argument("--ticks", help="Recorded ticks (CSV, ticks_history JSON or .ticks archive) to replay instead")
+    parser.add_argument("--balance", type=float, default=10000.0)
+    parser.add_argument("--real", action="store_true", help="Report a real (non-demo) login id")
+    parser.add_argument("--report", type=float, default=5, help="Seconds between stats lines (0 disables)")
+    parser.add_argument("--config", default=CONFIG, help="Bot config.py whose PAYOUTS the stub pays")
+    parser.add_argument("--payouts", help="JSON file overriding those payouts")
+    args = parser.parse_args()
+
+    quotes = [quote for _, quote in read_ticks(args.ticks)] if args.ticks else None
+    payouts = load_payouts(args.payouts, config_payouts(args.config))
+    server = StubServer(args.symbols.split(","), args.rate, args.seed, quotes, args.balance, payouts,
+                        real_account=args.real)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.report))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
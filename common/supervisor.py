@@ -0,0 +1,91 @@
+# common/supervisor.py
+"""Reconnect loop that keeps a bot's state across dropped connections.
+
+    client = DerivClient(url, on_message, on_open=on_open, idle_timeout=10)
+    trader = Trader(client)
+    ConnectionSupervisor(client).run()
+
+The same DerivClient is reconnected each time, so Traders and strategies
+that hold it keep their balance, loss streaks, coverage queues, tick
+buffers and open contracts. Every new connection calls the client's
+`on_open` again. The bots re-authorise there, and the StrategyHost (or
+`Trader.set_account_type`) then re-subscribes balance, ticks (through
+`ticks_history`, which fills the gap from the tick archive) and any
+contracts that are still open.
+
+The first retry after a drop is almost immediate. Later ones back off up to
+`max_delay`, and the backoff resets once a connection has stayed up for
+`stable_after` seconds. SIGTERM stops the loop cleanly, so `atexit` hooks
+such as the trade journal's final flush still run.
+"""
+import asyncio
+import signal
+import threading
+import time
+
+from colorama import Fore, Style
+
+from common.metrics import TIMINGS
+
+
+class ConnectionSupervisor:
+    def __init__(self, client, min_delay=0.1, max_delay=32, stable_after=30, tag="", on_disconnect=None):
+        self.client = client
+        self.on_disconnect = on_disconnect  # e.g. RequestLayer.fail_all, for requests the old connection took with it
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.stable_after = stable_after
+        self.tag = tag
+        self.connections = 0
+        self.stopped = False
+        self._disconnected_at = None
+        self._wake = None
+        self._on_open = client.on_open
+        client.on_open = self._opened
+
+    def _opened(self, client):
+        if self.stopped:  # stop() arrived while connecting
+            client.close()
+            return
+        self.connections += 1
+        if self._disconnected_at is not None:
+            outage = time.perf_counter() - self._disconnected_at
+            TIMINGS.add("reconnect", outage)
+            print(f"{Fore.GREEN}{self.tag}🔁 Reconnected after {outage:.2f}s (connection #{self.connections}){Style.RESET_ALL}")
+            self._disconnected_at = None
+        if self._on_open:
+            self._on_open(client)
+
+    def run(self):
+        """Connect and keep reconnecting until stop() (or SIGTERM)."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        asyncio.run(self.run_async())
+
+    async def run_async(self):
+        self._wake = asyncio.Event()
+        delay = self.min_delay
+        while not self.stopped:
+            started = time.perf_counter()
+            await self.client.run()
+            if self.on_disconnect:
+                self.on_disconnect()
+            if self.stopped:
+                break
+            self._disconnected_at = time.perf_counter()
+            if self._disconnected_at - started >= self.stable_after:
+                delay = self.min_delay
+            print(f"{Fore.YELLOW}{self.tag}🔄 Reconnecting in {delay:g} seconds...{Style.RESET_ALL}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, self.max_delay)
+
+    def stop(self):
+        """Close the connection and end run(); safe from signal handlers and other threads."""
+        self.stopped = True
+        self.client.close()
+        loop = self.client.loop
+        if loop is not None and self._wake is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake.set)
@@ -0,0 +1,205 @@
+# common/tick_archive.py
+"""Append-only per-symbol tick store backed by a memory-mapped file.
+
+Layout: a 16-byte header (MAGIC, record size, tick count) followed by fixed
+24-byte little-endian records, see RECORD. The file grows in whole chunks
+and the count in the header is updated after each record is written, so a
+bot killed mid-append loses at most that tick.
+
+Ticks are kept in epoch order: anything not newer than the last stored tick
+is skipped. That makes it safe to feed the same tick twice, e.g. from a
+`ticks_history` response that overlaps the live stream.
+
+    archive = open_archive("tick_archive", "1HZ10V")
+    client.send(history_request(archive, "1HZ10V"))  # history, then live ticks
+    ...
+    archive.add_history(data)                        # on msg_type "history"
+    strategy.warm_start(archive.digits(100))
+    ...
+    archive.append(tick["epoch"], tick["quote"])     # on msg_type "tick"
+"""
+import bisect
+import mmap
+import os
+import struct
+
+try:
+    import fcntl
+except ImportError:  # Windows: no single-writer check
+    fcntl = None
+
+from common.ticks import last_digit
+
+MAGIC = b"TKA1"
+HEADER = struct.Struct("<4sIQ")  # magic, record size, tick count
+COUNT = struct.Struct("<Q")
+COUNT_OFFSET = 8
+RECORD = struct.Struct("<qdB7x")  # epoch, quote, last digit (padded to 8-byte alignment)
+DIGIT_OFFSET = 16
+CHUNK_RECORDS = 65536
+HISTORY_LIMIT = 5000  # most ticks one ticks_history call returns
+
+
+class ArchiveLocked(RuntimeError):
+    """Another process is already writing this archive."""
+
+
+class TickArchive:
+    """Ticks of one symbol in a memory-mapped file.
+
+    A writable archive holds an exclusive lock on its file, so two bots
+    trading the same symbol from one directory cannot interleave records.
+    `readonly=True` (backtests, research) takes no lock and sees the ticks
+    stored when it was opened.
+    """
+
+    def __init__(self, path, chunk_records=CHUNK_RECORDS, readonly=False):
+        self.path = path
+        self.chunk_records = chunk_records
+        self.readonly = readonly
+        if not readonly and (not os.path.exists(path) or os.path.getsize(path) == 0):
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, RECORD.size, 0))
+                f.truncate(HEADER.size + RECORD.size * chunk_records)
+        self._file = open(path, "rb" if readonly else "r+b")
+        if not readonly and fcntl is not None:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._file.close()
+                raise ArchiveLocked(f"{path} is being written by another process") from None
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ if readonly else mmap.ACCESS_WRITE)
+        magic, size, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or size != RECORD.size:
+            self._map.close()
+            self._file.close()
+            raise ValueError(f"{path} is not a tick archive")
+        self.capacity = (len(self._map) - HEADER.size) // RECORD.size
+        self.last_epoch = self._epoch(self.count - 1) if self.count else None
+
+    @classmethod
+    def for_symbol(cls, directory, symbol):
+        os.makedirs(directory, exist_ok=True)
+        return cls(archive_path(directory, symbol))
+
+    def __len__(self):
+        return self.count
+
+    def _epoch(self, index):
+        return struct.unpack_from("<q", self._map, HEADER.size + index * RECORD.size)[0]
+
+    def _grow(self):
+        self._map.flush()
+        self._map.close()
+        self.capacity += self.chunk_records
+        self._file.truncate(HEADER.size + RECORD.size * self.capacity)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def append(self, epoch, quote, digit=None):
+        """Store one tick; returns False if it is not newer than the last one."""
+        if self.readonly:
+            raise ValueError(f"{self.path} was opened read-only")
+        epoch = int(epoch)
+        if self.last_epoch is not None and epoch <= self.last_epoch:
+            return False
+        if self.count == self.capacity:
+            self._grow()
+        RECORD.pack_into(self._map, HEADER.size + self.count * RECORD.size,
+                         epoch, quote, last_digit(quote) if digit is None else digit)
+        self.count += 1
+        COUNT.pack_into(self._map, COUNT_OFFSET, self.count)
+        self.last_epoch = epoch
+        return True
+
+    def extend(self, ticks):
+        """Store (epoch, quote) pairs in order; returns how many were new."""
+        return sum(self.append(epoch, quote) for epoch, quote in ticks)
+
+    def add_history(self, data):
+        """Store the ticks of a `ticks_history` response (msg_type "history")."""
+        history = data.get("history", data)
+        return self.extend(zip(history["times"], history["prices"]))
+
+    def last(self, n):
+        """The newest `n` ticks as (epoch, quote, digit), oldest first."""
+        start = max(0, self.count - n)
+        return [RECORD.unpack_from(self._map, HEADER.size + i * RECORD.size) for i in range(start, self.count)]
+
+    def digits(self, n):
+        """Last digits of the newest `n` ticks, oldest first."""
+        start = max(0, self.count - n)
+        offset = HEADER.size + DIGIT_OFFSET
+        return [self._map[offset + i * RECORD.size] for i in range(start, self.count)]
+
+    def ticks(self, start=None, end=None):
+        """Yield (epoch, quote) for start <= epoch <= end, the shape `read_ticks` returns."""
+        first = 0
+        if start is not None:
+            first = bisect.bisect_left(_Epochs(self), int(start))
+        for i in range(first, self.count):
+            epoch, quote, _ = RECORD.unpack_from(self._map, HEADER.size + i * RECORD.size)
+            if end is not None and epoch > end:
+                return
+            yield epoch, quote
+
+    def to_numpy(self):
+        """Structured array copy of every tick (fields epoch, quote, digit), for batch_signals."""
+        import numpy as np
+        dtype = np.dtype({"names": ["epoch", "quote", "digit"], "formats": ["<i8", "<f8", "u1"],
+                          "offsets": [0, 8, DIGIT_OFFSET], "itemsize": RECORD.size})
+        return np.frombuffer(self._map, dtype=dtype, count=self.count, offset=HEADER.size).copy()
+
+    def flush(self):
+        if not self.readonly:
+            self._map.flush()
+
+    def close(self):
+        if self._map.closed:
+            return
+        self.flush()
+        self._map.close()
+        self._file.close()
+
+
+def archive_path(directory, symbol):
+    return os.path.join(directory, f"{symbol}.ticks")
+
+
+def open_archive(directory, symbol):
+    """Writable archive for a bot, or None if archiving is off (`directory` None) or taken."""
+    if not directory:
+        return None
+    try:
+        return TickArchive.for_symbol(directory, symbol)
+    except ArchiveLocked as e:
+        print(f"⚠️ Tick archive disabled: {e}")
+        return None
+
+
+class _Epochs:
+    """Sequence view of an archive's epochs, for bisect."""
+
+    def __init__(self, archive):
+        self.archive = archive
+
+    def __len__(self):
+        return self.archive.count
+
+    def __getitem__(self, index):
+        return self.archive._epoch(index)
+
+
+def history_request(archive, symbol, count=1000, subscribe=True):
+    """`ticks_history` request that fills `archive` and then streams live ticks.
+
+    A cold archive asks for the last `count` ticks; a warm one asks for
+    everything since its newest tick, so a restart or reconnect fills the gap.
+    """
+    request = {"ticks_history": symbol, "end": "latest", "style": "ticks"}
+    if archive is not None and archive.last_epoch is not None:
+        request.update(start=archive.last_epoch + 1, count=HISTORY_LIMIT)
+    else:
+        request["count"] = count
+    if subscribe:
+        request["subscribe"] = 1
+    return request
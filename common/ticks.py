@@ -0,0 +1,37 @@
+# common/ticks.py
+import csv
+import json
+
+
+def last_digit(quote):
+    """Last digit of a quote, computed the same way the bots do."""
+    return int(str(quote)[-1])
+
+
+def read_ticks(path):
+    """Yield (epoch, quote) pairs from a recorded tick history.
+
+    Accepts a CSV file with `epoch,quote` columns (header optional), the
+    JSON body of a `ticks_history` response, or a `.ticks` archive written
+    by the bots (common/tick_archive.py).
+    """
+    if path.endswith(".ticks"):
+        from common.tick_archive import TickArchive  # imports this module
+        archive = TickArchive(path, readonly=True)
+        try:
+            yield from archive.ticks()
+        finally:
+            archive.close()
+        return
+    if path.endswith(".json"):
+        with open(path) as f:
+            data = json.load(f)
+        history = data.get("history", data)
+        for epoch, quote in zip(history["times"], history["prices"]):
+            yield int(epoch), float(quote)
+        return
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip().lstrip("-").isdigit():
+                continue  # header or blank line
+            yield int(row[0]), float(row[1])
@@ -0,0 +1,462 @@
+# common/trade_analytics.py
+"""Streaming trade-log analytics and a columnar store for repeat queries.
+
+The Trader writes a `pending` row when it sends an order and a second row
+(win or loss) when the contract settles. Neither row carries a contract
+id, and older logs use `time.ctime()` timestamps (`Sat May 24 14:15:35
+2025`) where newer ones use TIMESTAMP_FORMAT. One pass over the log pairs
+the rows and aggregates win rate, P&L, stakes, settle times and per-digit
+and per-hour tallies in bounded memory:
+
+    python -m common.trade_analytics trade_log.csv
+    python -m common.trade_analytics trade_log_*.csv trade_log.bin --store trades.tlc
+    python -m common.trade_analytics trades.tlc --since "2025-05-24 14:00:00" --until "2025-05-24 15:00:00"
+
+Pairing: a settled row is matched to the oldest pending row for the same
+digit with the same stake to the cent (the settled stake is the
+contract's buy price), or else to the oldest pending row for that digit.
+Pending rows that wait longer than `max_age` seconds, or that overflow
+`max_pending` for their digit and stake, count as unsettled: their buy was
+rejected, or the bot stopped before the contract settled.
+
+`--store` also writes the paired trades to a columnar file. Rows are stored
+in blocks of BLOCK_ROWS, each block one contiguous little-endian array per
+column. A JSON footer holds every block's offset and epoch range. Readers
+memory-map the file and only touch the blocks a time range overlaps, so
+repeat queries over millions of trades take milliseconds instead of a
+re-parse of the CSV.
+"""
+import argparse
+import csv
+import json
+import math
+import mmap
+import struct
+import time
+from collections import Counter, deque, namedtuple
+from functools import lru_cache
+
+import numpy as np
+from tabulate import tabulate
+
+from common.journal import MAGIC as JOURNAL_MAGIC, OUTCOME_CODES, TIMESTAMP_FORMAT, read_binary_journal
+
+
+Trade = namedtuple("Trade", "settled placed digit stake outcome profit hour")  # placed is NaN if unpaired
+
+STORE_MAGIC = b"TLC1"
+FOOTER = struct.Struct("<Q4s")  # footer length, STORE_MAGIC
+BLOCK_ROWS = 65536
+COLUMNS = [  # name, dtype; the order columns are laid out in within a block
+    ("settled", "<f8"),
+    ("placed", "<f8"),
+    ("stake", "<f8"),
+    ("profit", "<f8"),
+    ("digit", "i1"),  # -1: unknown
+    ("outcome", "u1"),  # OUTCOME_CODES
+    ("hour", "u1"),  # local hour of settlement
+]
+
+
+MONTHS = {name: number for number, name in enumerate(
+    ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+
+
+@lru_cache(maxsize=4096)
+def _hour_start(year, month, day, hour):
+    # mktime once per local hour: DST changes fall on hour boundaries
+    return time.mktime((year, month, day, hour, 0, 0, 0, 0, -1))
+
+
+def parse_timestamp(text):
+    """Epoch seconds of a trade-log timestamp: TIMESTAMP_FORMAT, ctime() or a plain epoch (local time)."""
+    text = text.strip()
+    if len(text) == 19 and text[4] == "-":  # 2025-05-24 14:15:35
+        return (_hour_start(int(text[0:4]), int(text[5:7]), int(text[8:10]), int(text[11:13]))
+                + int(text[14:16]) * 60 + int(text[17:19]))
+    if len(text) == 24 and text[3] == " " and text[4:7] in MONTHS:  # Sat May 24 14:15:35 2025
+        return (_hour_start(int(text[20:24]), MONTHS[text[4:7]], int(text[8:10]), int(text[11:13]))
+                + int(text[14:16]) * 60 + int(text[17:19]))
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"Unrecognised timestamp: {text!r}") from None
+
+
+@lru_cache(maxsize=4096)
+def _local_hour(quarter):
+    # UTC offsets are whole quarter hours, so the local hour is constant within an aligned 900 s block
+    return time.localtime(quarter * 900).tm_hour
+
+
+def _digit(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
+
+
+def read_rows(path, on_skip=None):
+    """Yield (epoch, digit, stake, outcome, profit) from a CSV trade log or a binary journal, streaming."""
+    with open(path, "rb") as f:
+        binary = f.read(len(JOURNAL_MAGIC)) == JOURNAL_MAGIC
+    if binary:
+        for epoch, digit, stake, outcome, profit in read_binary_journal(path):
+            yield epoch, _digit(digit), stake, outcome, profit
+        return
+    text = epoch = None
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            try:
+                if row[0] != text:  # rows come in runs of the same second
+                    epoch = parse_timestamp(row[0])
+                    text = row[0]
+                yield epoch, _digit(row[1]), float(row[2]), row[3], float(row[4] or 0)
+            except (IndexError, ValueError):
+                if on_skip and row[:1] != ["Timestamp"]:
+                    on_skip(row)
+
+
+class TradePairer:
+    """Pairs settled rows with the pending rows that placed them, holding only unsettled orders."""
+
+    def __init__(self, max_age=3600.0, max_pending=10000, sweep_interval=60.0):
+        self.max_age = max_age
+        self.max_pending = max_pending  # per digit and stake
+        self.sweep_interval = sweep_interval  # log seconds between expiry sweeps
+        self.pending = {}  # (digit, stake in cents) -> deque of placed epochs, oldest first
+        self.unsettled = 0  # pending rows never paired
+        self.unmatched = 0  # settled rows without a pending row
+        self._next_sweep = -math.inf
+
+    def add(self, epoch, digit, stake, outcome, profit):
+        """Feed one row; returns a Trade for a settled row, None for a pending one."""
+        key = (digit, round(stake * 100))
+        queue = self.pending.get(key)
+        if outcome == "pending":
+            if queue is None:
+                queue = self.pending[key] = deque()
+            elif len(queue) >= self.max_pending:
+                queue.popleft()
+                self.unsettled += 1
+            queue.append(epoch)
+            return None
+        if epoch >= self._next_sweep:
+            self._expire(epoch)
+        if queue is None:
+            key = self._oldest_for_digit(digit)
+            queue = self.pending.get(key)
+        placed = math.nan
+        if queue:
+            placed = queue.popleft()
+            if not queue:
+                del self.pending[key]
+        else:
+            self.unmatched += 1
+        return Trade(epoch, placed, digit, stake, outcome, profit, _local_hour(int(epoch) // 900))
+
+    def _oldest_for_digit(self, digit):
+        # No pending row with this stake: fall back to the digit's oldest, whatever its stake
+        keys = [key for key in self.pending if key[0] == digit]
+        return min(keys, key=lambda key: self.pending[key][0]) if keys else None
+
+    def _expire(self, now):
+        oldest = now - self.max_age
+        for key, queue in list(self.pending.items()):
+            while queue and queue[0] < oldest:
+                queue.popleft()
+                self.unsettled += 1
+            if not queue:
+                del self.pending[key]
+        self._next_sweep = now + self.sweep_interval
+
+    def finish(self):
+        """Count the pending rows still waiting; call after the last row."""
+        self.unsettled += sum(len(queue) for queue in self.pending.values())
+        self.pending.clear()
+
+
+class _Tally:
+    __slots__ = ("trades", "wins", "pnl")
+
+    def __init__(self, trades=0, wins=0, pnl=0.0):
+        self.trades = trades
+        self.wins = wins
+        self.pnl = pnl
+
+    def row(self, key):
+        return [key, self.trades, self.wins, f"{self.wins / self.trades:.2%}" if self.trades else "-", self.pnl]
+
+
+def _percentile(counts, q):
+    """q-th percentile of a Counter of value -> occurrences."""
+    total = sum(counts.values())
+    if not total:
+        return math.nan
+    rank = q / 100 * (total - 1)
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen > rank:
+            return value
+    return value
+
+
+class TradeStats:
+    """Running totals over paired trades; memory grows with distinct stakes, digits and hours, not rows."""
+
+    def __init__(self):
+        self.trades = 0
+        self.wins = 0
+        self.pnl = 0.0
+        self.staked = 0.0
+        self.stakes = Counter()  # stake in cents -> trades
+        self.settle_times = Counter()  # whole seconds from pending to settled row -> trades
+        self.per_digit = {}  # digit -> _Tally
+        self.per_hour = {}  # local hour -> _Tally
+        self.first = self.last = None  # settlement epochs
+        self.unsettled = self.unmatched = None  # from the pairer; unknown for a time-range query
+
+    def add(self, trade):
+        won = trade.outcome == "win"
+        self.trades += 1
+        self.wins += won
+        self.pnl += trade.profit
+        self.staked += trade.stake
+        self.stakes[round(trade.stake * 100)] += 1
+        if trade.placed == trade.placed:  # not NaN
+            self.settle_times[int(trade.settled - trade.placed)] += 1
+        for table, key in ((self.per_digit, trade.digit), (self.per_hour, trade.hour)):
+            tally = table.get(key)
+            if tally is None:
+                tally = table[key] = _Tally()
+            tally.trades += 1
+            tally.wins += won
+            tally.pnl += trade.profit
+        if self.first is None:
+            self.first = trade.settled
+        self.last = trade.settled
+
+    @classmethod
+    def from_columns(cls, columns):
+        """The same totals, computed with NumPy from TradeStore columns."""
+        stats = cls()
+        settled, placed, stake, profit = (columns[name] for name in ("settled", "placed", "stake", "profit"))
+        won = columns["outcome"] == OUTCOME_CODES["win"]
+        stats.trades = len(settled)
+        if not stats.trades:
+            return stats
+        stats.wins = int(won.sum())
+        stats.pnl = float(profit.sum())
+        stats.staked = float(stake.sum())
+        stats.first, stats.last = float(settled.min()), float(settled.max())
+        stats.stakes = Counter(dict(zip(*(a.tolist() for a in np.unique(np.rint(stake * 100).astype(np.int64),
+                                                                        return_counts=True)))))
+        paired = ~np.isnan(placed)
+        delays = (settled[paired] - placed[paired]).astype(np.int64)
+        stats.settle_times = Counter(dict(zip(*(a.tolist() for a in np.unique(delays, return_counts=True)))))
+        for table, keys, size, shift in ((stats.per_digit, columns["digit"], 11, 1),
+                                         (stats.per_hour, columns["hour"], 24, 0)):
+            index = keys.astype(np.intp) + shift
+            trades = np.bincount(index, minlength=size)
+            wins = np.bincount(index, weights=won, minlength=size)
+            pnl = np.bincount(index, weights=profit, minlength=size)
+            for i in np.flatnonzero(trades):
+                table[int(i) - shift] = _Tally(int(trades[i]), int(wins[i]), float(pnl[i]))
+        return stats
+
+    def summary_rows(self):
+        rows = [
+            ["Settled trades", f"{self.trades:,}"],
+            ["Win rate", f"{self.wins / self.trades:.2%} ({self.wins:,} wins)" if self.trades else "-"],
+            ["P/L", f"{self.pnl:.2f} USD"],
+            ["Staked", f"{self.staked:.2f} USD"],
+        ]
+        if self.trades:
+            rows.append(["Period", f"{time.strftime(TIMESTAMP_FORMAT, time.localtime(self.first))} .. "
+                                   f"{time.strftime(TIMESTAMP_FORMAT, time.localtime(self.last))}"])
+            rows.append(["Stake min / p25 / p50 / p75 / max",
+                         " / ".join(f"{_percentile(self.stakes, q) / 100:.2f}" for q in (0, 25, 50, 75, 100))])
+            rows.append(["Mean stake", f"{self.staked / self.trades:.2f}"])
+        if self.settle_times:
+            rows.append(["Settle time p50 / p95 / max",
+                         " / ".join(f"{_percentile(self.settle_times, q)} s" for q in (50, 95, 100))])
+        if self.unsettled is not None:
+            rows.append(["Pending rows never settled", f"{self.unsettled:,}"])
+            rows.append(["Settled rows without a pending row", f"{self.unmatched:,}"])
+        return rows
+
+    def breakdown_rows(self, table):
+        return [tally.row("?" if key == -1 else key) for key, tally in sorted(table.items())]
+
+
+class TradeStoreWriter:
+    """Writes Trades to a columnar store, BLOCK_ROWS at a time."""
+
+    def __init__(self, path, block_rows=BLOCK_ROWS):
+        self.path = path
+        self.block_rows = block_rows
+        self.blocks = []  # [offset, rows, min settled epoch, max settled epoch]
+        self.rows = 0
+        self._buffer = []
+        self._file = open(path, "wb")
+        self._file.write(STORE_MAGIC)
+
+    def append(self, trade):
+        self._buffer.append(trade)
+        if len(self._buffer) >= self.block_rows:
+            self._write_block()
+
+    def _write_block(self):
+        if not self._buffer:
+            return
+        columns = dict(zip(Trade._fields, zip(*self._buffer)))
+        columns["outcome"] = [OUTCOME_CODES[outcome] for outcome in columns["outcome"]]
+        self._buffer = []
+        offset = self._file.tell()
+        for name, dtype in COLUMNS:
+            self._file.write(_pad(np.array(columns[name], dtype=dtype).tobytes()))
+        settled = columns["settled"]
+        self.blocks.append([offset, len(settled), min(settled), max(settled)])
+        self.rows += len(settled)
+
+    def close(self, unsettled=None, unmatched=None):
+        self._write_block()
+        footer = json.dumps({"columns": COLUMNS, "blocks": self.blocks, "rows": self.rows,
+                             "unsettled": unsettled, "unmatched": unmatched}).encode()
+        self._file.write(footer)
+        self._file.write(FOOTER.pack(len(footer), STORE_MAGIC))
+        self._file.close()
+
+
+def _pad(data):
+    # Keeps every column 8-byte aligned for np.frombuffer
+    return data + b"\0" * (-len(data) % 8)
+
+
+class TradeStore:
+    """Read-only, memory-mapped view of a store written by TradeStoreWriter."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self._map)
+        length, magic = FOOTER.unpack_from(self._map, size - FOOTER.size)
+        if self._map[:len(STORE_MAGIC)] != STORE_MAGIC or magic != STORE_MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a trade store")
+        meta = json.loads(self._map[size - FOOTER.size - length:size - FOOTER.size])
+        self.columns = [(name, np.dtype(dtype)) for name, dtype in meta["columns"]]
+        self.blocks = meta["blocks"]
+        self.rows = meta["rows"]
+        self.unsettled = meta["unsettled"]
+        self.unmatched = meta["unmatched"]
+
+    def __len__(self):
+        return self.rows
+
+    def _block(self, offset, rows):
+        arrays = {}
+        for name, dtype in self.columns:
+            arrays[name] = np.frombuffer(self._map, dtype=dtype, count=rows, offset=offset)
+            offset += rows * dtype.itemsize + (-rows * dtype.itemsize % 8)
+        return arrays
+
+    def query(self, since=None, until=None):
+        """Columns (name -> array) of trades settled within [since, until]; blocks outside it are not read."""
+        parts = []
+        for offset, rows, first, last in self.blocks:
+            if (since is not None and last < since) or (until is not None and first > until):
+                continue
+            block = self._block(offset, rows)
+            if (since is not None and first < since) or (until is not None and last > until):
+                settled = block["settled"]
+                keep = np.ones(rows, dtype=bool)
+                if since is not None:
+                    keep &= settled >= since
+                if until is not None:
+                    keep &= settled <= until
+                block = {name: array[keep] for name, array in block.items()}
+            parts.append(block)
+        if not parts:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in self.columns}
+        return {name: np.concatenate([part[name] for part in parts]) for name, _ in self.columns}
+
+    def stats(self, since=None, until=None):
+        stats = TradeStats.from_columns(self.query(since, until))
+        if since is None and until is None:
+            stats.unsettled, stats.unmatched = self.unsettled, self.unmatched
+        return stats
+
+    def close(self):
+        self._map.close()
+
+
+def analyse(paths, store=None, max_age=3600.0):
+    """One streaming pass over trade logs; returns TradeStats and, with `store`, writes the columnar file.
+
+    Each log is paired on its own, since per-plug-in logs do not share orders.
+    """
+    stats = TradeStats()
+    stats.unsettled = stats.unmatched = 0
+    writer = TradeStoreWriter(store) if store else None
+    skipped = []
+    for path in paths:
+        pairer = TradePairer(max_age)
+        add = pairer.add
+        for row in read_rows(path, on_skip=skipped.append):
+            trade = add(*row)
+            if trade is not None:
+                stats.add(trade)
+                if writer:
+                    writer.append(trade)
+        pairer.finish()
+        stats.unsettled += pairer.unsettled
+        stats.unmatched += pairer.unmatched
+    if writer:
+        writer.close(stats.unsettled, stats.unmatched)
+    if skipped:
+        print(f"⚠️ Skipped {len(skipped)} malformed row(s), e.g. {skipped[0]}")
+    return stats
+
+
+def print_report(stats):
+    print(tabulate(stats.summary_rows(), headers=["Metric", "Value"], tablefmt="fancy_grid"))
+    headers = ["trades", "wins", "win rate", "P/L"]
+    for key, table in (("digit", stats.per_digit), ("hour", stats.per_hour)):
+        print(tabulate(stats.breakdown_rows(table), headers=[key] + headers, tablefmt="fancy_grid", floatfmt=".2f"))
+
+
+def _is_store(path):
+    with open(path, "rb") as f:
+        return f.read(len(STORE_MAGIC)) == STORE_MAGIC
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pair and summarise trade logs, or query a columnar trade store.")
+    parser.add_argument("logs", nargs="+", help="trade_log.csv / .bin journals, or one .tlc store")
+    parser.add_argument("--store", help="Also write the paired trades to this columnar file")
+    parser.add_argument("--since", help="Store queries: first settlement time (TIMESTAMP_FORMAT, ctime or epoch)")
+    parser.add_argument("--until", help="Store queries: last settlement time")
+    parser.add_argument("--max-age", type=float, default=3600, help="Seconds a pending row waits for its settlement")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if len(args.logs) == 1 and _is_store(args.logs[0]):
+        store = TradeStore(args.logs[0])
+        since = parse_timestamp(args.since) if args.since else None
+        until = parse_timestamp(args.until) if args.until else None
+        stats = store.stats(since, until)
+        source = f"{len(store):,} stored trades"
+    else:
+        if args.since or args.until:
+            parser.error("--since/--until apply to a .tlc store; convert the logs with --store first")
+        stats = analyse(args.logs, args.store, args.max_age)
+        source = f"{len(args.logs)} log(s)" + (f", stored in {args.store}" if args.store else "")
+    print_report(stats)
+    print(f"Read {source} in {time.perf_counter() - started:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
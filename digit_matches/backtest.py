@@ -0,0 +1,76 @@
+# digit_matches/backtest.py
+import argparse
+import os
+import sys
+import time
+from colorama import init, Fore, Style
+from tabulate import tabulate
+
+init(autoreset=True)
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import PAYOUTS, REGIME_FILTER
+from trader import Trader
+from consensus import ConsensusStrategy
+from common.settlement import ReplayClock, SimulatedExchange, BacktestReport, load_payouts
+from common.ticks import read_ticks, last_digit
+
+DEMO_AUTHORIZE = {"authorize": {"loginid": "VRTC0000000"}}
+
+def run_backtest(ticks, payouts=None, balance=10000, configure=None):
+    """Replay (epoch, quote) ticks through ConsensusStrategy + Trader with local settlement.
+
+    `configure(strategy)` may adjust strategy/trader parameters before the replay.
+    Returns (report, trader, strategy).
+    """
+    clock = ReplayClock()
+    report = BacktestReport()
+    exchange = SimulatedExchange(PAYOUTS if payouts is None else payouts, balance=balance)
+    trader = Trader(exchange, clock=clock, trade_log=None, headless=True)
+    strategy = ConsensusStrategy(trader, clock=clock)
+    if configure:
+        configure(strategy)
+
+    def on_settle(contract):
+        report.record(contract)
+        settled = trader.handle_contract_update({"msg_type": "proposal_open_contract", "proposal_open_contract": contract})
+        strategy.on_settlement(*settled)
+
+    exchange.on_settle = on_settle
+    exchange.on_buy = trader.requests.resolve
+    trader.set_account_type(DEMO_AUTHORIZE)
+    trader.balance = exchange.balance
+
+    for epoch, quote in ticks:
+        clock.now = epoch
+        exchange.on_tick(epoch, quote)
+        trader.balance = exchange.balance
+        strategy.on_tick(last_digit(quote))
+        report.ticks += 1
+    return report, trader, strategy
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded ticks through the digit match consensus bot.")
+    parser.add_argument("ticks", help="CSV (epoch,quote), ticks_history JSON or .ticks archive file")
+    parser.add_argument("--payouts", help="JSON file overriding the PAYOUTS table in config.py")
+    parser.add_argument("--balance", type=float, default=10000, help="Starting account balance")
+    parser.add_argument("--regime-filter", action=argparse.BooleanOptionalAction, default=REGIME_FILTER,
+                        help="Select a digit only while the digits show a measurable edge (default: REGIME_FILTER)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    configure = lambda strategy: setattr(strategy, "regime_filter", args.regime_filter)
+    report, _, strategy = run_backtest(read_ticks(args.ticks), load_payouts(args.payouts, PAYOUTS), args.balance, configure)
+    elapsed = time.perf_counter() - started
+
+    print(f"{Fore.BLUE}{Style.BRIGHT}=== Backtest Results ==={Style.RESET_ALL}")
+    print(tabulate(report.rows(), headers=["Metric", "Value"], tablefmt="fancy_grid"))
+    strategy_table = [[strat, perf['total'], perf['wins'], perf['weight']] for strat, perf in strategy.strategy_performance.items()]
+    print(tabulate(strategy_table, headers=["Strategy", "Votes", "Wins", "Weight"], tablefmt="fancy_grid"))
+    if strategy.regime_filter:
+        print(f"Bursts skipped without a measurable edge: {strategy.regime_skips} (last regime: {strategy.stats.describe()})")
+    print(f"{Fore.YELLOW}Replayed {report.ticks} ticks in {elapsed:.2f}s{Style.RESET_ALL}")
+
+if __name__ == "__main__":
+    main()
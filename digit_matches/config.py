@@ -19,5 +19,66 @@ MAX_STAKE = 500  # Maximum stake in USD
 # Tick symbol (Volatility 10 1s)
 TICK_SYMBOL = '1HZ10V'
 
+# Symbols traded by multi_runner.py, sharded across worker processes
+SYMBOLS = ['1HZ10V', '1HZ25V', '1HZ50V', '1HZ75V', '1HZ100V', 'R_10', 'R_25', 'R_50', 'R_75', 'R_100']
+MAX_OPEN_STAKE = 2000  # Total stake allowed in open contracts across all workers
+MAX_TOTAL_LOSS = 1000  # All workers stop opening trades once this much is lost
+
+# Ticks kept for strategy statistics (updates are O(1), so this can be large)
+TICK_BUFFER_SIZE = 100
+
+# Seconds without any message before a connection is treated as dead and reconnected
+IDLE_TIMEOUT = 10
+
+# Tick archive (common/tick_archive.py): one memory-mapped file per symbol, used to pre-fill
+# tick buffers on start/reconnect. None disables it. A cold archive fetches TICK_HISTORY_COUNT ticks.
+TICK_ARCHIVE_DIR = "tick_archive"
+TICK_HISTORY_COUNT = 1000
+
+# Request layer (common/rpc.py): at most MAX_IN_FLIGHT unanswered requests, each failed after REQUEST_TIMEOUT seconds
+MAX_IN_FLIGHT = 100
+REQUEST_TIMEOUT = 10
+
+# Order rate governor (common/governor.py): token buckets per account and per symbol. Deriv limits
+# requests per minute per account (website_status -> api_call_limits); keep ORDER_RATE under them.
+ORDER_RATE = 1.25  # orders per second across the account
+ORDER_BURST = 10
+SYMBOL_ORDER_RATE = 1.0  # orders per second on any one symbol; None for no per-symbol limit
+SYMBOL_ORDER_BURST = 5
+ORDER_MAX_WAIT = 2  # seconds an order may wait for a token before it is dropped
+
+# Proposal cache (common/proposals.py): live `proposal` subscriptions, so orders buy by proposal id at a known
+# payout. Deriv allows a few per connection (website_status -> api_call_limits -> max_proposal_subscription).
+PROPOSAL_CACHE = True
+MAX_PROPOSAL_SUBSCRIPTIONS = 5  # until website_status reports the account's limit
+PROPOSAL_MAX_AGE = 3  # seconds a quote stays usable
+PROPOSAL_STAKE_TOLERANCE = 0.05  # a quote this close (as a fraction) to the dynamic stake is bought at its own stake
+
+# Trade journal: 'csv' (trade_log.csv) or 'binary' (trade_log.bin, see common/journal.py)
+TRADE_LOG_FORMAT = "csv"
+JOURNAL_FLUSH_SIZE = 256  # rows buffered before a background write
+JOURNAL_FLUSH_INTERVAL = 1.0  # seconds between background writes
+
+# Status dashboard: 'ansi' (redraws changed lines only) or 'headless' (no rendering)
+DASHBOARD_MODE = "ansi"
+DASHBOARD_FPS = 4  # maximum redraws per second
+
+# Contract tracking: forget contracts not settled within CONTRACT_TTL seconds, keep at most MAX_TRACKED_CONTRACTS
+CONTRACT_TTL = 60
+MAX_TRACKED_CONTRACTS = 500
+
+# Trade rows kept in memory for the dashboard; older rows live only in the trade journal
+TRADE_HISTORY_TAIL = 100
+
+# Regime filter (common/digit_stats.py), opt-in: trade only while a window of the last REGIME_WINDOWS digits
+# departs measurably from uniform, independent digits. REGIME_ALPHA is the chance a fair stream passes on a given
+# tick, so on a fair index the filter lets about that share of ticks trade.
+REGIME_FILTER = False
+REGIME_WINDOWS = (50, 100, 500)
+REGIME_ALPHA = 0.01
+
 # Coverage delay in ticks
-COVERAGE_DEPTH = 3
\ No newline at end of file
+COVERAGE_DEPTH = 3
+
+# Profit per unit stake used when settling contracts offline (backtests)
+PAYOUTS = {"DIGITMATCH": 8.0, "DIGITDIFF": 0.0955}
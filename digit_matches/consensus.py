@@ -0,0 +1,130 @@
+# digit_matches/consensus.py
+import time
+
+from config import (USE_COVERAGE_TRADING, COVERAGE_DEPTH, TICK_BUFFER_SIZE, REGIME_FILTER, REGIME_WINDOWS,
+                    REGIME_ALPHA)
+from window import DigitWindow
+from common.digit_stats import DigitStats
+from common.metrics import TIMINGS
+import strategies
+
+MIN_SECONDS_BETWEEN_BURSTS = 10
+STRATEGY_WEIGHTS = {'pattern': 0.2, 'most_frequent': 0.4, 'least_seen': 0.3, 'breakout': 0.1}
+
+class ConsensusStrategy:
+    """Weighted vote of the four digit selectors, traded as a burst or coverage run.
+
+    The keyword arguments are the tunables that `sweep.py` searches over;
+    `weights` overrides entries of STRATEGY_WEIGHTS. With `regime_filter`,
+    no digit is selected while `stats` (common/digit_stats.py) finds the
+    stream indistinguishable from fair digits.
+    """
+
+    def __init__(self, trader, clock=time.time, weights=None, pattern_window=10, pattern_threshold=5,
+                 breakout_window=10, min_seconds_between_bursts=MIN_SECONDS_BETWEEN_BURSTS,
+                 coverage_depth=COVERAGE_DEPTH, use_coverage_trading=USE_COVERAGE_TRADING,
+                 regime_filter=REGIME_FILTER):
+        self.trader = trader
+        self.clock = clock
+        self.pattern_window = pattern_window
+        self.pattern_threshold = pattern_threshold
+        self.breakout_window = breakout_window
+        self.coverage_depth = coverage_depth
+        self.use_coverage_trading = use_coverage_trading
+        self.regime_filter = regime_filter
+        self.tick_buffer = DigitWindow(maxlen=TICK_BUFFER_SIZE)
+        self.stats = DigitStats(REGIME_WINDOWS, REGIME_ALPHA)
+        self.regime_skips = 0  # bursts not traded for lack of a measurable edge
+        self.prev_digits = set()
+        self.used_digit = None
+        self.last_match_digit = None
+        self.match_hold_ticks = 0
+        self.last_trade_time = 0
+        self.min_seconds_between_bursts = min_seconds_between_bursts
+        self.strategy_performance = {strat: {'wins': 0, 'total': 0, 'weight': weight}
+                                     for strat, weight in {**STRATEGY_WEIGHTS, **(weights or {})}.items()}
+
+    def select_digit(self):
+        """Weighted vote across the four selectors; returns (digit, strategies_voted, votes)."""
+        if self.regime_filter and not self.stats.has_edge():
+            self.regime_skips += 1
+            return None, None, None
+        votes = []
+        strategies_voted = []
+        strat_1 = strategies.detect_pattern(self.tick_buffer, self.pattern_window, self.pattern_threshold)
+        strat_2 = strategies.most_frequent_digit(self.tick_buffer)
+        strat_3 = strategies.least_seen_digit(self.tick_buffer)
+        strat_4 = strategies.detect_compression_breakout(self.tick_buffer, self.prev_digits, self.breakout_window)
+
+        for digit, strat in [(strat_1, 'pattern'), (strat_2, 'most_frequent'),
+                             (strat_3, 'least_seen'), (strat_4, 'breakout')]:
+            if digit is not None:
+                votes.append((digit, self.strategy_performance[strat]['weight']))
+                strategies_voted.append(strat)
+                self.strategy_performance[strat]['total'] += 1
+
+        if not votes:
+            return None, None, None
+
+        weighted_scores = {}
+        for digit, weight in votes:
+            weighted_scores[digit] = weighted_scores.get(digit, 0) + weight
+
+        consensus = max(weighted_scores, key=weighted_scores.get)
+        return consensus, strategies_voted, votes
+
+    def warm_start(self, digits):
+        """Pre-fill the tick buffer with archived digits, oldest first, without trading."""
+        for digit in digits:
+            self.tick_buffer.append(digit)
+            self.stats.append(digit)
+        self.prev_digits = self.tick_buffer.distinct()
+
+    def on_tick(self, digit):
+        """Feed one last digit; fires trades through the trader when consensus allows."""
+        self.tick_buffer.append(digit)
+        self.stats.append(digit)
+        self.trader.tick()
+
+        if len(self.tick_buffer) < 50:
+            return
+
+        MAX_HOLD_TICKS = 3 if self.trader.consecutive_losses > 2 else 5
+        if self.last_match_digit is not None:
+            self.match_hold_ticks += 1
+            if self.match_hold_ticks < MAX_HOLD_TICKS:
+                return
+            else:
+                self.last_match_digit = None
+                self.match_hold_ticks = 0
+
+        now = self.clock()
+        if now - self.last_trade_time < self.min_seconds_between_bursts:
+            return
+
+        with TIMINGS.stage("strategy"):
+            selected, strategies_voted, votes = self.select_digit()
+        if selected is not None:
+            self.used_digit = selected
+            self.last_match_digit = selected
+            self.last_trade_time = now
+            self.trader.display_status(selected, strategies_voted, votes)
+            if self.use_coverage_trading:
+                self.trader.fire_coverage_trades(selected, delay_ticks=list(range(self.coverage_depth)), strategies_voted=strategies_voted)
+            else:
+                self.trader.place_match_trade(selected, strategies_voted)
+
+        self.prev_digits = self.tick_buffer.distinct()
+
+    def on_settlement(self, contract, entry=None):
+        """Handle a sold contract; `entry` is its ContractEntry from the trader's registry."""
+        digit = contract.get("barrier")
+        stake = contract.get("buy_price", 0)
+        outcome = "win" if contract.get("profit", 0) > 0 else "loss"
+        profit = contract.get("profit", 0)
+        strategies_voted = entry.strategies_voted if entry else None
+        self.trader.log_trade(digit, stake, outcome, profit, strategies_voted)
+        # Credit the strategies that voted for this contract, not whatever else is in flight
+        if outcome == "win" and strategies_voted:
+            for strat in strategies_voted:
+                self.strategy_performance[strat]['wins'] += 1
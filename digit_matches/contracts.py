@@ -0,0 +1,79 @@
+# digit_matches/contracts.py
+import time
+from collections import OrderedDict
+
+class ContractEntry:
+    __slots__ = ("req_id", "contract_id", "digit", "stake", "strategies_voted", "tick_no", "placed_at",
+                 "subscription_id")
+
+    def __init__(self, req_id, digit, stake, strategies_voted, tick_no, placed_at):
+        self.req_id = req_id
+        self.contract_id = None
+        self.digit = digit
+        self.stake = stake
+        self.strategies_voted = strategies_voted
+        self.tick_no = tick_no
+        self.placed_at = placed_at
+        self.subscription_id = None
+
+class ContractRegistry:
+    """Orders and open contracts, from `buy` request to settlement.
+
+    Orders are tracked by req_id until the buy response arrives, then by
+    contract_id until the contract is sold. Anything not heard back about
+    within `ttl` seconds is expired, and the oldest entries are evicted
+    beyond `max_entries`, so memory stays bounded on long runs.
+    """
+
+    def __init__(self, ttl=60, max_entries=500, clock=time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.pending = OrderedDict()  # req_id -> ContractEntry awaiting its buy response
+        self.open = OrderedDict()  # contract_id -> ContractEntry awaiting settlement
+        self.expired = 0
+
+    def add_order(self, req_id, digit, stake, strategies_voted=None, tick_no=0):
+        entry = ContractEntry(req_id, digit, stake, strategies_voted, tick_no, self.clock())
+        self.pending[req_id] = entry
+        return entry
+
+    def discard_order(self, req_id):
+        return self.pending.pop(req_id, None)
+
+    def restore(self, entry):
+        """Track an expired or discarded order again, e.g. when its buy was filled after all."""
+        entry.placed_at = self.clock()  # a fresh TTL, and it stays last in `pending`
+        self.pending[entry.req_id] = entry
+        return entry
+
+    def on_buy(self, req_id, contract_id):
+        """Move an order to the open set once its contract id is known."""
+        entry = self.pending.pop(req_id, None)
+        if entry is None:
+            return None
+        entry.contract_id = contract_id
+        self.open[contract_id] = entry
+        return entry
+
+    def on_subscribed(self, contract_id, subscription_id):
+        entry = self.open.get(contract_id)
+        if entry is not None and subscription_id:
+            entry.subscription_id = subscription_id
+        return entry
+
+    def settle(self, contract_id):
+        return self.open.pop(contract_id, None)
+
+    def expire(self):
+        """Pop and return entries past their TTL or beyond the size bound."""
+        cutoff = self.clock() - self.ttl
+        stale = []
+        for table in (self.pending, self.open):
+            while table and (len(table) > self.max_entries or next(iter(table.values())).placed_at < cutoff):
+                stale.append(table.popitem(last=False)[1])
+        self.expired += len(stale)
+        return stale
+
+    def __len__(self):
+        return len(self.pending) + len(self.open)
@@ -0,0 +1,123 @@
+# digit_matches/dashboard.py
+import sys
+import threading
+import time
+from colorama import Fore, Style
+from tabulate import tabulate
+
+from common.metrics import TIMINGS
+
+TRADE_HEADERS = ["Timestamp", "Digit", "Stake", "Outcome", "Profit"]
+
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+CLEAR_LINE = "\x1b[K"
+CLEAR_BELOW = "\x1b[J"
+
+OUTCOME_COLORS = {"win": Fore.GREEN, "loss": Fore.RED}
+
+def color_trades(rows):
+    """Color the outcome column of raw trade rows."""
+    return [(timestamp, digit, stake, f"{OUTCOME_COLORS.get(outcome, Fore.YELLOW)}{outcome}{Style.RESET_ALL}", profit)
+            for timestamp, digit, stake, outcome, profit in rows]
+
+def render_status(snapshot):
+    """Format a trader status snapshot into screen lines."""
+    status = "Active" if snapshot["can_trade"] else f"Paused ({snapshot['pause_left']}s left)"
+    status_color = f"{Fore.GREEN}{status}{Style.RESET_ALL}" if snapshot["can_trade"] else f"{Fore.RED}{status}{Style.RESET_ALL}"
+    current_digit = snapshot["current_digit"]
+    status_table = [
+        ["Balance", f"{snapshot['balance']:.2f} USD"],
+        ["Current Trade", f"Digit {current_digit}" if current_digit else "None"],
+        ["Stake", f"{snapshot['stake']:.2f} USD"],
+        ["Win Rate", f"{snapshot['win_rate']:.2%}"],
+        ["Total P/L", f"{snapshot['total_profit']:.2f} USD"],
+        ["Status", status_color]
+    ]
+    out = [f"{Fore.BLUE}{Style.BRIGHT}=== Trading Status ==={Style.RESET_ALL}",
+           tabulate(status_table, headers=["Metric", "Value"], tablefmt="fancy_grid")]
+
+    if snapshot["consensus"]:
+        consensus_table = [[strat, f"Digit {vote[0]} (Weight: {vote[1]:.2f})"] for vote, strat in snapshot["consensus"]]
+        out += [f"\n{Fore.BLUE}{Style.BRIGHT}=== Strategy Consensus ==={Style.RESET_ALL}",
+                tabulate(consensus_table, headers=["Strategy", "Vote"], tablefmt="fancy_grid"),
+                f"{Fore.YELLOW}Consensus Digit: {current_digit}{Style.RESET_ALL}"]
+
+    out += [f"\n{Fore.BLUE}{Style.BRIGHT}=== Recent Trades (Last 5) ==={Style.RESET_ALL}",
+            tabulate(color_trades(snapshot["recent_trades"]), headers=TRADE_HEADERS, tablefmt="fancy_grid"),
+            f"\n{Fore.BLUE}{Style.BRIGHT}=== All Trades (Last 10) ==={Style.RESET_ALL}",
+            tabulate(color_trades(snapshot["all_trades"]), headers=TRADE_HEADERS, tablefmt="fancy_grid")]
+
+    if snapshot["summary"]:
+        digit_frequencies, strategy_contributions = snapshot["summary"]
+        out += [f"\n{Fore.BLUE}{Style.BRIGHT}=== Performance Summary ==={Style.RESET_ALL}",
+                f"{Fore.BLUE}Digit Frequencies: {digit_frequencies}{Style.RESET_ALL}",
+                f"{Fore.BLUE}Strategy Contributions: {strategy_contributions}{Style.RESET_ALL}"]
+    return "\n".join(out).split("\n")
+
+class Dashboard:
+    """Terminal status view redrawn from its own thread.
+
+    `update()` only stores the latest snapshot, so callers on the message
+    path never format tables or touch the terminal. The render thread
+    redraws at most `fps` times a second and rewrites only the lines that
+    changed since the previous frame (ANSI cursor positioning). A full
+    repaint every `repaint_interval` seconds cleans up after any other
+    output written to the terminal.
+    """
+
+    def __init__(self, fps=4, stream=None, render=render_status, repaint_interval=5.0):
+        self.interval = 1.0 / fps
+        self.stream = stream or sys.stdout
+        self.render = render
+        self.repaint_interval = repaint_interval
+        self.frames = 0
+        self._snapshot = None
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_lines = []
+        self._last_repaint = 0
+
+    def update(self, snapshot):
+        self._snapshot = snapshot
+        self._dirty.set()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="dashboard", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._dirty.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._dirty.wait()
+            if self._stop.is_set():
+                return
+            self._dirty.clear()
+            started = time.monotonic()
+            with TIMINGS.stage("render"):
+                lines = self.render(self._snapshot)
+            with TIMINGS.stage("draw"):
+                self.draw(lines)
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def draw(self, lines):
+        now = time.monotonic()
+        parts = []
+        if now - self._last_repaint >= self.repaint_interval:
+            parts.append(CLEAR_SCREEN)
+            self._last_lines = []
+            self._last_repaint = now
+        for row, line in enumerate(lines):
+            if row >= len(self._last_lines) or self._last_lines[row] != line:
+                parts.append(f"\x1b[{row + 1};1H{line}{CLEAR_LINE}")
+        if len(lines) < len(self._last_lines):
+            parts.append(f"\x1b[{len(lines) + 1};1H{CLEAR_BELOW}")
+        parts.append(f"\x1b[{len(lines) + 1};1H")
+        self.stream.write("".join(parts))
+        self.stream.flush()
+        self._last_lines = lines
+        self.frames += 1
@@ -1,86 +1,60 @@
 # digit_matches/match_bot_mid.py
-import websocket
-import json
 import os
+import sys
 import random
-from dotenv import load_dotenv
 from collections import deque
 import time
 
-from config import TICK_SYMBOL
-from trader import Trader
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# === Load environment ===
-load_dotenv()
-API_TOKEN = os.getenv("API_TOKEN")
-APP_ID = os.getenv("APP_ID")
+from common.host import run_host
+from config import IDLE_TIMEOUT, TICK_ARCHIVE_DIR, TICK_BUFFER_SIZE, TICK_HISTORY_COUNT
+from plugin import DigitPlugin
 
-# === Globals ===
-tick_buffer = deque(maxlen=100)
-trader = None
-run_count = 0
-last_selected_digits = []
-last_trade_time = 0
 MIN_TRADE_INTERVAL = 7  # avoid back-to-back trades
 
-# === WebSocket Handlers ===
-def on_open(ws):
-    print("🔌 Connected. Authorizing...")
-    ws.send(json.dumps({"authorize": API_TOKEN}))
+# === Plug-in ===
+class MidPlugin(DigitPlugin):
+    """Five of the digits 4-9 at a time, each set traded on two runs out of four."""
 
-def on_message(ws, message):
-    global run_count, last_selected_digits, last_trade_time
-    data = json.loads(message)
+    def __init__(self, host):
+        super().__init__(host, "mid")
+        self.tick_buffer = deque(maxlen=TICK_BUFFER_SIZE)
+        self.run_count = 0
+        self.last_selected_digits = []
+        self.last_trade_time = 0
 
-    if data.get("msg_type") == "authorize":
-        print("✅ Authorized.")
-        trader.set_account_type(data)
-        ws.send(json.dumps({"ticks": TICK_SYMBOL, "subscribe": 1}))
+    def warm_start(self, digits):
+        self.tick_buffer.extend(digits)
 
-    elif data.get("msg_type") == "tick":
-        digit = int(str(data["tick"]["quote"])[-1])
-        tick_buffer.append(digit)
-        trader.tick()
+    def on_tick(self, tick, digit):
+        self.tick_buffer.append(digit)
+        self.trader.tick()
 
-        if len(tick_buffer) < 50:
+        if len(self.tick_buffer) < 50:
             return
 
         now = time.time()
-        if now - last_trade_time < MIN_TRADE_INTERVAL:
+        if now - self.last_trade_time < MIN_TRADE_INTERVAL:
             return
 
-        if run_count % 4 < 2:
-            digits_to_trade = last_selected_digits
+        if self.run_count % 4 < 2:
+            digits_to_trade = self.last_selected_digits
         else:
             digits_to_trade = random.sample(range(4, 10), 5)
-            last_selected_digits = digits_to_trade
+            self.last_selected_digits = digits_to_trade
 
         print(f"🎯 Instant match trades on digits: {digits_to_trade}")
-        trader.place_multiple_match_trades(digits_to_trade)
+        self.trader.place_multiple_match_trades(digits_to_trade)
 
-        run_count += 1
-        last_trade_time = now
+        self.run_count += 1
+        self.last_trade_time = now
 
-    elif data.get("msg_type") == "error":
-        print("❌ ERROR:", data["error"].get("message", "Unknown error"))
-
-def on_error(ws, error):
-    print("WebSocket Error:", error)
-
-def on_close(ws, *_):
-    print("🔒 Connection closed.")
+def create_plugin(host):
+    return MidPlugin(host)
 
 def run():
-    global trader
-    ws = websocket.WebSocketApp(
-        f"wss://ws.derivws.com/websockets/v3?app_id={APP_ID}",
-        on_open=on_open,
-        on_message=on_message,
-        on_error=on_error,
-        on_close=on_close
-    )
-    trader = Trader(ws)
-    ws.run_forever()
+    run_host([create_plugin], TICK_ARCHIVE_DIR, TICK_HISTORY_COUNT, IDLE_TIMEOUT)
 
 if __name__ == "__main__":
     run()
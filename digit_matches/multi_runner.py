@@ -0,0 +1,175 @@
+# digit_matches/multi_runner.py
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from dotenv import load_dotenv
+from colorama import init, Fore, Style
+from tabulate import tabulate
+
+init(autoreset=True)
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.budget import RiskBudget
+from common.client import DerivClient
+from common.endpoint import WS_URL
+from common.codec import Dispatcher
+from common.governor import OrderGovernor
+from common.metrics import install_signal_handlers
+from common.proposals import ProposalCache
+from common.rpc import RequestLayer
+from common.supervisor import ConnectionSupervisor
+from common.tick_archive import open_archive
+
+from config import (SYMBOLS, MAX_OPEN_STAKE, MAX_TOTAL_LOSS, IDLE_TIMEOUT, TICK_ARCHIVE_DIR, MAX_IN_FLIGHT,
+                    REQUEST_TIMEOUT, ORDER_RATE, ORDER_BURST, SYMBOL_ORDER_RATE, SYMBOL_ORDER_BURST, ORDER_MAX_WAIT,
+                    PROPOSAL_CACHE, MAX_PROPOSAL_SUBSCRIPTIONS, PROPOSAL_MAX_AGE, PROPOSAL_STAKE_TOLERANCE)
+from trader import Trader
+from consensus import ConsensusStrategy
+
+# === Load environment ===
+load_dotenv()
+API_TOKEN = os.getenv("API_TOKEN")
+APP_ID = os.getenv("APP_ID")
+
+def shard(symbols, workers):
+    """Split symbols round-robin into `workers` non-empty lists."""
+    workers = max(1, min(workers, len(symbols)))
+    return [symbols[i::workers] for i in range(workers)]
+
+# === Worker process ===
+def run_worker(worker_id, symbols, budget, account_share=1.0):
+    """Trade `symbols` over one connection, with a Trader and ConsensusStrategy per symbol."""
+    tag = f"[w{worker_id}]"
+    install_signal_handlers()
+    # One req_id space and in-flight window per connection, shared by its traders
+    requests = RequestLayer(lambda message: client.send(message), MAX_IN_FLIGHT, REQUEST_TIMEOUT)
+    # Every worker trades the same account, so each gets `account_share` of its order rate
+    governor = OrderGovernor(ORDER_RATE * account_share, max(1, ORDER_BURST * account_share), SYMBOL_ORDER_RATE,
+                             SYMBOL_ORDER_BURST, ORDER_MAX_WAIT)
+    # The proposal subscription limit is per connection, so the worker's traders share one cache
+    proposals = (ProposalCache(requests, lambda message: client.send(message), MAX_PROPOSAL_SUBSCRIPTIONS,
+                               PROPOSAL_MAX_AGE, PROPOSAL_STAKE_TOLERANCE, governor=governor) if PROPOSAL_CACHE else None)
+    # Each symbol belongs to exactly one worker, so its archive has a single writer
+    traders = {symbol: Trader(None, trade_log=f"trade_log_{symbol}.csv", headless=True, symbol=symbol, budget=budget,
+                              archive=open_archive(TICK_ARCHIVE_DIR, symbol), requests=requests,
+                              governor=governor, proposals=proposals)
+               for symbol in symbols}
+    strategies = {symbol: ConsensusStrategy(trader) for symbol, trader in traders.items()}
+    for symbol, strategy in strategies.items():
+        strategy.warm_start(traders[symbol].warm_digits())
+
+    def on_open(client):
+        print(f"{Fore.CYAN}{tag} 🔌 Connected. Authorizing for {', '.join(symbols)}...{Style.RESET_ALL}")
+        client.send(json.dumps({"authorize": API_TOKEN}))
+
+    def on_api_error(client, data):
+        print(f"{Fore.RED}{tag} ❌ API Error ({data.get('msg_type')}): {data['error'].get('message')}{Style.RESET_ALL}")
+
+    def on_authorize(client, data):
+        if "error" in data:
+            return
+        if proposals is not None:
+            proposals.resubscribe()  # before the traders want their contracts again
+        for i, trader in enumerate(traders.values()):
+            trader.set_account_type(data, subscribe_balance=(i == 0))
+
+    def on_balance(client, data):
+        if "error" in data:
+            return
+        for trader in traders.values():
+            trader.update_balance(data)
+
+    def on_history(client, data):
+        symbol = data.get("echo_req", {}).get("ticks_history")
+        if symbol in traders:
+            strategies[symbol].warm_start(traders[symbol].handle_history(data))
+
+    def on_tick(client, data):
+        symbol = data.get("tick", {}).get("symbol")
+        if symbol in traders:
+            digit = traders[symbol].record_tick(data["tick"])
+            if digit is not None:
+                strategies[symbol].on_tick(digit)
+
+    def on_proposal(client, data):
+        if proposals is not None:
+            proposals.on_proposal(data)
+
+    def on_contract_update(client, data):
+        symbol = data.get("proposal_open_contract", {}).get("underlying")
+        if symbol in traders:
+            settled = traders[symbol].handle_contract_update(data)
+            if settled:
+                strategies[symbol].on_settlement(*settled)
+
+    on_message = Dispatcher({
+        "authorize": on_authorize,
+        "balance": on_balance,
+        "history": on_history,
+        "tick": on_tick,
+        "proposal_open_contract": on_contract_update,
+        "proposal": on_proposal,
+    }, on_error=on_api_error, requests=requests)  # buy responses go to the placing trader's handle_buy
+
+    def on_error(client, error):
+        print(f"{Fore.RED}{tag} ❌ WebSocket Error: {error}{Style.RESET_ALL}")
+
+    client = DerivClient(f"{WS_URL}?app_id={APP_ID}", on_message=on_message, on_open=on_open, on_error=on_error,
+                         idle_timeout=IDLE_TIMEOUT)
+    for trader in traders.values():
+        trader.ws = client
+    try:
+        ConnectionSupervisor(client, tag=f"{tag} ", on_disconnect=requests.fail_all).run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for trader in traders.values():
+            trader.close()
+
+# === Supervisor ===
+def main():
+    parser = argparse.ArgumentParser(description="Run the consensus match bot across many symbols in worker processes.")
+    parser.add_argument("--symbols", default=",".join(SYMBOLS), help="Comma-separated symbols (default: SYMBOLS in config.py)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: CPU count)")
+    parser.add_argument("--max-open-stake", type=float, default=MAX_OPEN_STAKE)
+    parser.add_argument("--max-loss", type=float, default=MAX_TOTAL_LOSS)
+    parser.add_argument("--status-interval", type=float, default=10)
+    args = parser.parse_args()
+
+    symbols = [s for s in args.symbols.split(",") if s]
+    budget = RiskBudget(args.max_open_stake, args.max_loss)
+    workers = []
+    shards = shard(symbols, args.workers)
+    for worker_id, chunk in enumerate(shards):
+        process = multiprocessing.Process(target=run_worker, args=(worker_id, chunk, budget, 1 / len(shards)),
+                                          name=f"match-worker-{worker_id}")
+        process.start()
+        workers.append((process, chunk))
+        print(f"{Fore.GREEN}🚀 Worker {worker_id} (pid {process.pid}): {', '.join(chunk)}{Style.RESET_ALL}")
+
+    try:
+        while any(process.is_alive() for process, _ in workers):
+            time.sleep(args.status_interval)
+            s = budget.snapshot()
+            win_rate = s["wins"] / s["trades"] if s["trades"] else 0
+            print(tabulate([
+                ["Workers alive", f"{sum(p.is_alive() for p, _ in workers)}/{len(workers)}"],
+                ["Open Stake", f"{s['open_stake']:.2f} / {budget.max_open_stake:.2f} USD"],
+                ["Settled Trades", s["trades"]],
+                ["Win Rate", f"{win_rate:.2%}"],
+                ["Total P/L", f"{s['pnl']:.2f} USD"],
+                ["Rejected by Budget", s["rejected"]],
+                ["Status", f"{Fore.RED}Halted (loss limit){Style.RESET_ALL}" if s["halted"] else "Active"],
+            ], headers=["Metric", "Value"], tablefmt="fancy_grid"))
+    except KeyboardInterrupt:
+        print(f"{Fore.YELLOW}⏹ Stopping workers...{Style.RESET_ALL}")
+    finally:
+        for process, _ in workers:
+            process.join(timeout=10)
+
+if __name__ == "__main__":
+    main()
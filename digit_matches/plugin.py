@@ -0,0 +1,58 @@
+# digit_matches/plugin.py
+import time
+
+from config import (TICK_SYMBOL, MAX_OPEN_STAKE, MAX_TOTAL_LOSS, PROPOSAL_CACHE, MAX_PROPOSAL_SUBSCRIPTIONS,
+                    PROPOSAL_MAX_AGE, PROPOSAL_STAKE_TOLERANCE)
+from trader import Trader
+from common.budget import RiskBudget
+from common.host import Plugin
+from common.proposals import ProposalCache
+
+class DigitPlugin(Plugin):
+    """Base for the digit bots as StrategyHost plug-ins: one Trader, with its own budget when sharing a host.
+
+    Subclasses implement on_tick(tick, digit).
+    """
+
+    def __init__(self, host, name, symbol=TICK_SYMBOL):
+        self.name = name
+        self.symbol = symbol
+        # Alongside other plug-ins, each one stops at its own exposure and loss limits
+        budget = RiskBudget(MAX_OPEN_STAKE, MAX_TOTAL_LOSS) if host.shared else None
+        self.trader = Trader(host.client, trade_log=host.trade_log(name), headless=host.shared, symbol=symbol,
+                             budget=budget, requests=host.requests, governor=host.governor, proposals=host.proposals)
+        if PROPOSAL_CACHE and self.trader.proposals is None:
+            self.trader.proposals = ProposalCache(self.trader.requests, host.client.send, MAX_PROPOSAL_SUBSCRIPTIONS,
+                                                  PROPOSAL_MAX_AGE, PROPOSAL_STAKE_TOLERANCE,
+                                                  governor=self.trader.governor)
+        self.last_balance_log = 0
+
+    def on_authorize(self, data):
+        # The host subscribes balance and ticks once for every plug-in
+        self.trader.set_account_type(data, subscribe_balance=False, subscribe_ticks=False)
+
+    def on_balance(self, data):
+        self.trader.update_balance(data)
+        if time.time() - self.last_balance_log > 10:
+            self.last_balance_log = time.time()
+            self.trader.display_status()
+
+    def owns(self, contract_id):
+        return self.trader.owns(contract_id)
+
+    def on_contract_update(self, data):
+        settled = self.trader.handle_contract_update(data)
+        if settled:
+            self.on_settlement(*settled)
+
+    def on_settlement(self, contract, entry):
+        """Log a sold contract; strategies may override."""
+        profit = contract.get("profit", 0)
+        self.trader.log_trade(contract.get("barrier"), contract.get("buy_price", 0), "win" if profit > 0 else "loss",
+                              profit, entry.strategies_voted if entry else None)
+
+    def stats(self):
+        return self.trader.stats()
+
+    def close(self):
+        self.trader.close()
@@ -0,0 +1,41 @@
+# digit_matches/risk_sim.py
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import MAX_STAKE, MIN_STAKE, PAYOUTS, RISK_PERCENTAGE, STAKE_AMOUNT, STAKING_MODE
+from trader import Trader
+from common.risk_sim import Policy, add_arguments, report
+from common.settlement import load_payouts
+
+def match_stake(balances):
+    """Trader.calculate_stake over an array of balances."""
+    if STAKING_MODE == "dynamic":
+        stake = np.round(np.clip(balances * RISK_PERCENTAGE, MIN_STAKE, MAX_STAKE), 2)
+        return np.where(balances > 0, stake, float(STAKE_AMOUNT))
+    return np.full(np.shape(balances), float(STAKE_AMOUNT))
+
+def match_policy(win_prob=0.1, payouts=None):
+    """DIGITMATCH trades under the Trader's staking rule and its consecutive-loss pause."""
+    payouts = PAYOUTS if payouts is None else payouts
+    # The stop-loss settings are Trader attributes; a detached Trader supplies them
+    trader = Trader(None, trade_log=None, headless=True)
+    return Policy(match_stake, [(win_prob, payouts["DIGITMATCH"]), (1 - win_prob, -1.0)],
+                  max_losses=trader.max_consecutive_losses, pause=trader.stop_loss_pause)
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo risk of the digit Matches staking and stop-loss policy.")
+    add_arguments(parser)
+    parser.add_argument("--win-prob", type=float, default=0.1, help="Chance a Matches contract wins")
+    parser.add_argument("--rate", type=float, default=1.0, help="Trades per second while not paused")
+    args = parser.parse_args()
+
+    policy = match_policy(args.win_prob, load_payouts(args.payouts, PAYOUTS))
+    report(f"Digit Matches risk ({STAKING_MODE} staking)", policy, args, args.rate)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# digit_matches/scheduler.py
+from collections import defaultdict
+
+class _Entry:
+    __slots__ = ("item", "due", "digit", "strategies", "active")
+
+    def __init__(self, item, due, digit, strategies):
+        self.item = item
+        self.due = due
+        self.digit = digit
+        self.strategies = strategies
+        self.active = True
+
+class TickScheduler:
+    """Deferred items bucketed by the tick number they are due on.
+
+    `advance()` pops only the current tick's bucket, so per-tick cost depends
+    on how many items fire, not on how many are queued. Items keep insertion
+    order within a tick. Cancelled items are flagged and skipped when their
+    tick comes round.
+    """
+
+    def __init__(self):
+        self.tick_no = 0
+        self._buckets = {}  # tick number -> [_Entry]
+        self._by_digit = defaultdict(set)
+        self._by_strategy = defaultdict(set)
+        self._size = 0
+
+    def schedule(self, delay, item, digit=None, strategies=()):
+        """Queue `item` to fire after `delay` ticks (anything below 1 fires on the next tick)."""
+        entry = _Entry(item, self.tick_no + max(int(delay), 1), digit, tuple(strategies or ()))
+        self._buckets.setdefault(entry.due, []).append(entry)
+        if digit is not None:
+            self._by_digit[digit].add(entry)
+        for strat in entry.strategies:
+            self._by_strategy[strat].add(entry)
+        self._size += 1
+        return entry
+
+    def advance(self):
+        """Move to the next tick and return the items due on it."""
+        self.tick_no += 1
+        bucket = self._buckets.pop(self.tick_no, None)
+        if not bucket:
+            return []
+        due = []
+        for entry in bucket:
+            if entry.active:
+                self._forget(entry)
+                due.append(entry.item)
+        return due
+
+    def cancel_digit(self, digit):
+        """Cancel every queued item for `digit`; returns how many were cancelled."""
+        return self._cancel(list(self._by_digit.get(digit, ())))
+
+    def cancel_strategy(self, strategy):
+        """Cancel every queued item voted for by `strategy`."""
+        return self._cancel(list(self._by_strategy.get(strategy, ())))
+
+    def clear(self):
+        tick_no = self.tick_no
+        self.__init__()
+        self.tick_no = tick_no
+
+    def _cancel(self, entries):
+        for entry in entries:
+            self._forget(entry)
+        return len(entries)
+
+    def _forget(self, entry):
+        entry.active = False
+        self._size -= 1
+        if entry.digit is not None:
+            self._discard(self._by_digit, entry.digit, entry)
+        for strat in entry.strategies:
+            self._discard(self._by_strategy, strat, entry)
+
+    @staticmethod
+    def _discard(index, key, entry):
+        entries = index[key]
+        entries.discard(entry)
+        if not entries:
+            del index[key]
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for tick in sorted(self._buckets):
+            for entry in self._buckets[tick]:
+                if entry.active:
+                    yield entry.item
@@ -1,30 +1,46 @@
-from collections import Counter
+from window import DigitWindow
+
+ALL_DIGITS = set(range(10))
+
+def _as_window(buffer):
+    # Strategies read running counts from a DigitWindow; plain sequences are wrapped once.
+    if isinstance(buffer, DigitWindow):
+        return buffer
+    digits = list(buffer)
+    return DigitWindow(maxlen=max(len(digits), 1), iterable=digits)
 
 def least_seen_digit(buffer):
-    freq = Counter(buffer)
-    all_digits = set(range(10))
-    missing = all_digits - set(freq.keys())
-    return list(missing)[0] if missing else min(freq, key=freq.get)
+    window = _as_window(buffer)
+    missing = ALL_DIGITS - window.distinct()
+    if missing:
+        return list(missing)[0]
+    counts = window.counts()
+    return min(range(10), key=lambda d: (counts[d], window.first_position(d)))
 
 def most_frequent_digit(buffer):
-    freq = Counter(buffer)
-    return max(freq, key=freq.get) if freq else None
+    window = _as_window(buffer)
+    if not window:
+        return None
+    counts = window.counts()
+    return max(window.distinct(), key=lambda d: (counts[d], -window.first_position(d)))
 
 def detect_pattern(buffer, window=10, threshold=5):
-    recent = list(buffer)[-window:]
-    freq = Counter(recent)
-    for digit, count in freq.items():
-        if count >= threshold:
-            return digit
-    return None
+    recent = _as_window(buffer).tail(window)
+    counts = recent.counts()
+    hits = [digit for digit in range(10) if counts[digit] >= threshold]
+    if not hits:
+        return None
+    if len(hits) == 1:
+        return hits[0]
+    return recent.first_seen(hits)
 
 def detect_compression_breakout(buffer, prev_digits, window=10):
-    recent = list(buffer)[-window:]
-    unique_digits = set(recent)
+    digits = _as_window(buffer)
+    unique_digits = digits.tail(window).distinct()
     if len(unique_digits) <= 3:
-        recent_5 = list(buffer)[-5:]
+        recent_5 = digits.tail(5)
         breakout_digits = unique_digits - prev_digits
         for digit in breakout_digits:
-            if digit in recent_5:
+            if recent_5.count(digit):
                 return digit
-    return None
\ No newline at end of file
+    return None
@@ -0,0 +1,156 @@
+# digit_matches/sweep.py
+import argparse
+import ast
+import csv
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from colorama import init, Fore, Style
+from tabulate import tabulate
+
+init(autoreset=True)
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import PAYOUTS
+from backtest import run_backtest
+from consensus import STRATEGY_WEIGHTS
+from common.metrics import TIMINGS
+from common.settlement import load_payouts
+from common.ticks import read_ticks
+
+# Searched when no --grid/--param is given: 3^5 * 2^2 = 972 configurations
+DEFAULT_GRID = {
+    "pattern_window": [8, 10, 15],
+    "pattern_threshold": [3, 4, 5],
+    "breakout_window": [8, 10, 15],
+    "min_seconds_between_bursts": [5, 10, 20],
+    "coverage_depth": [1, 3, 5],
+    "weight.most_frequent": [0.2, 0.4],
+    "weight.least_seen": [0.3, 0.5],
+}
+STRATEGY_PARAMS = ("pattern_window", "pattern_threshold", "breakout_window",
+                   "min_seconds_between_bursts", "coverage_depth", "use_coverage_trading", "regime_filter")
+RESULT_COLUMNS = ["trades", "wins", "hit_rate", "staked", "pnl", "max_drawdown"]
+
+def validate(grid):
+    for name in grid:
+        if name.startswith("weight."):
+            if name[len("weight."):] not in STRATEGY_WEIGHTS:
+                raise ValueError(f"Unknown strategy weight: {name}")
+        elif name not in STRATEGY_PARAMS:
+            raise ValueError(f"Unknown parameter: {name}")
+    return grid
+
+def configurations(grid, samples=None, seed=None):
+    """Every combination of `grid`, or `samples` of them drawn without replacement."""
+    names = list(grid)
+    combos = list(itertools.product(*(grid[name] for name in names)))
+    if samples is not None and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return [dict(zip(names, values)) for values in combos]
+
+def apply_params(params, strategy):
+    """run_backtest configure hook: set sweep parameters on a fresh ConsensusStrategy."""
+    for name, value in params.items():
+        if name.startswith("weight."):
+            strategy.strategy_performance[name[len("weight."):]]['weight'] = value
+        else:
+            setattr(strategy, name, value)
+
+# === Worker process ===
+_histories = None
+_payouts = None
+
+def _init_worker(paths, payouts):
+    # Each worker reads the tick files once, instead of receiving them with every task
+    global _histories, _payouts
+    _histories = [list(read_ticks(path)) for path in paths]
+    _payouts = payouts
+    TIMINGS.enabled = False
+
+def evaluate(params):
+    """Backtest one configuration over every tick history; P&L and counts are summed."""
+    trades = wins = 0
+    staked = pnl = max_drawdown = 0.0
+    for ticks in _histories:
+        report, _, _ = run_backtest(ticks, _payouts, configure=partial(apply_params, params))
+        trades += report.trades
+        wins += report.wins
+        staked += report.staked
+        pnl += report.pnl
+        max_drawdown = max(max_drawdown, report.max_drawdown)
+    return {**params, "trades": trades, "wins": wins, "hit_rate": wins / trades if trades else 0.0,
+            "staked": round(staked, 2), "pnl": round(pnl, 2), "max_drawdown": round(max_drawdown, 2)}
+
+def run_sweep(paths, configs, payouts=None, workers=None, rank_by="pnl"):
+    """Evaluate `configs` across a process pool (in this process with one worker); returns results ranked best first."""
+    payouts = PAYOUTS if payouts is None else payouts
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        enabled = TIMINGS.enabled
+        _init_worker(paths, payouts)
+        try:
+            results = [evaluate(params) for params in configs]
+        finally:
+            TIMINGS.enabled = enabled
+    else:
+        chunksize = max(1, len(configs) // (workers * 4))
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(paths, payouts)) as pool:
+            results = list(pool.map(evaluate, configs, chunksize=chunksize))
+    reverse = rank_by != "max_drawdown"
+    return sorted(results, key=lambda r: r[rank_by], reverse=reverse)
+
+def write_results(path, results):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["rank"] + list(results[0]))
+        writer.writeheader()
+        for rank, result in enumerate(results, 1):
+            writer.writerow({"rank": rank, **result})
+
+def parse_param(text):
+    """`name=v1,v2,...` -> (name, [values]); values are Python literals."""
+    name, _, values = text.partition("=")
+    return name.strip(), [ast.literal_eval(v.strip()) for v in values.split(",") if v.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Search ConsensusStrategy parameters over recorded ticks.")
+    parser.add_argument("ticks", nargs="+", help="CSV (epoch,quote), ticks_history JSON or .ticks archive files")
+    parser.add_argument("--grid", help="JSON file mapping parameter names to lists of values")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=V1,V2",
+                        help="Values for one parameter (repeatable); replaces that entry of the grid")
+    parser.add_argument("--samples", type=int, help="Random search: evaluate this many configurations from the grid")
+    parser.add_argument("--seed", type=int, help="Seed for --samples")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--rank-by", default="pnl", choices=RESULT_COLUMNS)
+    parser.add_argument("--payouts", help="JSON file overriding the PAYOUTS table in config.py")
+    parser.add_argument("--out", default="sweep_results.csv", help="CSV file for the full ranked table")
+    parser.add_argument("--top", type=int, default=20, help="Rows to print")
+    args = parser.parse_args()
+
+    grid = dict(DEFAULT_GRID)
+    if args.grid:
+        with open(args.grid) as f:
+            grid = json.load(f)
+    grid.update(parse_param(p) for p in args.param)
+    configs = configurations(validate(grid), args.samples, args.seed)
+
+    print(f"{Fore.CYAN}🔎 Evaluating {len(configs)} configurations on {len(args.ticks)} tick file(s) "
+          f"with {args.workers} workers...{Style.RESET_ALL}")
+    started = time.perf_counter()
+    results = run_sweep(args.ticks, configs, load_payouts(args.payouts, PAYOUTS), args.workers, args.rank_by)
+    elapsed = time.perf_counter() - started
+
+    write_results(args.out, results)
+    top = results[:args.top]
+    rows = [[rank] + [f"{v:.2%}" if k == "hit_rate" else v for k, v in r.items()] for rank, r in enumerate(top, 1)]
+    print(tabulate(rows, headers=["Rank"] + list(top[0]), tablefmt="fancy_grid", floatfmt="g"))
+    print(f"{Fore.YELLOW}{len(results)} configurations in {elapsed:.1f}s; full table in {args.out}{Style.RESET_ALL}")
+
+if __name__ == "__main__":
+    main()
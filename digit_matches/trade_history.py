@@ -0,0 +1,98 @@
+# digit_matches/trade_history.py
+import time
+from collections import Counter, deque
+
+class _Tally:
+    __slots__ = ("settled", "wins", "pnl")
+
+    def __init__(self):
+        self.settled = 0
+        self.wins = 0
+        self.pnl = 0.0
+
+    def add(self, outcome, profit):
+        self.settled += 1
+        self.wins += outcome == "win"
+        self.pnl += profit
+
+    def as_dict(self):
+        return {"settled": self.settled, "wins": self.wins, "pnl": round(self.pnl, 2)}
+
+def _digit_key(digit):
+    # Pending rows carry the int digit, settlements the contract's string barrier
+    try:
+        return int(digit)
+    except (TypeError, ValueError):
+        return digit
+
+class TradeHistory:
+    """Trade rows with a bounded in-memory tail and running aggregates.
+
+    Only the last `tail_size` rows are kept in memory, as raw
+    (timestamp, digit, stake, outcome, profit) tuples; formatting is left to
+    the dashboard. Every row is also handed to `journal` when one is given,
+    so rows that fall off the tail are already on disk. Win rate, P&L and the
+    per-digit and per-strategy tallies are updated as rows arrive and never
+    need a scan.
+    """
+
+    def __init__(self, tail_size=100, journal=None):
+        self.tail = deque(maxlen=tail_size)
+        self.journal = journal
+        self.rows = 0
+        self.settled = 0
+        self.wins = 0
+        self.pnl = 0.0
+        self.digit_counts = Counter()  # every row, pending or settled, by digit
+        self.per_digit = {}  # digit -> _Tally of settled trades
+        self.per_strategy = {}  # strategy -> _Tally of settled trades it voted for
+
+    def add(self, epoch, digit, stake, outcome, profit, strategies_voted=None):
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(epoch))
+        self.tail.append((timestamp, digit, stake, outcome, profit))
+        if self.journal:
+            self.journal.record(epoch, digit, stake, outcome, profit)
+        self.rows += 1
+        key = _digit_key(digit)
+        self.digit_counts[key] += 1
+        if outcome not in ("win", "loss"):
+            return
+        self.settled += 1
+        self.wins += outcome == "win"
+        self.pnl += profit
+        self._tally(self.per_digit, key).add(outcome, profit)
+        for strat in strategies_voted or ():
+            self._tally(self.per_strategy, strat).add(outcome, profit)
+
+    @staticmethod
+    def _tally(table, key):
+        tally = table.get(key)
+        if tally is None:
+            tally = table[key] = _Tally()
+        return tally
+
+    def last(self, n):
+        """The newest `n` rows, oldest first."""
+        if n >= len(self.tail):
+            return list(self.tail)
+        return [self.tail[i] for i in range(len(self.tail) - n, len(self.tail))]
+
+    def win_rate(self):
+        return self.wins / self.settled if self.settled else 0
+
+    def strategy_wins(self):
+        return {strat: tally.wins for strat, tally in self.per_strategy.items()}
+
+    def summary(self):
+        return {
+            "rows": self.rows,
+            "settled": self.settled,
+            "wins": self.wins,
+            "win_rate": self.win_rate(),
+            "pnl": round(self.pnl, 2),
+            "digits": {digit: tally.as_dict() for digit, tally in sorted(self.per_digit.items(), key=lambda kv: str(kv[0]))},
+            "strategies": {strat: tally.as_dict() for strat, tally in self.per_strategy.items()},
+        }
+
+    def __len__(self):
+        return len(self.tail)
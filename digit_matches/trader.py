@@ -1,21 +1,54 @@
 # digit_matches/trader.py
-import json
 import time
-import csv
 import os
-from collections import Counter, deque
+from functools import partial
 from colorama import init, Fore, Style
-from tabulate import tabulate
 
 init(autoreset=True)
 
-from config import STAKE_AMOUNT, TICK_SYMBOL, REQUIRE_DEMO_ACCOUNT, STAKING_MODE, RISK_PERCENTAGE, MIN_STAKE, MAX_STAKE
+from config import (STAKE_AMOUNT, TICK_SYMBOL, REQUIRE_DEMO_ACCOUNT, STAKING_MODE, RISK_PERCENTAGE, MIN_STAKE, MAX_STAKE,
+                    TRADE_LOG_FORMAT, JOURNAL_FLUSH_SIZE, JOURNAL_FLUSH_INTERVAL, DASHBOARD_MODE, DASHBOARD_FPS,
+                    CONTRACT_TTL, MAX_TRACKED_CONTRACTS, TRADE_HISTORY_TAIL, TICK_BUFFER_SIZE, TICK_HISTORY_COUNT,
+                    MAX_IN_FLIGHT, REQUEST_TIMEOUT, ORDER_RATE, ORDER_BURST, SYMBOL_ORDER_RATE, SYMBOL_ORDER_BURST,
+                    ORDER_MAX_WAIT, PROPOSAL_STAKE_TOLERANCE)
+from contracts import ContractRegistry
+from dashboard import Dashboard
+from scheduler import TickScheduler
+from trade_history import TradeHistory
+from common.codec import dumps, order_template, proposal_buy
+from common.governor import OrderGovernor, DROPPED
+from common.journal import TradeJournal
+from common.metrics import TIMINGS
+from common.rpc import RequestLayer
+from common.tick_archive import history_request
+from common.ticks import last_digit
+
+# A buy that failed with these may still have been filled by the server
+UNCONFIRMED_CODES = ("RequestTimeout", "ConnectionClosed")
 
 class Trader:
-    def __init__(self, ws):
+    def __init__(self, ws, clock=time.time, trade_log="trade_log.csv", headless=False, symbol=TICK_SYMBOL, budget=None,
+                 archive=None, requests=None, governor=None, proposals=None):
         self.ws = ws
+        self.symbol = symbol
+        self.budget = budget  # optional RiskBudget shared with other traders/processes
+        self.archive = archive  # optional TickArchive for `symbol`, kept across reconnects
+        self.clock = clock  # injectable so backtests can replay on tick time
+        # Headless traders never render; otherwise a Dashboard thread draws status snapshots
+        self.dashboard = None if headless or DASHBOARD_MODE == "headless" else Dashboard(fps=DASHBOARD_FPS)
         self.last_trade_time = 0
-        self.pending_trades = []
+        self.pending_trades = TickScheduler()  # coverage trades keyed by the tick they fire on
+        self.contracts = ContractRegistry(CONTRACT_TTL, MAX_TRACKED_CONTRACTS, clock)
+        # Buy responses reach handle_buy once the bot's Dispatcher is given `requests`; a
+        # RequestLayer can be shared by traders on one connection (multi_runner)
+        self.requests = requests or RequestLayer(self._send, MAX_IN_FLIGHT, REQUEST_TIMEOUT, clock, grace=CONTRACT_TTL)
+        # Order rate limit (common/governor.py); shared like `requests` when traders share an account
+        self.governor = governor or OrderGovernor(ORDER_RATE, ORDER_BURST, SYMBOL_ORDER_RATE, SYMBOL_ORDER_BURST,
+                                                  ORDER_MAX_WAIT, clock=clock)
+        self._buy_template = order_template(symbol, "DIGITMATCH")
+        # Optional ProposalCache (common/proposals.py) shared on the connection: buys by proposal id when it has a quote
+        self.proposals = proposals
+        self._quoted_stake = None  # stake the cache was last asked to quote every digit at
         self.account_type = None
         self.balance = 0
         self.current_stake = STAKE_AMOUNT
@@ -23,41 +56,124 @@ class Trader:
         self.max_consecutive_losses = 5
         self.stop_loss_pause = 300  # 5 minutes
         self.stop_loss_time = 0
-        self.trade_log = "trade_log.csv"
+        self.trade_log = trade_log  # None disables the trade journal
         self.trade_count = 0
-        self.total_wins = 0
-        self.total_profit = 0
-        self.digit_frequencies = Counter()
-        self.strategy_contributions = {'pattern': 0, 'most_frequent': 0, 'least_seen': 0, 'breakout': 0}
-        self.recent_trades = deque(maxlen=5)  # Last 5 trades
-        self.all_trades = []  # All trades
-        if not os.path.exists(self.trade_log):
-            with open(self.trade_log, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(["Timestamp", "Digit", "Stake", "Outcome", "Profit"])
-
-    def set_account_type(self, msg):
+        self.journal = None
+        if self.trade_log:
+            if TRADE_LOG_FORMAT == "binary":
+                self.trade_log = os.path.splitext(self.trade_log)[0] + ".bin"
+            self.journal = TradeJournal(self.trade_log, TRADE_LOG_FORMAT, JOURNAL_FLUSH_SIZE, JOURNAL_FLUSH_INTERVAL)
+        # Last TRADE_HISTORY_TAIL rows in memory; the journal holds the rest
+        self.history = TradeHistory(TRADE_HISTORY_TAIL, self.journal)
+
+    def _send(self, message):
+        self.ws.send(message)
+
+    def close(self):
+        """Flush the trade journal and stop the dashboard."""
+        if self.journal:
+            self.journal.close()
+        if self.dashboard:
+            self.dashboard.stop()
+
+    def set_account_type(self, msg, subscribe_balance=True, subscribe_ticks=True):
         loginid = msg.get("authorize", {}).get("loginid", "")
         self.account_type = "demo" if loginid and loginid.startswith("VRTC") else "real"
         try:
-            self.ws.send(json.dumps({"balance": 1, "subscribe": 1}))
-            self.ws.send(json.dumps({"ticks": TICK_SYMBOL, "subscribe": 1}))
+            if subscribe_balance:
+                self.ws.send(dumps({"balance": 1, "subscribe": 1}))
+            # subscribe_ticks=False when someone else subscribes, e.g. the StrategyHost (common/host.py)
+            if subscribe_ticks and self.archive is not None:
+                # History since the archive's newest tick, then the live stream on the same subscription
+                self.ws.send(dumps(history_request(self.archive, self.symbol, TICK_HISTORY_COUNT)))
+            elif subscribe_ticks:
+                self.ws.send(dumps({"ticks": self.symbol, "subscribe": 1}))
+            self.resubscribe_contracts()
+            self.reconcile_orders()
+            self.watch_quotes()
         except Exception as e:
             print(f"{Fore.RED}❌ Subscription failed: {e}{Style.RESET_ALL}")
 
+    def resubscribe_contracts(self):
+        """Subscribe again to contracts left open by an earlier connection (after a reconnect)."""
+        for contract_id, entry in self.contracts.open.items():
+            entry.subscription_id = None  # ids from the old connection are gone
+            self.subscribe_contract(contract_id)
+
+    def reconcile_orders(self):
+        """Ask which orders left without a buy response (timed out or cut off by a reconnect) were filled."""
+        orphans = [entry for req_id, entry in self.contracts.pending.items() if req_id not in self.requests.pending]
+        if orphans:
+            self.requests.request({"portfolio": 1}, callback=partial(self.handle_portfolio, orphans))
+
+    def handle_portfolio(self, orphans, data):
+        """Track the open contracts that fill `orphans`, matched by symbol, contract type and stake; drop the rest.
+
+        Orders left without a match were never filled, so their stake is released.
+        """
+        if "error" in data:
+            return  # left to the contract TTL
+        contracts = [contract for contract in data.get("portfolio", {}).get("contracts", [])
+                     if contract.get("symbol") == self.symbol and contract.get("contract_type") == "DIGITMATCH"
+                     and contract.get("contract_id") not in self.contracts.open]
+        for entry in orphans:
+            if self.contracts.pending.get(entry.req_id) is not entry:
+                continue  # answered, or expired, in the meantime
+            match = next((contract for contract in contracts if abs(float(contract["buy_price"]) - entry.stake) < 0.005),
+                         None)
+            if match is not None:
+                contracts.remove(match)
+                self.handle_buy({"req_id": entry.req_id, "buy": {"contract_id": match["contract_id"]}})
+            elif self.contracts.discard_order(entry.req_id) and self.budget:
+                self.budget.release(entry.stake)
+
+    def subscribe_contract(self, contract_id):
+        """Subscribe to a contract's updates, ahead of queued orders under the rate limit (never dropped)."""
+        message = dumps({"proposal_open_contract": 1, "contract_id": contract_id, "subscribe": 1})
+        self.governor.submit(partial(self._send, message), lane="settlement", max_wait=float("inf"))
+
+    def warm_digits(self, n=TICK_BUFFER_SIZE):
+        """Newest `n` archived last digits, for pre-filling a tick buffer."""
+        return self.archive.digits(n) if self.archive is not None else []
+
+    def handle_history(self, data):
+        """Archive a ticks_history response; returns the digits it added, oldest first."""
+        if self.archive is None or "error" in data:
+            return []
+        added = self.archive.add_history(data)
+        return self.archive.digits(min(added, TICK_BUFFER_SIZE))
+
+    def record_tick(self, tick):
+        """Archive a live tick; returns its last digit, or None if it repeats the newest archived tick."""
+        if (self.archive is not None and not self.archive.append(tick["epoch"], tick["quote"])
+                and tick["epoch"] == self.archive.last_epoch):
+            return None
+        return last_digit(tick["quote"])
+
     def update_balance(self, balance_data):
         new_balance = balance_data.get("balance", {}).get("balance", 0)
         if abs(new_balance - self.balance) > 0.01:
             self.balance = new_balance
+            self.watch_quotes()
+
+    def watch_quotes(self):
+        """Have the proposal cache quote every digit at the current stake, as far as its limit allows."""
+        if self.proposals is None or self.balance <= 0:  # no stake to quote before the balance is known
+            return
+        stake = self.calculate_stake()
+        if self._quoted_stake is None or abs(stake - self._quoted_stake) > PROPOSAL_STAKE_TOLERANCE * stake:
+            self._quoted_stake = stake
+            self.proposals.want(self._buy_template, range(10), stake)
 
     def can_trade(self):
         if REQUIRE_DEMO_ACCOUNT and self.account_type != "demo":
             return False
-        if time.time() < self.stop_loss_time:
+        if self.clock() < self.stop_loss_time:
             return False
         return True
 
     def calculate_stake(self):
+        # risk_sim.match_stake is the same rule over arrays of balances; test_risk_sim checks they agree
         if STAKING_MODE == "constant":
             return STAKE_AMOUNT
         elif STAKING_MODE == "dynamic":
@@ -67,34 +183,126 @@ class Trader:
             return round(stake, 2)
         return STAKE_AMOUNT
 
-    def place_match_trade(self, digit, strategies_voted=None):
+    def place_match_trade(self, digit, strategies_voted=None, lane="trade"):
+        """Buy DIGITMATCH on `digit`, now or once the rate governor allows; returns False if it was refused.
+
+        A queued buy absorbs repeats of its digit on the same tick; coverage
+        buys fired on later ticks queue on their own.
+        """
         if not self.can_trade():
+            return False
+        status = self.governor.submit(partial(self._send_match_trade, digit, strategies_voted), self.symbol, lane,
+                                      key=(self.symbol, digit, self.pending_trades.tick_no))
+        if status == DROPPED:
+            print(f"{Fore.YELLOW}⏳ Match {digit} dropped by the order governor (queue full){Style.RESET_ALL}")
+        return status != DROPPED
+
+    def _send_match_trade(self, digit, strategies_voted):
+        if not self.can_trade():  # may have been queued before a stop-loss pause
             return
-        self.current_stake = self.calculate_stake()
-        trade_payload = {
-            "buy": 1,
-            "price": self.current_stake,
-            "parameters": {
-                "amount": self.current_stake,
-                "basis": "stake",
-                "contract_type": "DIGITMATCH",
-                "currency": "USD",
-                "duration": 5,
-                "duration_unit": "t",
-                "symbol": TICK_SYMBOL,
-                "barrier": str(digit)
-            }
-        }
+        with TIMINGS.stage("stake"):
+            self.current_stake = self.calculate_stake()
+            quote = self.proposals.take(self._buy_template, digit, self.current_stake) if self.proposals else None
+            if quote is not None:
+                self.current_stake = quote.stake  # within PROPOSAL_STAKE_TOLERANCE of the staking rule
+        if self.budget and not self.budget.reserve(self.current_stake):
+            return
+        req_id = self.requests.next_id()
+        entry = self.contracts.add_order(req_id, digit, self.current_stake, strategies_voted, self.pending_trades.tick_no)
         try:
-            self.ws.send(json.dumps(trade_payload))
-            self.last_trade_time = time.time()
+            with TIMINGS.stage("serialize"):
+                if quote is not None:
+                    message = proposal_buy(req_id, quote.id, quote.ask_price)
+                else:
+                    message = self._buy_template.render(req_id, self.current_stake, digit)
+            with TIMINGS.stage("send"):
+                self.requests.send(message, req_id, "buy", self.handle_buy, on_late=partial(self.handle_late_buy, entry))
+            self.last_trade_time = self.clock()
             self.trade_count += 1
-            self.log_trade(digit, self.current_stake, "pending", 0, strategies_voted)
+            with TIMINGS.stage("log"):
+                self.log_trade(digit, self.current_stake, "pending", 0, strategies_voted)
             if self.trade_count % 100 == 0:
                 self.analyze_performance()
         except Exception as e:
+            self.contracts.discard_order(req_id)
+            if self.budget:
+                self.budget.release(self.current_stake)
             print(f"{Fore.RED}❌ Trade failed: {e}{Style.RESET_ALL}")
 
+    def handle_buy(self, data):
+        """Track a buy response (or error, timeout included) and subscribe to its contract; returns the contract id or None.
+
+        An order that timed out or was cut off by a reconnect stays tracked, with
+        its stake reserved: handle_late_buy or reconcile_orders settle what happened.
+        """
+        contract_id = data.get("buy", {}).get("contract_id")
+        if not contract_id:
+            if data.get("error", {}).get("code") in UNCONFIRMED_CODES:
+                return None
+            entry = self.contracts.discard_order(data.get("req_id"))
+            if entry and self.budget:
+                self.budget.release(entry.stake)
+            return None
+        self.contracts.on_buy(data.get("req_id"), contract_id)
+        self.subscribe_contract(contract_id)
+        return contract_id
+
+    def handle_late_buy(self, entry, data):
+        """A buy response that arrived after the request timed out; tracks the contract if it was filled."""
+        if entry.contract_id is not None:
+            return None  # already found through reconcile_orders
+        if data.get("buy", {}).get("contract_id") and self.contracts.pending.get(entry.req_id) is not entry:
+            # Expired or reconciled away meanwhile, with its stake released: the contract is live, so count it again
+            self.contracts.restore(entry)
+            if self.budget:
+                self.budget.reserve(entry.stake, force=True)
+        return self.handle_buy(data)
+
+    def handle_contract_update(self, data):
+        """Process a proposal_open_contract message.
+
+        Returns (contract, entry) once the contract is sold, after forgetting its
+        subscription and settling it against the budget; entry is None for
+        contracts this trader did not place, or no longer tracks.
+        """
+        contract = data.get("proposal_open_contract", {})
+        contract_id = contract.get("contract_id")
+        subscription_id = data.get("subscription", {}).get("id")
+        if contract.get("is_sold", 0) != 1:
+            self.contracts.on_subscribed(contract_id, subscription_id)
+            return None
+        entry = self.contracts.settle(contract_id)
+        if self.budget:
+            # Only a tracked entry still holds its stake; expire_contracts released the others
+            self.budget.release(entry.stake if entry else 0.0, contract.get("profit", 0))
+        subscription_id = subscription_id or (entry.subscription_id if entry else None)
+        if subscription_id:
+            self.forget(subscription_id)
+        return contract, entry
+
+    def owns(self, contract_id):
+        """Whether `contract_id` is an open contract this trader placed."""
+        return contract_id in self.contracts.open
+
+    def stats(self):
+        """Trade counters, for summaries."""
+        return {"trades": self.trade_count, "wins": self.history.wins, "pnl": self.history.pnl,
+                "open": len(self.contracts), "rejected": self.budget.snapshot()["rejected"] if self.budget else 0}
+
+    def forget(self, subscription_id):
+        try:
+            self.ws.send(dumps({"forget": subscription_id}))
+        except Exception as e:
+            print(f"{Fore.RED}❌ Forget failed: {e}{Style.RESET_ALL}")
+
+    def expire_contracts(self):
+        """Drop orders/contracts never heard back about and release their subscriptions and budget."""
+        for entry in self.contracts.expire():
+            if entry.subscription_id:
+                self.forget(entry.subscription_id)
+            if self.budget:
+                self.budget.release(entry.stake)
+
     def place_multiple_match_trades(self, digits):
         if not self.can_trade():
             return
@@ -103,44 +311,34 @@ class Trader:
 
     def fire_coverage_trades(self, digit, delay_ticks, strategies_voted=None):
         for delay in delay_ticks:
-            self.pending_trades.append({"digit": digit, "delay": delay, "strategies_voted": strategies_voted})
+            self.pending_trades.schedule(delay, {"digit": digit, "strategies_voted": strategies_voted},
+                                         digit=digit, strategies=strategies_voted)
+
+    def cancel_coverage_trades(self, digit=None, strategy=None):
+        """Drop queued coverage trades for a digit and/or a strategy; returns the number cancelled."""
+        cancelled = 0
+        if digit is not None:
+            cancelled += self.pending_trades.cancel_digit(digit)
+        if strategy is not None:
+            cancelled += self.pending_trades.cancel_strategy(strategy)
+        return cancelled
 
     def tick(self):
-        for trade in self.pending_trades[:]:
-            trade["delay"] -= 1
-            if trade["delay"] <= 0:
-                self.place_match_trade(trade["digit"], trade.get("strategies_voted"))
-                self.pending_trades.remove(trade)
+        self.governor.pump()
+        for trade in self.pending_trades.advance():
+            self.place_match_trade(trade["digit"], trade.get("strategies_voted"), lane="coverage")
+        self.requests.expire()
+        self.expire_contracts()
 
     def log_trade(self, digit, stake, outcome, profit, strategies_voted=None):
         try:
-            timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-            with open(self.trade_log, 'a', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow([timestamp, digit, stake, outcome, profit])
-            self.digit_frequencies[digit] += 1
-            # Color the outcome for display
+            self.history.add(self.clock(), digit, stake, outcome, profit, strategies_voted)
             if outcome == "win":
-                colored_outcome = f"{Fore.GREEN}{outcome}{Style.RESET_ALL}"
-            elif outcome == "loss":
-                colored_outcome = f"{Fore.RED}{outcome}{Style.RESET_ALL}"
-            else:
-                colored_outcome = f"{Fore.YELLOW}{outcome}{Style.RESET_ALL}"
-            trade_entry = [timestamp, digit, stake, colored_outcome, profit]
-            self.recent_trades.append(trade_entry)
-            self.all_trades.append(trade_entry)
-            if outcome == "win":
-                self.total_wins += 1
-                self.total_profit += profit
-                if strategies_voted:
-                    for strat in strategies_voted:
-                        self.strategy_contributions[strat] += 1
                 self.consecutive_losses = 0
             elif outcome == "loss":
                 self.consecutive_losses += 1
-                self.total_profit += profit
                 if self.consecutive_losses >= self.max_consecutive_losses:
-                    self.stop_loss_time = time.time() + self.stop_loss_pause
+                    self.stop_loss_time = self.clock() + self.stop_loss_pause
         except Exception as e:
             print(f"{Fore.RED}❌ Logging failed: {e}{Style.RESET_ALL}")
 
@@ -148,36 +346,22 @@ class Trader:
         self.display_status()
 
     def display_status(self, current_digit=None, strategies_voted=None, strategy_votes=None):
-        os.system("cls" if os.name == "nt" else "clear")
-        win_rate = self.total_wins / self.trade_count if self.trade_count > 0 else 0
-        status = "Active" if self.can_trade() else f"Paused ({int(self.stop_loss_time - time.time())}s left)"
-        status_color = f"{Fore.GREEN}{status}{Style.RESET_ALL}" if self.can_trade() else f"{Fore.RED}{status}{Style.RESET_ALL}"
-        status_table = [
-            ["Balance", f"{self.balance:.2f} USD"],
-            ["Current Trade", f"Digit {current_digit}" if current_digit else "None"],
-            ["Stake", f"{self.current_stake:.2f} USD"],
-            ["Win Rate", f"{win_rate:.2%}"],
-            ["Total P/L", f"{self.total_profit:.2f} USD"],
-            ["Status", status_color]
-        ]
-        print(f"{Fore.BLUE}{Style.BRIGHT}=== Trading Status ==={Style.RESET_ALL}")
-        print(tabulate(status_table, headers=["Metric", "Value"], tablefmt="fancy_grid"))
-
-        if strategy_votes and strategies_voted:
-            consensus_table = [[strat, f"Digit {vote[0]} (Weight: {vote[1]:.2f})"] for vote, strat in zip(strategy_votes, strategies_voted)]
-            print(f"\n{Fore.BLUE}{Style.BRIGHT}=== Strategy Consensus ==={Style.RESET_ALL}")
-            print(tabulate(consensus_table, headers=["Strategy", "Vote"], tablefmt="fancy_grid"))
-            print(f"{Fore.YELLOW}Consensus Digit: {current_digit}{Style.RESET_ALL}")
-
-        print(f"\n{Fore.BLUE}{Style.BRIGHT}=== Recent Trades (Last 5) ==={Style.RESET_ALL}")
-        print(tabulate(self.recent_trades, headers=["Timestamp", "Digit", "Stake", "Outcome", "Profit"], tablefmt="fancy_grid"))
-
-        print(f"\n{Fore.BLUE}{Style.BRIGHT}=== All Trades (Last 10) ==={Style.RESET_ALL}")
-        start_idx = max(0, len(self.all_trades) - 10)
-        recent_all_trades = self.all_trades[start_idx:]
-        print(tabulate(recent_all_trades, headers=["Timestamp", "Digit", "Stake", "Outcome", "Profit"], tablefmt="fancy_grid"))
-
-        if self.trade_count % 100 == 0 and self.trade_count > 0:
-            print(f"\n{Fore.BLUE}{Style.BRIGHT}=== Performance Summary ==={Style.RESET_ALL}")
-            print(f"{Fore.BLUE}Digit Frequencies: {dict(self.digit_frequencies)}{Style.RESET_ALL}")
-            print(f"{Fore.BLUE}Strategy Contributions: {dict(self.strategy_contributions)}{Style.RESET_ALL}")
\ No newline at end of file
+        if self.dashboard is None:
+            return
+        # Only a snapshot is taken here; formatting and drawing happen on the dashboard thread
+        can_trade = self.can_trade()
+        snapshot = {
+            "balance": self.balance,
+            "current_digit": current_digit,
+            "stake": self.current_stake,
+            "win_rate": self.history.wins / self.trade_count if self.trade_count > 0 else 0,
+            "total_profit": self.history.pnl,
+            "can_trade": can_trade,
+            "pause_left": 0 if can_trade else int(self.stop_loss_time - self.clock()),
+            "consensus": list(zip(strategy_votes, strategies_voted)) if strategy_votes and strategies_voted else None,
+            "recent_trades": self.history.last(5),
+            "all_trades": self.history.last(10),
+            "summary": (dict(self.history.digit_counts), self.history.strategy_wins())
+                       if self.trade_count % 100 == 0 and self.trade_count > 0 else None,
+        }
+        self.dashboard.update(snapshot)
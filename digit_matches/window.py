@@ -0,0 +1,120 @@
+# digit_matches/window.py
+from collections import deque
+
+
+class _SubWindow:
+    """Last-N view of a DigitWindow with its own running digit counts."""
+
+    def __init__(self, size, digits=()):
+        self.size = size
+        self._digits = deque(maxlen=size)
+        self._counts = [0] * 10
+        for digit in digits:
+            self.append(digit)
+
+    def append(self, digit):
+        if len(self._digits) == self.size:
+            self._counts[self._digits[0]] -= 1
+        self._digits.append(digit)
+        self._counts[digit] += 1
+
+    def count(self, digit):
+        return self._counts[digit]
+
+    def counts(self):
+        return self._counts
+
+    def distinct(self):
+        """Set of digits currently in the sub-window (no more than its size)."""
+        return set(self._digits)
+
+    def first_seen(self, candidates):
+        """Return whichever of `candidates` appears earliest in the sub-window."""
+        for digit in self._digits:
+            if digit in candidates:
+                return digit
+        return None
+
+    def __len__(self):
+        return len(self._digits)
+
+    def __iter__(self):
+        return iter(self._digits)
+
+
+class DigitWindow:
+    """Sliding window of last digits with O(1) running statistics.
+
+    Keeps per-digit counts, the position of every occurrence (to break ties
+    by first appearance, exactly like Counter insertion order) and any
+    number of last-N sub-windows, all updated as each digit enters/leaves.
+    """
+
+    def __init__(self, maxlen=100, iterable=()):
+        self.maxlen = maxlen
+        self._digits = deque()
+        self._counts = [0] * 10
+        self._positions = [deque() for _ in range(10)]
+        self._distinct = 0
+        self._seq = 0
+        self._subs = {}
+        for digit in iterable:
+            self.append(digit)
+
+    def append(self, digit):
+        if len(self._digits) == self.maxlen:
+            old = self._digits.popleft()
+            self._positions[old].popleft()
+            self._counts[old] -= 1
+            if not self._counts[old]:
+                self._distinct -= 1
+        self._digits.append(digit)
+        if not self._counts[digit]:
+            self._distinct += 1
+        self._counts[digit] += 1
+        self._positions[digit].append(self._seq)
+        self._seq += 1
+        for sub in self._subs.values():
+            sub.append(digit)
+
+    def clear(self):
+        self.__init__(self.maxlen)
+
+    def tail(self, n):
+        """Return the last-n sub-window, registering it on first use."""
+        n = min(n, self.maxlen)
+        sub = self._subs.get(n)
+        if sub is None:
+            start = max(0, len(self._digits) - n)
+            sub = self._subs[n] = _SubWindow(n, (self._digits[i] for i in range(start, len(self._digits))))
+        return sub
+
+    def count(self, digit):
+        return self._counts[digit]
+
+    def counts(self):
+        return self._counts
+
+    def distinct(self):
+        """Set of digits currently in the window."""
+        return {d for d in range(10) if self._counts[d]}
+
+    def distinct_count(self):
+        return self._distinct
+
+    def first_position(self, digit):
+        """Sequence number of the oldest occurrence of `digit` still in the window."""
+        positions = self._positions[digit]
+        return positions[0] if positions else None
+
+    def last(self):
+        return self._digits[-1] if self._digits else None
+
+    def __len__(self):
+        return len(self._digits)
+
+    def __iter__(self):
+        return iter(self._digits)
+
+    def __bool__(self):
+        return bool(self._digits)
@@ -7,4 +7,45 @@ REQUIRE_DEMO_ACCOUNT = True
 STAKE_AMOUNT = 3000  # Total stake per cycle ($294 Differs + $6 Matches)
 
 # Tick symbol (Volatility 10 1s)
-TICK_SYMBOL = '1HZ10V'
\ No newline at end of file
+TICK_SYMBOL = '1HZ10V'
+
+# Hedge orders: what to do with legs that filled when another leg was rejected:
+# 'sell', 'cancel' or 'alert'. Digit contracts cannot be sold or cancelled on Deriv, so alert.
+ORPHAN_ACTION = "alert"
+LEG_TIMEOUT = 10  # seconds to wait for every leg's buy response
+
+# Request layer (common/rpc.py): at most MAX_IN_FLIGHT unanswered requests, each failed after REQUEST_TIMEOUT seconds
+MAX_IN_FLIGHT = 100
+REQUEST_TIMEOUT = 10
+
+# Order rate governor (common/governor.py): token buckets per account and per symbol. Deriv limits
+# requests per minute per account (website_status -> api_call_limits); keep ORDER_RATE under them.
+ORDER_RATE = 1.25  # orders per second across the account
+ORDER_BURST = 10
+SYMBOL_ORDER_RATE = 1.0  # orders per second on any one symbol; None for no per-symbol limit
+SYMBOL_ORDER_BURST = 5
+ORDER_MAX_WAIT = 2  # seconds an order may wait for a token before it is dropped
+
+# Proposal cache (common/proposals.py): live `proposal` subscriptions, so orders buy by proposal id at a known
+# payout. Deriv allows a few per connection (website_status -> api_call_limits -> max_proposal_subscription).
+PROPOSAL_CACHE = True
+MAX_PROPOSAL_SUBSCRIPTIONS = 5  # until website_status reports the account's limit
+PROPOSAL_MAX_AGE = 3  # seconds a quote stays usable
+PROPOSAL_STAKE_TOLERANCE = 0  # legs go out at exactly the calculated stakes
+
+# Seconds without any message before a connection is treated as dead and reconnected
+IDLE_TIMEOUT = 10
+
+# Tick archive (common/tick_archive.py) used to pre-fill the tick buffer; None disables it
+TICK_ARCHIVE_DIR = "tick_archive"
+TICK_HISTORY_COUNT = 1000  # ticks fetched when the archive is empty
+
+# Regime filter (common/digit_stats.py), opt-in: trade only while a window of the last REGIME_WINDOWS digits
+# departs measurably from uniform, independent digits. REGIME_ALPHA is the chance a fair stream passes on a given
+# tick, so on a fair index the filter lets about that share of ticks trade.
+REGIME_FILTER = False
+REGIME_WINDOWS = (50, 100, 500)
+REGIME_ALPHA = 0.01
+
+# Profit per unit stake used when settling contracts offline (backtests)
+PAYOUTS = {"DIGITMATCH": 8.0, "DIGITDIFF": 0.0955}
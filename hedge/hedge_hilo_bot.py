@@ -1,10 +1,21 @@
 # hedge_hilo_bot.py
-import websocket
 import json
 import os
+import sys
 import time
 from dotenv import load_dotenv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.client import DerivClient
+from common.endpoint import WS_URL
+from common.codec import Dispatcher, order_template, proposal_buy
+from common.legs import LegOrderBook
+from common.rpc import RequestLayer
+from common.metrics import TIMINGS, install_signal_handlers
+from common.proposals import ProposalCache
+from common.supervisor import ConnectionSupervisor
+
 # === Load .env ===
 load_dotenv()
 API_TOKEN = os.getenv("API_TOKEN")
@@ -15,74 +26,74 @@ SYMBOL = "R_100"  # 1s not needed for Higher/Lower
 STAKE = 1.0
 BARRIER_OFFSET = 0.2
 TRADE_INTERVAL = 15  # seconds between trades
+IDLE_TIMEOUT = 10  # seconds without any message before reconnecting
+ORPHAN_ACTION = "sell"  # if only one side fills, sell it back rather than hold an unhedged position
+LEG_TIMEOUT = 10  # seconds to wait for both buy responses
+HIGHER = order_template(SYMBOL, "CALL", duration=1)
+LOWER = order_template(SYMBOL, "PUT", duration=1)
+HIGHER_BARRIER = f"+{BARRIER_OFFSET:.1f}"
+LOWER_BARRIER = f"-{BARRIER_OFFSET:.1f}"
+USE_PROPOSALS = True  # buy by proposal id from live quotes (common/proposals.py)
+PROPOSAL_MAX_AGE = 3  # seconds a quote stays usable
 
 # === State ===
 last_trade_time = 0
+requests = None  # RequestLayer, created with the connection
+legs = None  # LegOrderBook sending through it
+proposals = None  # ProposalCache on the same layer, if USE_PROPOSALS
 
 # === WebSocket Logic ===
 def on_open(ws):
     print("🔌 Connected. Authorizing...")
     ws.send(json.dumps({"authorize": API_TOKEN}))
 
-def on_message(ws, message):
-    global last_trade_time
-    data = json.loads(message)
+def on_authorize(ws, data):
+    print("✅ Authorized.")
+    print(f"📉 Subscribing to ticks for {SYMBOL}")
+    ws.send(json.dumps({"ticks": SYMBOL, "subscribe": 1}))
+    if proposals is not None:
+        proposals.resubscribe()  # subscribes the two legs again after a reconnect
+        proposals.want(HIGHER, [HIGHER_BARRIER], STAKE)
+        proposals.want(LOWER, [LOWER_BARRIER], STAKE)
 
-    if data.get("msg_type") == "authorize":
-        print("✅ Authorized.")
-        print(f"📉 Subscribing to ticks for {SYMBOL}")
-        ws.send(json.dumps({"ticks": SYMBOL, "subscribe": 1}))
+def on_proposal(ws, data):
+    if proposals is not None:
+        proposals.on_proposal(data)
 
-    elif data.get("msg_type") == "tick":
-        now = time.time()
-        if now - last_trade_time < TRADE_INTERVAL:
-            return
+def on_tick(ws, data):
+    global last_trade_time
+    now = time.time()
+    if now - last_trade_time < TRADE_INTERVAL:
+        return
 
-        quote = float(data["tick"]["quote"])
-        place_hedge_trades(ws, quote)
-        last_trade_time = now
+    quote = float(data["tick"]["quote"])
+    place_hedge_trades(ws, quote)
+    last_trade_time = now
 
-    elif data.get("msg_type") == "error":
-        print("❌ ERROR:", data["error"].get("message", "Unknown error"))
+def on_api_error(ws, data):
+    print("❌ ERROR:", data["error"].get("message", "Unknown error"))
 
 def place_hedge_trades(ws, spot):
     print(f"🎯 Spot: {spot:.5f} | Placing hedge trades")
 
-    # Higher contract
-    higher = {
-        "buy": 1,
-        "price": STAKE,
-        "parameters": {
-            "amount": STAKE,
-            "basis": "stake",
-            "contract_type": "CALL",
-            "currency": "USD",
-            "duration": 1,
-            "duration_unit": "t",
-            "symbol": SYMBOL,
-            "barrier": f"+{BARRIER_OFFSET:.1f}"
-        }
-    }
-
-    # Lower contract
-    lower = {
-        "buy": 1,
-        "price": STAKE,
-        "parameters": {
-            "amount": STAKE,
-            "basis": "stake",
-            "contract_type": "PUT",
-            "currency": "USD",
-            "duration": 1,
-            "duration_unit": "t",
-            "symbol": SYMBOL,
-            "barrier": f"-{BARRIER_OFFSET:.1f}"
-        }
-    }
-
-    ws.send(json.dumps(higher))
-    ws.send(json.dumps(lower))
-    print("🚀 Trades sent: HIGHER + LOWER")
+    payouts = []
+    with TIMINGS.stage("serialize"):
+        payloads = []
+        for name, template, barrier in (("HIGHER", HIGHER, HIGHER_BARRIER), ("LOWER", LOWER, LOWER_BARRIER)):
+            req_id = requests.next_id()
+            quote = proposals.take(template, barrier, STAKE) if proposals is not None else None
+            if quote is not None:
+                payloads.append((name, req_id, proposal_buy(req_id, quote.id, quote.ask_price), quote.stake))
+                payouts.append(f"{name} pays {quote.payout:.2f}")
+            else:
+                payloads.append((name, req_id, template.render(req_id, STAKE, barrier), STAKE))
+    with TIMINGS.stage("send"):
+        order = legs.submit(payloads)
+    with TIMINGS.stage("log"):
+        quoted = f" | {', '.join(payouts)}" if payouts else ""
+        print(f"🚀 Trades sent: HIGHER + LOWER ({order.send_skew * 1e6:.0f}µs apart){quoted}")
+
+on_message = Dispatcher({"authorize": on_authorize, "tick": on_tick, "proposal": on_proposal}, on_error=on_api_error)
 
 def on_error(ws, error):
     print("WebSocket Error:", error)
@@ -91,14 +102,21 @@ def on_close(ws, *_):
     print("🔒 Connection closed.")
 
 def run():
-    ws = websocket.WebSocketApp(
-        f"wss://ws.derivws.com/websockets/v3?app_id={APP_ID}",
+    global requests, legs, proposals
+    install_signal_handlers()
+    ws = DerivClient(
+        f"{WS_URL}?app_id={APP_ID}",
         on_open=on_open,
         on_message=on_message,
         on_error=on_error,
-        on_close=on_close
+        on_close=on_close,
+        idle_timeout=IDLE_TIMEOUT
     )
-    ws.run_forever()
+    requests = on_message.requests = RequestLayer(ws.send)
+    legs = LegOrderBook(requests, ORPHAN_ACTION, LEG_TIMEOUT)
+    if USE_PROPOSALS:
+        proposals = ProposalCache(requests, ws.send, max_subscriptions=2, max_age=PROPOSAL_MAX_AGE)
+    ConnectionSupervisor(ws, on_disconnect=requests.fail_all).run()
 
 if __name__ == "__main__":
     run()
@@ -3,17 +3,26 @@ import json
 import time
 from collections import Counter
 import random
-from config import TICK_SYMBOL, STAKE_AMOUNT, REQUIRE_DEMO_ACCOUNT
+from config import TICK_SYMBOL, STAKE_AMOUNT, REQUIRE_DEMO_ACCOUNT, REGIME_FILTER, REGIME_WINDOWS, REGIME_ALPHA
+from common.digit_stats import DigitStats
+from common.metrics import TIMINGS
 
 class MatchDifferHedgeStrategy:
-    def __init__(self, trader):
+    def __init__(self, trader, clock=time.time, regime_filter=REGIME_FILTER):
         self.trader = trader
+        self.clock = clock
         self.stake_ratio = 49  # Differs:Matches stake ratio (49:1)
         self.total_stake = STAKE_AMOUNT  # Total stake ($300)
         self.tick_symbol = TICK_SYMBOL  # Volatility 10 (1s)
         self.require_demo_account = REQUIRE_DEMO_ACCOUNT
         self.tick_duration = 1  # Assume 1 second per tick
         self.wait_ticks = 5  # Wait 5 ticks between cycles
+        self.regime_filter = regime_filter  # skip cycles while the digits look fair
+        self.stats = DigitStats(REGIME_WINDOWS, REGIME_ALPHA)
+
+    def observe(self, digit):
+        """Feed every last digit, including warm-start ones, to the regime statistics."""
+        self.stats.append(digit)
 
     def calculate_stakes(self):
         """Calculate stake sizes for Matches and Differs based on ratio."""
@@ -45,7 +54,7 @@ class MatchDifferHedgeStrategy:
             return False
 
         # Check if enough time has passed since last trade
-        current_time = time.time()
+        current_time = self.clock()
         if self.trader.last_trade_time and (current_time - self.trader.last_trade_time) < (self.wait_ticks * self.tick_duration):
             print(f"⏳ Waiting {(self.wait_ticks * self.tick_duration) - (current_time - self.trader.last_trade_time):.2f} seconds before next trade cycle.")
             return False
@@ -54,12 +63,18 @@ class MatchDifferHedgeStrategy:
             print("⚠️ No tick data available, skipping trades.")
             return False
 
+        if self.regime_filter and not self.stats.has_edge():
+            print("⏸️ No measurable edge in the digit stream, skipping this cycle.")
+            return False
+
         # Calculate stakes
-        differs_stake, matches_stake = self.calculate_stakes()
+        with TIMINGS.stage("stake"):
+            differs_stake, matches_stake = self.calculate_stakes()
 
         # Select digits
-        differs_digit = self.select_differs_digit(buffer)
-        matches_digit = self.select_matches_digit(buffer)
+        with TIMINGS.stage("strategy"):
+            differs_digit = self.select_differs_digit(buffer)
+            matches_digit = self.select_matches_digit(buffer)
 
         if differs_digit is None or matches_digit is None:
             print("⚠️ Failed to select valid digits for trading.")
@@ -75,13 +90,9 @@ class MatchDifferHedgeStrategy:
             print("⚠️ Failed to resolve digit conflict.")
             return False
 
-        # Place trades simultaneously
-        differs_placed = self.trader.place_differs_trade(differs_digit, differs_stake)
-        matches_placed = False
-        if differs_placed:
-            matches_placed = self.trader.place_matches_trade(matches_digit, matches_stake)
-            if matches_placed:
-                self.trader.last_trade_time = time.time()
-                print(f"✅ Trades placed: DIFFERS {differs_digit} (${differs_stake:.2f}), MATCHES {matches_digit} (${matches_stake:.2f})")
-                return True
-        return False
\ No newline at end of file
+        # Both legs go out back to back as one order
+        order = self.trader.place_hedge(differs_digit, differs_stake, matches_digit, matches_stake)
+        if order is None or not order.sent:
+            return False
+        print(f"✅ Trades placed: DIFFERS {differs_digit} (${differs_stake:.2f}), MATCHES {matches_digit} (${matches_stake:.2f})")
+        return True
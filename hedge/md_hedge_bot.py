@@ -1,75 +1,65 @@
 # HEDGE/md_hedge_bot.py
-import websocket
-import json
 import os
-from dotenv import load_dotenv
+import sys
 from collections import deque
-import time
 
-from config import TICK_SYMBOL, STAKE_AMOUNT, REQUIRE_DEMO_ACCOUNT
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.host import Plugin, run_host
+from common.proposals import ProposalCache
+
+from config import (TICK_SYMBOL, IDLE_TIMEOUT, TICK_ARCHIVE_DIR, TICK_HISTORY_COUNT, PROPOSAL_CACHE,
+                    MAX_PROPOSAL_SUBSCRIPTIONS, PROPOSAL_MAX_AGE, PROPOSAL_STAKE_TOLERANCE)
 from trader import Trader
 from md_hedge import MatchDifferHedgeStrategy
 
-# === Load environment ===
-load_dotenv()
-API_TOKEN = os.getenv("API_TOKEN")
-APP_ID = os.getenv("APP_ID")
+# === Plug-in ===
+class HedgePlugin(Plugin):
+    """Matches/Differs hedge (MatchDifferHedgeStrategy) on the last 100 digits."""
 
-# === Globals ===
-tick_buffer = deque(maxlen=100)
-trader = None
-strategy = None
-last_trade_time = 0
-MIN_SECONDS_BETWEEN_TRADES = 3  # 5 ticks, assuming 1 second per tick
+    name = "md_hedge"
+    symbol = TICK_SYMBOL
 
-# === WebSocket Handlers ===
-def on_open(ws):
-    print("🔌 Connected. Authorizing...")
-    ws.send(json.dumps({"authorize": API_TOKEN}))
+    def __init__(self, host):
+        self.trader = Trader(host.client, requests=host.requests, governor=host.governor, proposals=host.proposals)
+        if PROPOSAL_CACHE and self.trader.proposals is None:
+            self.trader.proposals = ProposalCache(self.trader.requests, host.client.send, MAX_PROPOSAL_SUBSCRIPTIONS,
+                                                  PROPOSAL_MAX_AGE, PROPOSAL_STAKE_TOLERANCE,
+                                                  governor=self.trader.governor)
+        self.strategy = MatchDifferHedgeStrategy(self.trader)
+        self.tick_buffer = deque(maxlen=100)
 
-def on_message(ws, message):
-    global trader, strategy, last_trade_time
-    data = json.loads(message)
+    def on_authorize(self, data):
+        self.trader.set_account_type(data)
+        self.trader.watch_quotes(*self.strategy.calculate_stakes())
 
-    if data.get("msg_type") == "authorize":
-        print("✅ Authorized.")
-        trader.set_account_type(data)
-        ws.send(json.dumps({"ticks": TICK_SYMBOL, "subscribe": 1}))
+    def warm_start(self, digits):
+        self.tick_buffer.extend(digits)
+        for digit in digits:
+            self.strategy.observe(digit)
+        print(f"📚 Tick buffer has {len(self.tick_buffer)} digits.")
 
-    elif data.get("msg_type") == "tick":
-        digit = int(str(data["tick"]["quote"])[-1])
-        tick_buffer.append(digit)
+    def on_tick(self, tick, digit):
+        self.tick_buffer.append(digit)
+        self.strategy.observe(digit)
         print(f"📈 Received tick: Last digit = {digit}")
-        
-        if len(tick_buffer) < 10:
-            print(f"⏳ Waiting for more ticks (have {len(tick_buffer)}/10).")
+        self.trader.pump()  # orders held back by the rate governor
+
+        if len(self.tick_buffer) < 10:
+            print(f"⏳ Waiting for more ticks (have {len(self.tick_buffer)}/10).")
             return
 
         # Execute strategy
-        if strategy.execute(tick_buffer):
-            last_trade_time = time.time()
-
-    elif data.get("msg_type") == "error":
-        print("❌ ERROR:", data["error"]["message"])
+        self.strategy.execute(self.tick_buffer)
 
-def on_error(ws, error):
-    print("WebSocket Error:", error)
+    def stats(self):
+        return self.trader.stats()
 
-def on_close(ws, *_):
-    print("🔒 Connection closed.")
+def create_plugin(host):
+    return HedgePlugin(host)
 
 def run():
-    global trader, strategy
-    ws = websocket.WebSocketApp(
-        f"wss://ws.derivws.com/websockets/v3?app_id={APP_ID}",
-        on_open=on_open,
-        on_message=on_message,
-        on_error=on_error,
-        on_close=on_close
-    )
-    trader = Trader(ws)
-    strategy = MatchDifferHedgeStrategy(trader)
-    ws.run_forever()
+    run_host([create_plugin], TICK_ARCHIVE_DIR, TICK_HISTORY_COUNT, IDLE_TIMEOUT)
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    run()
@@ -0,0 +1,46 @@
+# HEDGE/risk_sim.py
+import argparse
+import os
+import sys
+from functools import partial
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import PAYOUTS
+from md_hedge import MatchDifferHedgeStrategy
+from common.risk_sim import Policy, add_arguments, report
+from common.settlement import load_payouts
+
+def hedge_policy(match_prob=0.1, differs_prob=0.1, payouts=None):
+    """One Matches/Differs hedge per trade, split as MatchDifferHedgeStrategy.calculate_stakes does.
+
+    `match_prob` is the chance the Matches digit comes up (both legs win),
+    `differs_prob` the chance the Differs digit does (both lose); otherwise
+    only the Differs leg wins.
+    """
+    payouts = PAYOUTS if payouts is None else payouts
+    differs, matches = MatchDifferHedgeStrategy(None).calculate_stakes()
+    total = differs + matches
+    won_differs = differs * payouts["DIGITDIFF"]
+    outcomes = [(match_prob, (won_differs + matches * payouts["DIGITMATCH"]) / total),
+                (differs_prob, -1.0),
+                (1 - match_prob - differs_prob, (won_differs - matches) / total)]
+    return Policy(partial(np.full_like, fill_value=total), outcomes)
+
+def main():
+    strategy = MatchDifferHedgeStrategy(None)
+    parser = argparse.ArgumentParser(description="Monte Carlo risk of the Matches/Differs hedge stakes.")
+    add_arguments(parser)
+    parser.add_argument("--match-prob", type=float, default=0.1, help="Chance the Matches digit comes up")
+    parser.add_argument("--differs-prob", type=float, default=0.1, help="Chance the Differs digit comes up")
+    parser.add_argument("--rate", type=float, default=1 / (strategy.wait_ticks * strategy.tick_duration),
+                        help="Hedges per second (default: one per wait_ticks cycle)")
+    args = parser.parse_args()
+
+    policy = hedge_policy(args.match_prob, args.differs_prob, load_payouts(args.payouts, PAYOUTS))
+    report("Matches/Differs hedge risk", policy, args, args.rate)
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,46 @@
 # HEDGE/trader.py
-import json
 import time
 
-from config import STAKE_AMOUNT, TICK_SYMBOL, REQUIRE_DEMO_ACCOUNT
+from config import (STAKE_AMOUNT, TICK_SYMBOL, REQUIRE_DEMO_ACCOUNT, ORPHAN_ACTION, LEG_TIMEOUT, MAX_IN_FLIGHT,
+                    REQUEST_TIMEOUT, ORDER_RATE, ORDER_BURST, SYMBOL_ORDER_RATE, SYMBOL_ORDER_BURST, ORDER_MAX_WAIT)
+from common.codec import order_template, proposal_buy
+from common.governor import OrderGovernor, SENT, QUEUED, DROPPED
+from common.legs import LegOrderBook
+from common.metrics import TIMINGS
+from common.rpc import RequestLayer
 
 class Trader:
-    def __init__(self, ws):
+    def __init__(self, ws, clock=time.time, requests=None, governor=None, proposals=None):
         self.ws = ws
+        self.clock = clock  # injectable so backtests can replay on tick time
         self.last_trade_time = 0
         self.account_type = None
+        # Responses reach their callbacks once the bot's Dispatcher is given `requests`
+        self.requests = requests or RequestLayer(self._send, MAX_IN_FLIGHT, REQUEST_TIMEOUT, clock)
+        self._differs_template = order_template(TICK_SYMBOL, "DIGITDIFF")
+        self._matches_template = order_template(TICK_SYMBOL, "DIGITMATCH")
+        # Optional ProposalCache (common/proposals.py): legs buy by proposal id when it has a quote
+        self.proposals = proposals
+        self.legs = LegOrderBook(self.requests, ORPHAN_ACTION, LEG_TIMEOUT, clock=clock)
+        # Keeps orders under the API rate limit (common/governor.py)
+        self.governor = governor or OrderGovernor(ORDER_RATE, ORDER_BURST, SYMBOL_ORDER_RATE, SYMBOL_ORDER_BURST,
+                                                  ORDER_MAX_WAIT, clock=clock)
+
+    def _send(self, message):
+        self.ws.send(message)
+
+    def _buy_message(self, req_id, template, digit, stake):
+        """(message, stake): a buy by proposal id when the cache has a quote, else with parameters."""
+        quote = self.proposals.take(template, digit, stake) if self.proposals else None
+        if quote is not None:
+            return proposal_buy(req_id, quote.id, quote.ask_price), quote.stake
+        return template.render(req_id, stake, digit), stake
+
+    def watch_quotes(self, differs_stake, matches_stake):
+        """Have the proposal cache quote both legs on every digit, as far as its limit allows."""
+        if self.proposals is not None:
+            self.proposals.want(self._differs_template, range(10), differs_stake)
+            self.proposals.want(self._matches_template, range(10), matches_stake)
 
     def set_account_type(self, msg):
         """Set account type based on authorization response."""
@@ -25,44 +57,77 @@ class Trader:
 
     def place_differs_trade(self, digit, stake):
         """Place a Differs trade with the specified digit and stake."""
-        if not self.can_trade():
-            return False
-        trade_payload = {
-            "buy": 1,
-            "price": stake,
-            "parameters": {
-                "amount": stake,
-                "basis": "stake",
-                "contract_type": "DIGITDIFF",
-                "currency": "USD",
-                "duration": 5,
-                "duration_unit": "t",
-                "symbol": TICK_SYMBOL,
-                "barrier": str(digit)
-            }
-        }
-        print(f"🚀 Placing trade: DIFFERS {digit} with stake ${stake:.2f}")
-        self.ws.send(json.dumps(trade_payload))
-        return True
+        return self._place_single("DIFFERS", self._differs_template, digit, stake)
 
     def place_matches_trade(self, digit, stake):
         """Place a Matches trade with the specified digit and stake."""
+        return self._place_single("MATCHES", self._matches_template, digit, stake)
+
+    def _place_single(self, name, template, digit, stake):
+        """Send (or queue, under the order rate limit) a one-leg trade; returns False if it was refused."""
         if not self.can_trade():
             return False
-        trade_payload = {
-            "buy": 1,
-            "price": stake,
-            "parameters": {
-                "amount": stake,
-                "basis": "stake",
-                "contract_type": "DIGITMATCH",
-                "currency": "USD",
-                "duration": 5,
-                "duration_unit": "t",
-                "symbol": TICK_SYMBOL,
-                "barrier": str(digit)
-            }
-        }
-        print(f"🚀 Placing trade: MATCHES {digit} with stake ${stake:.2f}")
-        self.ws.send(json.dumps(trade_payload))
-        return True
\ No newline at end of file
+        status = self.governor.submit(lambda: self._send_single(name, template, digit, stake), TICK_SYMBOL, "trade",
+                                      key=(name, digit))
+        if status != SENT:
+            print(f"⏳ {name} {digit} {status} by the order governor")
+        return status != DROPPED
+
+    def _send_single(self, name, template, digit, stake):
+        req_id = self.requests.next_id()
+        with TIMINGS.stage("serialize"):
+            message, stake = self._buy_message(req_id, template, digit, stake)
+        with TIMINGS.stage("send"):
+            self.requests.send(message, req_id, "buy", self.handle_buy)
+        with TIMINGS.stage("log"):
+            print(f"🚀 Placing trade: {name} {digit} with stake ${stake:.2f}")
+
+    def place_hedge(self, differs_digit, differs_stake, matches_digit, matches_stake):
+        """Send the DIFFERS and MATCHES legs back to back as one order; returns the LegOrder or None.
+
+        Hedges take the governor's highest lane and two tokens, one per leg. A
+        hedge held back by the rate limit goes out on a later pump() and this
+        returns None; until then a later hedge replaces it, so the newest
+        digits go out.
+        """
+        if not self.can_trade():
+            return None
+        orders = []
+        status = self.governor.submit(
+            lambda: orders.append(self._send_hedge(differs_digit, differs_stake, matches_digit, matches_stake)),
+            TICK_SYMBOL, "hedge", key="hedge", cost=2, replace=True)
+        if status in (QUEUED, DROPPED):
+            print(f"⏳ Hedge {status} by the order governor")
+        return orders[0] if orders else None
+
+    def _send_hedge(self, differs_digit, differs_stake, matches_digit, matches_stake):
+        legs = []
+        with TIMINGS.stage("serialize"):
+            for name, template, digit, stake in (("DIFFERS", self._differs_template, differs_digit, differs_stake),
+                                                 ("MATCHES", self._matches_template, matches_digit, matches_stake)):
+                req_id = self.requests.next_id()
+                message, stake = self._buy_message(req_id, template, digit, stake)
+                legs.append((f"{name} {digit}", req_id, message, stake))
+        with TIMINGS.stage("send"):
+            order = self.legs.submit(legs)
+        if order.sent:
+            self.last_trade_time = self.clock()
+        with TIMINGS.stage("log"):
+            print(f"🚀 Placing hedge #{order.order_id}: DIFFERS {differs_digit} (${differs_stake:.2f}) + "
+                  f"MATCHES {matches_digit} (${matches_stake:.2f}), legs {order.send_skew * 1e6:.0f}µs apart")
+        return order
+
+    def stats(self):
+        """Hedge order counters, for summaries."""
+        return {"hedges": self.legs.filled, "failed": self.legs.failed, "orphaned": self.legs.orphaned,
+                "timed_out": self.requests.timed_out}
+
+    def pump(self):
+        """Send orders the rate governor held back and time out unanswered legs; call on every tick."""
+        self.governor.pump()
+        self.requests.expire()
+
+    def handle_buy(self, data):
+        """Buy response (or error) of a single-leg trade; returns the contract id or None."""
+        self.governor.pump()
+        return data.get("buy", {}).get("contract_id")
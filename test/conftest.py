@@ -0,0 +1,33 @@
+import os
+import sys
+
+# The digit bot's flat modules (config, trader, ...) and the repository root, as the bot scripts see them
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "digit_matches")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from common.stub_server import StubServer
+from loopback import Loopback
+
+SYMBOL = "1HZ10V"
+
+
+class Clock:
+    """Test clock: callable like time.time, moved by setting `now`."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def stub(symbols=(SYMBOL,), **kwargs):
+    """A StubServer and an authorised Loopback connection to it."""
+    server = StubServer(list(symbols), **kwargs)
+    return server, Loopback(server)
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "perf: timing benchmarks (test_perf.py), run only with PERF=1")
@@ -0,0 +1,44 @@
+import json
+
+from common.stub_server import Session
+
+
+class Loopback:
+    """A client connection to an in-process StubServer: send() is answered into the session's outbox.
+
+    Nothing reaches the client until deliver(), so tests choose when responses
+    arrive. With `drop` set, sent messages are lost on the way.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.dispatch = None
+        self.session = None
+        self.drop = False
+        self.reconnect()
+
+    def reconnect(self):
+        """Drop the session, with its subscriptions and undelivered messages, and open an authorised one."""
+        self.server.sessions.discard(self.session)
+        self.session = Session(None, self.server.queue_size)
+        self.session.authorized = True
+        self.server.sessions.add(self.session)
+
+    def send(self, message):
+        if self.drop:
+            return
+        request = json.loads(message)
+        response = self.server.handle(self.session, request)
+        response.setdefault("echo_req", request)
+        if "req_id" in request:
+            response["req_id"] = request["req_id"]
+        self.session.push(response)
+
+    def deliver(self):
+        """Hand every queued server message to the dispatcher, as the client's receive loop would."""
+        while not self.session.outbox.empty():
+            self.dispatch(self, json.dumps(self.session.outbox.get_nowait()))
+
+    def tick(self, symbol):
+        self.server.emit_tick(self.server.feeds[symbol])
+        self.deliver()
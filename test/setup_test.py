@@ -2,6 +2,11 @@ import websocket
 import json
 from dotenv import load_dotenv
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.endpoint import WS_URL
 
 # Load environment variables from .env file
 load_dotenv()
@@ -18,7 +23,7 @@ def on_message(ws, msg):
     print("Message received:", msg)
 
 ws = websocket.WebSocketApp(
-    f"wss://ws.derivws.com/websockets/v3?app_id={APP_ID}",
+    f"{WS_URL}?app_id={APP_ID}",
     on_open=on_open,
     on_message=on_message
 )
@@ -0,0 +1,62 @@
+import random
+
+import numpy as np
+import pytest
+
+import batch_signals
+import strategies
+from window import DigitWindow
+
+
+def scalar_signals(digits, maxlen=100, pattern_window=10, pattern_threshold=5, breakout_window=10):
+    """Per-tick scalar signals, with prev_digits taken from the previous tick's window."""
+    window = DigitWindow(maxlen=maxlen)
+    prev_digits = set()
+    out = {"least_seen": [], "most_frequent": [], "pattern": [], "breakout": []}
+    for digit in digits:
+        window.append(int(digit))
+        signals = {
+            "least_seen": strategies.least_seen_digit(window),
+            "most_frequent": strategies.most_frequent_digit(window),
+            "pattern": strategies.detect_pattern(window, pattern_window, pattern_threshold),
+            "breakout": strategies.detect_compression_breakout(window, prev_digits, breakout_window),
+        }
+        for name, value in signals.items():
+            out[name].append(batch_signals.NONE if value is None else value)
+        prev_digits = window.distinct()
+    return {name: np.array(values, dtype=np.int8) for name, values in out.items()}
+
+
+def histories():
+    rng = random.Random(7)
+    uniform = [rng.randrange(10) for _ in range(20000)]
+    # Low-entropy stretches so that patterns, compression and set-order tie-breaks all occur
+    clustered = []
+    while len(clustered) < 20000:
+        alphabet = rng.sample(range(10), rng.choice([1, 2, 3, 3, 4, 10]))
+        clustered += [rng.choice(alphabet) for _ in range(rng.randrange(5, 60))]
+    # 0/8 and 1/9 share a hash slot in small sets, which is where set order is least obvious
+    colliding = [rng.choice([0, 1, 8, 9, rng.randrange(10)]) for _ in range(20000)]
+    return {"uniform": uniform, "clustered": clustered, "colliding": colliding}
+
+
+@pytest.mark.parametrize("name", ["uniform", "clustered", "colliding"])
+@pytest.mark.parametrize("params", [
+    dict(),
+    dict(maxlen=30, pattern_window=8, pattern_threshold=3, breakout_window=6),
+    dict(maxlen=12, pattern_window=15, pattern_threshold=4, breakout_window=20),
+])
+def test_batch_signals_match_scalar(name, params):
+    digits = np.array(histories()[name], dtype=np.uint8)
+    expected = scalar_signals(digits, **params)
+    actual = batch_signals.compute_signals(digits, chunk_size=7919, **params)
+    for signal in expected:
+        mismatches = np.flatnonzero(expected[signal] != actual[signal])
+        assert not len(mismatches), f"{signal} differs first at tick {mismatches[0] if len(mismatches) else None}"
+
+
+def test_clustered_history_exercises_every_signal():
+    digits = np.array(histories()["clustered"], dtype=np.uint8)
+    signals = batch_signals.compute_signals(digits)
+    assert (signals["pattern"] != batch_signals.NONE).any()
+    assert (signals["breakout"] != batch_signals.NONE).any()
@@ -0,0 +1,38 @@
+import asyncio
+import threading
+
+import pytest
+
+from common.client import ClientClosed, DerivClient
+
+
+def test_send_from_another_thread_raises_when_the_queue_is_full():
+    client = DerivClient("ws://unused", on_message=None, outbox_size=1)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        client.loop, client._loop_thread = loop, thread.ident
+        client.outbox = asyncio.Queue(maxsize=1)
+        client.connected = True
+        client.send("first")
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result()  # let the loop enqueue it
+        with pytest.raises(ClientClosed):
+            client.send("second")
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+
+def test_offload_never_blocks_and_keeps_undroppable_jobs():
+    client = DerivClient("ws://unused", on_message=None, offload_size=1)
+    release = threading.Event()
+    ran = []
+    client.offload(release.wait)
+    client.offload(ran.append, "row 1")
+    client.offload(ran.append, "redraw", droppable=True)
+    client.offload(ran.append, "row 2")  # beyond offload_size: queued without blocking
+    release.set()
+    client.drain()
+    assert ran == ["row 1", "row 2"]
+    assert client.dropped_offloads == 1 and client.overflowed_offloads >= 1
@@ -0,0 +1,30 @@
+import json
+import os
+
+from common.codec import Dispatcher, peek_msg_type
+from conftest import ROOT
+
+FIXTURE = os.path.join(ROOT, "test", "fixtures", "messages.jsonl")
+
+
+def test_peek_reads_the_msg_type_of_recorded_messages():
+    with open(FIXTURE) as f:
+        for line in f:
+            if line.strip():
+                assert peek_msg_type(line) == json.loads(line)["msg_type"]
+                assert peek_msg_type(line.encode()) == json.loads(line)["msg_type"]
+
+
+def test_peek_reads_the_top_level_msg_type_when_a_nested_one_follows():
+    raw = json.dumps({"msg_type": "buy", "buy": {"contract_id": 1}, "echo_req": {"note": {"msg_type": "tick"}}})
+    assert peek_msg_type(raw) == "buy"
+    assert peek_msg_type(json.dumps({"data": [{"msg_type": "a"}, {"msg_type": "b"}]})) is None
+    assert peek_msg_type('{"tick": {}}') is None
+
+
+def test_dispatch_routes_by_the_top_level_msg_type():
+    seen = []
+    dispatch = Dispatcher({"buy": lambda client, data: seen.append("buy"),
+                           "tick": lambda client, data: seen.append("tick")})
+    dispatch(None, json.dumps({"msg_type": "buy", "echo_req": {"msg_type": "tick"}}))
+    assert seen == ["buy"]
@@ -0,0 +1,51 @@
+from conftest import Clock
+from contracts import ContractRegistry
+
+
+def test_a_bought_order_moves_from_its_req_id_to_its_contract_id():
+    registry = ContractRegistry(clock=Clock())
+    entry = registry.add_order(1, digit=7, stake=10)
+    assert registry.on_buy(1, 555) is entry
+    assert entry.contract_id == 555 and 1 not in registry.pending and registry.open[555] is entry
+    assert registry.on_buy(1, 556) is None  # answered twice: only the first moves it
+
+
+def test_a_settled_contract_is_forgotten():
+    registry = ContractRegistry(clock=Clock())
+    entry = registry.add_order(1, digit=7, stake=10)
+    registry.on_buy(1, 555)
+    registry.on_subscribed(555, "sub-1")
+    assert registry.settle(555) is entry and entry.subscription_id == "sub-1"
+    assert registry.settle(555) is None and len(registry) == 0
+
+
+def test_entries_expire_after_their_ttl():
+    clock = Clock()
+    registry = ContractRegistry(ttl=60, clock=clock)
+    registry.add_order(1, digit=1, stake=10)
+    registry.on_buy(registry.add_order(2, digit=2, stake=10).req_id, 555)
+    clock.now += 30
+    registry.add_order(3, digit=3, stake=10)
+    assert registry.expire() == []
+    clock.now += 31
+    assert sorted(entry.req_id for entry in registry.expire()) == [1, 2]
+    assert list(registry.pending) == [3] and not registry.open and registry.expired == 2
+
+
+def test_a_restored_order_gets_a_fresh_ttl():
+    clock = Clock()
+    registry = ContractRegistry(ttl=60, clock=clock)
+    registry.add_order(1, digit=1, stake=10)
+    clock.now += 61
+    entry, = registry.expire()
+    registry.restore(entry)
+    clock.now += 59
+    assert registry.expire() == [] and registry.pending[1] is entry
+
+
+def test_the_oldest_entries_are_evicted_beyond_max_entries():
+    registry = ContractRegistry(max_entries=3, clock=Clock())
+    for req_id in range(5):
+        registry.on_buy(registry.add_order(req_id, digit=req_id, stake=10).req_id, 100 + req_id)
+    assert [entry.contract_id for entry in registry.expire()] == [100, 101]
+    assert list(registry.open) == [102, 103, 104]
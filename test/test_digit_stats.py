@@ -0,0 +1,113 @@
+import math
+import random
+from collections import Counter
+from itertools import groupby
+
+import pytest
+
+from common.digit_stats import (ALTERNATING, DEPENDENT, LONG_RUN, LOW_ENTROPY, MIN_PAIRS_PER_CELL, SKEWED, STICKY,
+                                DigitStats, WindowStats)
+
+
+def stream(n, seed=7):
+    """Fair digits with sticky, skewed and alternating stretches, so every flag comes and goes."""
+    rng = random.Random(seed)
+    digits = []
+    while len(digits) < n:
+        kind = rng.choice(["fair", "fair", "sticky", "skewed", "alternating"])
+        for _ in range(rng.randint(20, 300)):
+            if kind == "sticky" and digits and rng.random() < 0.6:
+                digits.append(digits[-1])
+            elif kind == "skewed":
+                digits.append(rng.choice([3, 3, 3, 7] + list(range(10))))
+            elif kind == "alternating" and digits:
+                digits.append(rng.choice([d for d in range(10) if d != digits[-1]]))
+            else:
+                digits.append(rng.randrange(10))
+    return digits[:n]
+
+
+def brute(window, digits):
+    """Every statistic of `window`, recomputed from its digits."""
+    n = len(digits)
+    counts = Counter(digits)
+    pairs = list(zip(digits, digits[1:]))
+    transitions = Counter(pairs)
+    repeats = sum(a == b for a, b in pairs)
+    runs = [len(list(group)) for _, group in groupby(digits)]
+    chi_square = sum((counts[d] - n / 10) ** 2 / (n / 10) for d in range(10))
+    g = 2 * sum(c * math.log(c / (n / 10)) for c in counts.values())
+    z = (repeats - 0.1 * len(pairs)) / math.sqrt(0.09 * len(pairs))
+    transition_chi = sum((transitions[a, b] - len(pairs) / 100) ** 2 / (len(pairs) / 100)
+                         for a in range(10) for b in range(10))
+    flags = set()
+    if n == window.size:
+        if chi_square > window.chi_square_limit:
+            flags.add(SKEWED)
+        if g > window.chi_square_limit:
+            flags.add(LOW_ENTROPY)
+        if z > window.z_limit:
+            flags.add(STICKY)
+        elif z < -window.z_limit:
+            flags.add(ALTERNATING)
+        if len(pairs) / 100 >= MIN_PAIRS_PER_CELL and transition_chi > window.transition_limit:
+            flags.add(DEPENDENT)
+        if max(runs) >= window.long_run:
+            flags.add(LONG_RUN)
+    return {
+        "counts": [counts[d] for d in range(10)],
+        "chi_square": chi_square,
+        "entropy": -sum(c / n * math.log2(c / n) for c in counts.values()),
+        "g": g,
+        "repeat_rate": repeats / len(pairs),
+        "repeat_z": z,
+        "transitions": [[transitions[a, b] for b in range(10)] for a in range(10)],
+        "transition_chi_square": transition_chi,
+        "runs": Counter(runs),
+        "longest_run": max(runs),
+        "flags": frozenset(flags),
+    }
+
+
+def incremental(window):
+    return {
+        "counts": list(window.counts()),
+        "chi_square": window.chi_square(),
+        "entropy": window.entropy(),
+        "g": window.g_statistic(),
+        "repeat_rate": window.repeat_rate(),
+        "repeat_z": window.repeat_z(),
+        "transitions": window.transitions(),
+        "transition_chi_square": window.transition_chi_square(),
+        "runs": window.run_lengths(),
+        "longest_run": window.longest_run(),
+        "flags": window.flags(),
+    }
+
+
+@pytest.mark.parametrize("size", [12, 50, 600])
+def test_incremental_statistics_equal_a_recomputation_after_evictions(size):
+    window = WindowStats(size, alpha=0.001)
+    digits = stream(4 * size + 500)
+    seen = set()
+    for i, digit in enumerate(digits):
+        window.append(digit)
+        if i < 2:
+            continue
+        expected = brute(window, digits[max(0, i + 1 - size):i + 1])
+        actual = incremental(window)
+        for name, value in expected.items():
+            if isinstance(value, float):
+                assert actual[name] == pytest.approx(value, rel=1e-9, abs=1e-9), (i, name)
+            else:
+                assert actual[name] == value, (i, name)
+        assert window.has_edge() == bool(actual["flags"])
+        seen |= actual["flags"]
+    assert {SKEWED, STICKY, LONG_RUN} <= seen  # the stream exercised the flags, not just the noise
+
+
+def test_digit_stats_combines_its_windows():
+    stats = DigitStats(windows=(12, 50), alpha=0.01)
+    stats.extend([4] * 60)
+    assert set(stats.regime()) == {12, 50} and LONG_RUN in stats.regime()[12] and stats.has_edge()
+    assert "long_run@12" in stats.describe()
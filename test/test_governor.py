@@ -0,0 +1,106 @@
+from common.governor import OrderGovernor, TokenBucket, SENT, QUEUED, MERGED, DROPPED
+from conftest import Clock
+
+
+def test_a_bucket_refills_at_its_rate_up_to_its_burst():
+    clock = Clock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+    for _ in range(3):
+        assert bucket.available()
+        bucket.take()
+    assert not bucket.available()
+    clock.now += 0.5
+    assert bucket.available() and not bucket.available(cost=2)
+    clock.now += 10
+    assert bucket.available(cost=3) and not bucket.available(cost=3.5)
+
+
+def test_lanes_drain_highest_priority_first():
+    clock = Clock()
+    governor = OrderGovernor(rate=1, burst=1, max_wait=100, clock=clock)
+    sent = []
+    governor.submit(lambda: sent.append("first"))
+    for lane in ("quote", "coverage", "trade", "settlement", "hedge"):
+        assert governor.submit(lambda lane=lane: sent.append(lane), lane=lane) == QUEUED
+    for _ in range(5):
+        clock.now += 1
+        governor.pump()
+    assert sent == ["first", "hedge", "settlement", "trade", "coverage", "quote"]
+
+
+def test_a_waiting_lane_is_not_overtaken_by_a_cheaper_send_in_a_lower_one():
+    clock = Clock()
+    governor = OrderGovernor(rate=1, burst=2, clock=clock)
+    sent = []
+    governor.submit(lambda: sent.append("first"))
+    assert governor.submit(lambda: sent.append("hedge"), lane="hedge", cost=2) == QUEUED
+    assert governor.submit(lambda: sent.append("trade")) == QUEUED  # one token left, but the hedge waits for two
+    clock.now += 1
+    governor.pump()
+    clock.now += 1
+    governor.pump()
+    assert sent == ["first", "hedge", "trade"]
+
+
+def test_a_duplicate_merges_into_the_queued_send_and_promotes_it():
+    clock = Clock()
+    governor = OrderGovernor(rate=1, burst=1, max_wait=100, clock=clock)
+    sent = []
+    governor.submit(lambda: sent.append("first"))
+    governor.submit(lambda: sent.append("trade"))
+    governor.submit(lambda: sent.append("digit 7"), lane="coverage", key=7)
+    assert governor.submit(lambda: sent.append("digit 7 again"), lane="hedge", key=7) == MERGED
+    for _ in range(2):
+        clock.now += 1
+        governor.pump()
+    assert sent == ["first", "digit 7", "trade"] and governor.merged == 1
+
+
+def test_a_send_waiting_past_max_wait_is_dropped():
+    clock = Clock()
+    governor = OrderGovernor(rate=1, burst=1, max_wait=2, clock=clock)
+    sent = []
+    governor.submit(lambda: sent.append("first"))
+    governor.submit(lambda: sent.append("stale"))
+    governor.submit(lambda: sent.append("patient"), max_wait=10)
+    clock.now += 3
+    governor.pump()
+    assert sent == ["first", "patient"] and governor.dropped == 1 and not governor.queued
+
+
+def test_a_replacing_send_takes_the_queued_ones_place():
+    clock = Clock()
+    governor = OrderGovernor(rate=1, burst=2, clock=clock)
+    sent = []
+    assert governor.submit(lambda: sent.append((1, 2)), lane="hedge", key="hedge", cost=2, replace=True) == SENT
+    assert governor.submit(lambda: sent.append((3, 4)), lane="hedge", key="hedge", cost=2, replace=True) == QUEUED
+    assert governor.submit(lambda: sent.append((5, 6)), lane="hedge", key="hedge", cost=2, replace=True) == MERGED
+    clock.now += 2
+    governor.pump()
+    assert sent == [(1, 2), (5, 6)] and not governor.queued
+
+
+def test_a_cancelled_send_is_never_sent():
+    clock = Clock()
+    governor = OrderGovernor(rate=1, burst=1, clock=clock)
+    sent = []
+    governor.submit(lambda: sent.append(1), key=1)
+    assert governor.submit(lambda: sent.append(2), key=2) == QUEUED
+    assert governor.cancel(2) and not governor.cancel(2)
+    clock.now += 2
+    governor.pump()
+    assert sent == [1] and not governor.queued
+
+
+def test_a_full_queue_refuses_orders_but_not_settlement_subscriptions():
+    clock = Clock()
+    governor = OrderGovernor(rate=1, burst=1, max_queued=1, clock=clock)
+    sent = []
+    governor.submit(lambda: sent.append("buy 1"))
+    assert governor.submit(lambda: sent.append("buy 2")) == QUEUED
+    assert governor.submit(lambda: sent.append("buy 3")) == DROPPED
+    assert governor.submit(lambda: sent.append("subscribe"), lane="settlement", max_wait=float("inf")) == QUEUED
+    for _ in range(2):
+        clock.now += 1
+        governor.pump()
+    assert sent == ["buy 1", "subscribe", "buy 2"]
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import common.host
+from common.host import StrategyHost, load_script
+from common.ticks import last_digit
+from conftest import ROOT, SYMBOL, stub
+
+
+def host_with(monkeypatch, tmp_path, *scripts):
+    """A shared StrategyHost over one authorised Loopback connection, running `scripts` as plug-ins."""
+    monkeypatch.chdir(tmp_path)  # the plug-ins' trade logs
+    server, client = stub()
+    host = StrategyHost("ws://offline", "token", shared=True)
+    host.client = client  # plug-in traders send through host.client
+    client.dispatch = host.dispatch
+    plugins = [host.add(load_script(os.path.join(ROOT, script)).create_plugin) for script in scripts]
+    host.on_open(client)
+    client.deliver()
+    return server, client, host, plugins
+
+
+def test_each_tick_is_decoded_once_and_reaches_every_plugin(monkeypatch, tmp_path):
+    decoded = []
+    monkeypatch.setattr(common.host, "last_digit", lambda quote: decoded.append(quote) or last_digit(quote))
+    server, client, host, (digits, hedge) = host_with(monkeypatch, tmp_path, "digit_matches/match_bot.py",
+                                                      "hedge/md_hedge_bot.py")
+    assert list(client.session.tick_subs) == [SYMBOL]  # one subscription for both
+    for _ in range(3):
+        client.tick(SYMBOL)
+    assert len(decoded) == 4  # the subscribe response's tick, then three more
+    assert list(digits.strategy.tick_buffer) == list(hedge.tick_buffer) == [last_digit(q) for q in decoded]
+    assert digits.trader.requests is hedge.trader.requests and digits.trader.governor is hedge.trader.governor
+    host.close()
+
+
+def test_plugins_from_different_folders_keep_their_own_config_and_trader(monkeypatch, tmp_path):
+    before = sys.modules.get("config")
+    server, client, host, (digits, hedge) = host_with(monkeypatch, tmp_path, "digit_matches/match_bot.py",
+                                                      "hedge/md_hedge_bot.py")
+    assert sys.modules.get("config") is before  # the test's own flat imports are left alone
+    for plugin, folder, stake in ((digits, "digit_matches", 300), (hedge, "hedge", 3000)):
+        init = type(plugin.trader).__init__
+        assert init.__code__.co_filename == os.path.join(ROOT, folder, "trader.py")
+        assert init.__globals__["STAKE_AMOUNT"] == stake  # from that folder's config.py
+    host.close()
+
+
+def test_plugins_keep_separate_budgets_and_stats(monkeypatch, tmp_path):
+    server, client, host, (consensus, mid) = host_with(monkeypatch, tmp_path, "digit_matches/match_bot.py",
+                                                       "digit_matches/match_bot_mid.py")
+    assert consensus.trader.budget is not mid.trader.budget
+    mid.trader.place_match_trade(3)
+    client.deliver()
+    assert mid.trader.budget.snapshot()["open_stake"] == mid.trader.current_stake
+    assert consensus.trader.budget.snapshot()["open_stake"] == 0
+    assert (mid.stats()["open"], consensus.stats()["open"]) == (1, 0)
+    assert os.path.exists(tmp_path / "trade_log_consensus.csv") and os.path.exists(tmp_path / "trade_log_mid.csv")
+    host.close()
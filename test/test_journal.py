@@ -0,0 +1,77 @@
+import csv
+import os
+import time
+
+import pytest
+
+import common.journal
+from common.journal import CSV_HEADER, MAGIC, RECORD, TradeJournal, read_binary_journal
+
+
+def eventually(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_a_full_batch_is_written_without_waiting_for_the_interval(tmp_path):
+    journal = TradeJournal(str(tmp_path / "log.csv"), flush_size=3, flush_interval=60)
+    journal.record(1_700_000_000, 3, 1.0, "pending", 0)
+    journal.record(1_700_000_001, 3, 1.0, "win", 8.5)
+    time.sleep(0.05)
+    assert journal.written == 0
+    journal.record(1_700_000_002, 4, 1.0, "pending", 0)
+    assert eventually(lambda: journal.written == 3)
+    journal.close()
+
+
+def test_a_partial_batch_is_written_after_the_interval(tmp_path):
+    journal = TradeJournal(str(tmp_path / "log.csv"), flush_size=1000, flush_interval=0.05)
+    journal.record(1_700_000_000, 3, 1.0, "pending", 0)
+    assert eventually(lambda: journal.written == 1)
+    journal.close()
+
+
+def test_close_writes_the_rest_and_fsyncs(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(common.journal.os, "fsync", synced.append)
+    path = str(tmp_path / "log.csv")
+    journal = TradeJournal(path, flush_size=1000, flush_interval=60)
+    for i in range(5):
+        journal.record(1_700_000_000 + i, i, 2.5, "loss", -2.5)
+    fileno = journal._file.fileno()
+    journal.close()
+    journal.close()
+    assert synced == [fileno] and journal.written == 5
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == CSV_HEADER and [row[1] for row in rows[1:]] == ["0", "1", "2", "3", "4"]
+    with pytest.raises(ValueError):
+        journal.record(1_700_000_005, 5, 2.5, "pending", 0)
+
+
+def test_binary_records_round_trip_and_reopening_appends(tmp_path):
+    path = str(tmp_path / "log.bin")
+    rows = [(1_700_000_000.5, 3, 1.25, "pending", 0.0), (1_700_000_001.0, None, 1.25, "win", 10.5),
+            (1_700_000_002.0, 9, 300.0, "loss", -300.0)]
+    journal = TradeJournal(path, fmt="binary")
+    for row in rows[:2]:
+        journal.record(*row)
+    journal.close()
+    journal = TradeJournal(path, fmt="binary")
+    journal.record(*rows[2])
+    journal.close()
+    assert os.path.getsize(path) == len(MAGIC) + 3 * RECORD.size
+    assert list(read_binary_journal(path)) == rows
+
+
+def test_unknown_formats_and_foreign_files_are_refused(tmp_path):
+    with pytest.raises(ValueError):
+        TradeJournal(str(tmp_path / "log.json"), fmt="json")
+    path = tmp_path / "log.csv"
+    path.write_text("Timestamp,Digit\n")
+    with pytest.raises(ValueError):
+        list(read_binary_journal(str(path)))
@@ -0,0 +1,96 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from common.host import load_script
+from common.legs import LegOrderBook
+from common.rpc import RequestLayer
+from conftest import Clock, ROOT
+
+
+def book(orphan_action, window=100):
+    sent = []
+    clock = Clock()
+    requests = RequestLayer(lambda message: sent.append(json.loads(message)), window=window, timeout=5, clock=clock)
+    orphans = []
+    return LegOrderBook(requests, orphan_action, on_orphan=orphans.append, clock=clock), requests, sent, orphans
+
+
+def submit(legs):
+    ids = [legs.requests.next_id() for _ in range(2)]
+    return legs.submit([(name, req_id, json.dumps({"buy": 1, "req_id": req_id}), 10)
+                        for name, req_id in zip(("DIFFERS 3", "MATCHES 7"), ids)]), ids
+
+
+def filled(req_id, contract_id):
+    return {"req_id": req_id, "msg_type": "buy", "buy": {"contract_id": contract_id}}
+
+
+def test_both_legs_filling_fills_the_order():
+    legs, requests, sent, orphans = book("sell")
+    order, (first, second) = submit(legs)
+    requests.resolve(filled(first, 11))
+    assert order.status == "pending"
+    requests.resolve(filled(second, 12))
+    assert order.status == "filled" and legs.filled == 1 and not legs.orders
+    assert len(sent) == 2 and orphans == []
+
+
+@pytest.mark.parametrize("action, unwind", [("sell", {"sell": 11, "price": 0}), ("cancel", {"cancel": 11})])
+def test_a_one_sided_fill_unwinds_the_filled_leg(action, unwind):
+    legs, requests, sent, orphans = book(action)
+    order, (first, second) = submit(legs)
+    requests.resolve(filled(first, 11))
+    requests.resolve({"req_id": second, "msg_type": "buy", "error": {"code": "PriceMoved", "message": "moved"}})
+    assert order.status == "orphaned" and legs.orphaned == 1 and orphans == [order]
+    assert [leg.name for leg in order.orphans] == ["DIFFERS 3"]
+    request = dict(sent[-1])
+    assert request.pop("req_id") in requests.pending and request == unwind
+
+
+def test_a_leg_that_times_out_orphans_the_other():
+    legs, requests, sent, orphans = book("sell")
+    order, (first, second) = submit(legs)
+    requests.resolve(filled(first, 11))
+    requests.clock.now += 5
+    requests.expire()
+    assert order.status == "orphaned" and order.legs[1].error == "No response in time"
+    assert sent[-1]["sell"] == 11
+
+
+def test_alert_leaves_the_orphan_open():
+    legs, requests, sent, orphans = book("alert")
+    order, (first, second) = submit(legs)
+    requests.resolve(filled(first, 11))
+    requests.fail_all()
+    assert order.status == "orphaned" and orphans == [order] and len(sent) == 2
+
+
+def test_a_leg_the_window_refuses_is_failed_at_once():
+    legs, requests, sent, orphans = book("cancel", window=1)
+    order, (first, second) = submit(legs)
+    assert order.legs[1].error.startswith("send failed") and len(sent) == 1
+    requests.resolve(filled(first, 11))
+    assert order.status == "orphaned" and sent[-1]["cancel"] == 11
+
+
+def test_no_leg_filling_fails_the_order_without_unwinding():
+    legs, requests, sent, orphans = book("sell")
+    order, _ = submit(legs)
+    requests.fail_all()
+    assert order.status == "failed" and legs.failed == 1 and orphans == [] and len(sent) == 2
+
+
+def test_a_hedge_leg_times_out_on_the_tick_path_without_further_traffic():
+    hedge = load_script(os.path.join(ROOT, "hedge", "md_hedge_bot.py"))
+    sent = []
+    clock = Clock()
+    trader = hedge.Trader(SimpleNamespace(send=lambda message: sent.append(json.loads(message))), clock=clock)
+    trader.account_type = "demo"
+    order = trader.place_hedge(3, 10, 7, 1)
+    trader.requests.resolve(filled(sent[0]["req_id"], 11))
+    clock.now += trader.legs.timeout
+    trader.pump()
+    assert order.status == "orphaned" and order.legs[1].error == "No response in time"
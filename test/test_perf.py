@@ -0,0 +1,372 @@
+"""Offline benchmarks of the trading hot paths, checked against test/perf_baseline.json.
+
+Each case drives one hot path with the messages recorded in
+test/fixtures/messages.jsonl (an authorize, a balance and 1000 ticks from
+common/stub_server.py) and times every operation. A case fails when its
+throughput falls more than THROUGHPUT_TOLERANCE below the baseline or its
+p99 latency grows more than P99_TOLERANCE above it. Baseline numbers are
+scaled by a pure-Python calibration loop timed on the machine running the
+checks, so a baseline saved on one machine roughly carries over to another.
+Timings depend on whatever else the machine is doing, so the checks are
+marked `perf` and skipped in a plain test run unless PERF=1 is set.
+
+    PERF=1 python -m pytest test/test_perf.py   # the regression checks
+    python test/test_perf.py                    # results against the baseline
+    python test/test_perf.py --save             # write a new baseline after an intended change
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+import timeit
+from collections import deque
+
+import pytest
+
+from conftest import ROOT
+import strategies
+from config import PAYOUTS
+from consensus import ConsensusStrategy
+from trader import Trader
+from window import DigitWindow
+from common.codec import dumps
+from common.digit_stats import DigitStats
+from common.governor import OrderGovernor
+from common.host import StrategyHost, load_script
+from common.settlement import ReplayClock, SimulatedExchange
+from common.ticks import last_digit
+
+FIXTURE = os.path.join(ROOT, "test", "fixtures", "messages.jsonl")
+BASELINE = os.path.join(ROOT, "test", "perf_baseline.json")
+THROUGHPUT_TOLERANCE = float(os.getenv("PERF_THROUGHPUT_TOLERANCE", 0.30))
+P99_TOLERANCE = float(os.getenv("PERF_P99_TOLERANCE", 0.50))
+ROUNDS = 3
+pytestmark = [pytest.mark.perf, pytest.mark.skipif(os.getenv("PERF") != "1", reason="timing checks; set PERF=1 to run")]
+RETRIES = 1  # fresh measurements (and calibrations) before a case is reported as regressed
+PENDING_DEPTH = 10000  # coverage trades queued in the Trader.tick case
+DEMO_AUTHORIZE = {"authorize": {"loginid": "VRTC0000000"}}
+
+with open(FIXTURE) as f:
+    MESSAGES = [line.rstrip("\n") for line in f if line.strip()]
+TICK_MESSAGES = [raw for raw in MESSAGES if json.loads(raw)["msg_type"] == "tick"]
+SESSION_MESSAGES = [raw for raw in MESSAGES if raw not in TICK_MESSAGES]  # authorize, balance
+TICKS = [json.loads(raw)["tick"] for raw in TICK_MESSAGES]
+DIGITS = [last_digit(tick["quote"]) for tick in TICKS]
+
+# The hedge folder has its own flat `config` and `trader` modules
+HEDGE = load_script(os.path.join(ROOT, "hedge", "md_hedge_bot.py"))
+
+CASES = {}  # name -> (setup(stack, workdir) -> op(i), operations per round)
+
+
+def case(ops):
+    def register(setup):
+        CASES[setup.__name__] = (setup, ops)
+        return setup
+    return register
+
+
+class _Snapshots:
+    """Dashboard stand-in keeping the last snapshot; rendering happens off the message path."""
+
+    snapshot = None
+
+    def update(self, snapshot):
+        self.snapshot = snapshot
+
+    def stop(self):
+        pass
+
+
+def _quiet(stack):
+    # Bots print on their message path; the cost of print stays in, the terminal output does not
+    stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+
+
+def _status_trader():
+    trader = Trader(None, trade_log=None, headless=True)
+    for i in range(200):
+        trader.log_trade(DIGITS[i], 10.0, "win" if i % 9 == 0 else "loss", 80.0 if i % 9 == 0 else -10.0,
+                         ["pattern", "least_seen"])
+    trader.trade_count = 201
+    trader.dashboard = _Snapshots()
+    return trader
+
+
+@case(ops=5000)
+def selectors(stack, workdir):
+    window = DigitWindow(maxlen=100)
+    prev_digits = set()
+
+    def op(i):
+        nonlocal prev_digits
+        window.append(DIGITS[i % len(DIGITS)])
+        strategies.least_seen_digit(window)
+        strategies.most_frequent_digit(window)
+        strategies.detect_pattern(window, 10, 5)
+        strategies.detect_compression_breakout(window, prev_digits, 10)
+        prev_digits = window.distinct()
+    return op
+
+
+@case(ops=5000)
+def select_digit(stack, workdir):
+    strategy = ConsensusStrategy(Trader(None, trade_log=None, headless=True), regime_filter=False)  # always vote
+    strategy.warm_start(DIGITS[:100])
+
+    def op(i):
+        strategy.tick_buffer.append(DIGITS[i % len(DIGITS)])
+        strategy.select_digit()
+    return op
+
+
+@case(ops=20000)
+def digit_stats(stack, workdir):
+    stats = DigitStats()
+    stats.extend(DIGITS)
+
+    def op(i):
+        stats.append(DIGITS[i % len(DIGITS)])
+        stats.has_edge()
+    return op
+
+
+@case(ops=1500)
+def trader_tick(stack, workdir):
+    clock = ReplayClock(TICKS[0]["epoch"])
+    exchange = SimulatedExchange(PAYOUTS, balance=1e9)
+    trader = Trader(exchange, clock=clock, trade_log=None, headless=True,
+                    governor=OrderGovernor(1e6, 1e6, clock=clock))
+    trader.max_consecutive_losses = float("inf")  # keep every due trade firing
+    exchange.on_buy = trader.requests.resolve
+    exchange.on_settle = lambda contract: trader.handle_contract_update({"proposal_open_contract": contract})
+    trader.set_account_type(DEMO_AUTHORIZE)
+    trader.balance = exchange.balance
+    for n in range(PENDING_DEPTH):  # one coverage trade due on each of the next PENDING_DEPTH ticks
+        trader.fire_coverage_trades(DIGITS[n % len(DIGITS)], [n + 1])
+
+    def op(i):
+        clock.now += 1
+        exchange.on_tick(clock.now, TICKS[i % len(TICKS)]["quote"])
+        trader.tick()
+        trader.fire_coverage_trades(DIGITS[i % len(DIGITS)], [PENDING_DEPTH])
+    return op
+
+
+@case(ops=10000)
+def log_trade(stack, workdir):
+    trader = Trader(None, trade_log=os.path.join(workdir, "trade_log.csv"), headless=True)
+    stack.callback(trader.close)
+    rows = [("pending", 0), ("loss", -10.0), ("pending", 0), ("win", 80.0)]
+
+    def op(i):
+        outcome, profit = rows[i % len(rows)]
+        trader.log_trade(DIGITS[i % len(DIGITS)], 10.0, outcome, profit, ["pattern", "least_seen"])
+    return op
+
+
+@case(ops=20000)
+def display_status(stack, workdir):
+    trader = _status_trader()
+    votes = [(3, 0.2), (3, 0.4), (7, 0.3)]
+    voted = ["pattern", "most_frequent", "least_seen"]
+
+    def op(i):
+        trader.display_status(3, voted, votes)
+    return op
+
+
+@case(ops=50000)
+def digit_payload(stack, workdir):
+    template = Trader(None, trade_log=None, headless=True)._buy_template
+
+    def op(i):
+        template.render(i, 12.34, DIGITS[i % len(DIGITS)])
+    return op
+
+
+@case(ops=30000)
+def hedge_payload(stack, workdir):
+    trader = HEDGE.Trader(None)
+    differs, matches = HEDGE.MatchDifferHedgeStrategy(trader).calculate_stakes()
+
+    def op(i):
+        trader._differs_template.render(2 * i, differs, DIGITS[i % len(DIGITS)])
+        trader._matches_template.render(2 * i + 1, matches, DIGITS[(i + 1) % len(DIGITS)])
+    return op
+
+
+@case(ops=1500)
+def hedge_execute(stack, workdir):
+    _quiet(stack)
+    random.seed(0)
+    clock = ReplayClock(TICKS[0]["epoch"])
+    exchange = SimulatedExchange(PAYOUTS, balance=1e9)
+    trader = HEDGE.Trader(exchange, clock=clock)
+    trader.account_type = "demo"
+    exchange.on_buy = trader.requests.resolve
+    strategy = HEDGE.MatchDifferHedgeStrategy(trader, clock=clock, regime_filter=False)  # trade every cycle
+    buffer = deque(DIGITS[:100], maxlen=100)
+
+    def op(i):
+        clock.now += strategy.wait_ticks * strategy.tick_duration
+        buffer.append(DIGITS[i % len(DIGITS)])
+        strategy.execute(buffer)
+        exchange.on_tick(clock.now, TICKS[i % len(TICKS)]["quote"])
+    return op
+
+
+@case(ops=2000)
+def dispatch(stack, workdir):
+    _quiet(stack)
+    cwd = os.getcwd()
+    os.chdir(workdir)  # the plug-ins' trade logs
+    stack.callback(os.chdir, cwd)
+    host = StrategyHost("ws://offline", "token", shared=True)
+    exchange = host.client = SimulatedExchange(PAYOUTS, balance=1e9)  # plug-in traders send through host.client
+    for script in ("digit_matches/match_bot.py", "hedge/md_hedge_bot.py"):
+        host.add(load_script(os.path.join(ROOT, script)).create_plugin)
+    stack.callback(host.close)
+    exchange.on_buy = lambda data: host.dispatch(exchange, dumps(data))
+    exchange.on_settle = lambda contract: host.dispatch(
+        exchange, dumps({"msg_type": "proposal_open_contract", "proposal_open_contract": contract}))
+    for raw in SESSION_MESSAGES:
+        host.dispatch(exchange, raw)
+
+    def op(i):
+        tick = TICKS[i % len(TICKS)]
+        host.dispatch(exchange, TICK_MESSAGES[i % len(TICK_MESSAGES)])
+        exchange.on_tick(tick["epoch"], tick["quote"])
+    return op
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def measure(name):
+    """Best of ROUNDS runs of a case: {"ops_per_sec", "p50_us", "p99_us"}."""
+    setup, ops = CASES[name]
+    clock = time.perf_counter_ns
+    rounds = []
+    with contextlib.ExitStack() as stack:
+        op = setup(stack, stack.enter_context(tempfile.TemporaryDirectory()))
+        for i in range(max(ops // 10, 10)):  # warm-up
+            op(i)
+        for _ in range(ROUNDS):
+            gc.collect()
+            gc.disable()  # as timeit does: collector pauses land on whichever op triggers them
+            latencies = []
+            try:
+                started = clock()
+                for i in range(ops):
+                    t = clock()
+                    op(i)
+                    latencies.append(clock() - t)
+                elapsed = clock() - started
+            finally:
+                gc.enable()
+            latencies.sort()
+            rounds.append((ops / elapsed * 1e9, _percentile(latencies, 50) / 1e3, _percentile(latencies, 99) / 1e3))
+    return {"ops_per_sec": round(max(r[0] for r in rounds), 1),
+            "p50_us": round(min(r[1] for r in rounds), 2),
+            "p99_us": round(min(r[2] for r in rounds), 2)}
+
+
+def calibrate():
+    """Passes per second of a fixed pure-Python loop, the yardstick baselines are scaled by."""
+    def loop():
+        counts = {}
+        for i in range(20000):
+            counts[i % 97] = counts.get(i % 97, 0) + i
+        return sorted(counts.values())
+    return round(10 / min(timeit.repeat(loop, number=10, repeat=5)), 2)
+
+
+def load_baseline(path=BASELINE):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def limits(expected, speed):
+    """(lowest ops/s, highest p99 µs) a case may show on a machine `speed` times the baseline's."""
+    return (expected["ops_per_sec"] * speed * (1 - THROUGHPUT_TOLERANCE),
+            expected["p99_us"] / speed * (1 + P99_TOLERANCE))
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    data = load_baseline()
+    if data is None:
+        pytest.skip("no test/perf_baseline.json; run python test/test_perf.py --save")
+    return data
+
+
+def check(name, expected, calibration):
+    """Error message if case `name` falls outside the baseline's limits, else None."""
+    min_ops, max_p99 = limits(expected, calibrate() / calibration)
+    result = measure(name)
+    if result["ops_per_sec"] < min_ops:
+        return f"{name}: {result['ops_per_sec']:.0f} ops/s, expected >= {min_ops:.0f}"
+    if result["p99_us"] > max_p99:
+        return f"{name}: p99 {result['p99_us']:.1f}µs, expected <= {max_p99:.1f}µs"
+    return None
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_no_regression(name, baseline):
+    expected = baseline["cases"].get(name)
+    if expected is None:
+        pytest.skip(f"{name} has no baseline yet")
+    # A regression shows up every time; a busy neighbour on a shared machine rarely twice in a row
+    failures = []
+    for _ in range(RETRIES + 1):
+        failure = check(name, expected, baseline["calibration"])
+        if failure is None:
+            return
+        failures.append(failure)
+    pytest.fail("; ".join(failures))
+
+
+def main():
+    from tabulate import tabulate
+
+    parser = argparse.ArgumentParser(description="Benchmark the trading hot paths against the saved baseline.")
+    parser.add_argument("--case", action="append", choices=list(CASES), help="Run only these cases (repeatable)")
+    parser.add_argument("--save", action="store_true", help=f"Write the results to {os.path.relpath(BASELINE, ROOT)}")
+    args = parser.parse_args()
+
+    calibration = calibrate()
+    baseline = load_baseline()
+    speed = calibration / baseline["calibration"] if baseline else None
+    results, rows = {}, []
+    for name in args.case or CASES:
+        result = results[name] = measure(name)
+        row = [name, result["ops_per_sec"], result["p50_us"], result["p99_us"]]
+        expected = (baseline or {}).get("cases", {}).get(name)
+        if expected:
+            min_ops, max_p99 = limits(expected, speed)
+            ok = result["ops_per_sec"] >= min_ops and result["p99_us"] <= max_p99
+            row += [f"{result['ops_per_sec'] / (expected['ops_per_sec'] * speed):.2f}x", "ok" if ok else "REGRESSED"]
+        rows.append(row)
+    print(tabulate(rows, headers=["case", "ops/s", "p50 µs", "p99 µs", "vs baseline", ""], tablefmt="fancy_grid",
+                   floatfmt=".1f"))
+    print(f"Calibration: {calibration:.1f} loops/s" + (f" ({speed:.2f}x the baseline machine)" if speed else ""))
+    if args.save:
+        cases = dict((baseline or {}).get("cases", {}), **results)
+        with open(BASELINE, "w") as f:
+            json.dump({"calibration": calibration, "python": platform.python_version(), "machine": platform.machine(),
+                       "saved": time.strftime("%Y-%m-%d %H:%M:%S"), "cases": cases}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+from trader import Trader
+from common.codec import Dispatcher, order_template, proposal_buy
+from common.governor import OrderGovernor
+from common.proposals import ProposalCache
+from common.rpc import RequestLayer
+from conftest import Clock, SYMBOL, stub
+
+MATCH = order_template(SYMBOL, "DIGITMATCH")
+
+
+def connect(max_subscriptions=5, stake_tolerance=0.0):
+    server, client = stub()
+    requests = RequestLayer(client.send)
+    proposals = ProposalCache(requests, client.send, max_subscriptions, max_age=60, stake_tolerance=stake_tolerance)
+    client.dispatch = Dispatcher({"proposal": lambda c, data: proposals.on_proposal(data)}, requests=requests)
+    return server, client, requests, proposals
+
+
+def test_buy_by_proposal_id_at_the_quoted_payout():
+    server, client, requests, proposals = connect()
+    proposals.watch(MATCH, range(3), 10)
+    client.deliver()
+    quote = proposals.take(MATCH, 2, 10)
+    assert quote is not None and quote.payout == 90.0 and proposals.payout_rate(MATCH, 2) == 8.0
+    assert proposals.take(MATCH, 2, 10) is None  # each id buys once
+
+    responses = []
+    req_id = requests.next_id()
+    requests.send(proposal_buy(req_id, quote.id, quote.ask_price), req_id, "buy", responses.append)
+    client.deliver()
+    assert responses[0]["buy"]["payout"] == quote.payout
+    assert server.contracts[responses[0]["buy"]["contract_id"]]["barrier"] == "2"
+
+    req_id = requests.next_id()
+    requests.send(proposal_buy(req_id, quote.id, quote.ask_price), req_id, "buy", responses.append)
+    client.deliver()
+    assert responses[1]["error"]["code"] == "InvalidContractProposal"
+
+    client.tick(SYMBOL)  # re-priced under a new id
+    fresh = proposals.take(MATCH, 2, 10)
+    assert fresh is not None and fresh.id != quote.id
+
+
+def test_subscriptions_stay_under_the_limit():
+    server, client, requests, proposals = connect(max_subscriptions=2)
+    proposals.watch(MATCH, range(4), 10)
+    client.deliver()  # subscriptions evicted while opening are forgotten as they answer
+    assert len(client.session.proposal_subs) == 2
+    assert proposals.take(MATCH, 0, 10) is None
+    assert proposals.take(MATCH, 3, 10) is not None
+
+    client.reconnect()
+    proposals.resubscribe()
+    client.deliver()
+    assert len(client.session.proposal_subs) == 2 and proposals.stats()["subscriptions"] == 2
+    assert proposals.take(MATCH, 3, 10) is not None
+
+
+def test_stake_tolerance():
+    server, client, requests, proposals = connect(stake_tolerance=0.02)
+    proposals.watch(MATCH, [5], 100)
+    client.deliver()
+    assert proposals.take(MATCH, 5, 110) is None  # outside the tolerance: watched at 110 for next time
+    quote = proposals.take(MATCH, 5, 101)
+    assert quote is not None and quote.stake == 100
+    client.deliver()
+    assert proposals.take(MATCH, 5, 110).stake == 110
+
+
+def test_trader_buys_by_proposal_id_on_the_digits_it_wants():
+    server, client, requests, proposals = connect()
+    trader = Trader(client, trade_log=None, headless=True, requests=requests, proposals=proposals)
+    trader.balance = server.balance
+    trader.set_account_type({"authorize": {"loginid": "VRTC0000001"}}, subscribe_balance=False, subscribe_ticks=False)
+    client.deliver()  # digits 0-4 quoted: the cache holds 5 subscriptions
+    assert len(client.session.proposal_subs) == 5
+    trader.place_match_trade(4)
+    client.deliver()
+    trader.place_match_trade(7)  # a miss: bought with parameters, and watched instead of the least recently used
+    client.deliver()
+    assert server.buys == 2 and proposals.hits == 1 and proposals.misses == 1
+    assert len(trader.contracts.open) == 2 and len(client.session.proposal_subs) == 5
+
+
+def test_the_accounts_limit_sizes_the_wanted_set():
+    server, client, requests, proposals = connect()
+    server.max_proposal_subscriptions = 8
+    proposals.want(MATCH, range(10), 10)
+    client.deliver()
+    assert len(client.session.proposal_subs) == 5  # the configured limit, until the server reports its own
+    client.reconnect()
+    proposals.resubscribe()
+    client.deliver()
+    assert proposals.max_subscriptions == 8 and len(client.session.proposal_subs) == 8
+
+    proposals.want(MATCH, range(10), 20)  # a new stake replaces the old contracts
+    client.deliver()
+    assert len(client.session.proposal_subs) == 8
+    assert all(request["amount"] == 20 for request, _ in client.session.proposal_subs.values())
+
+
+def test_subscriptions_wait_for_the_order_governor():
+    clock = Clock()
+    server, client = stub()
+    requests = RequestLayer(client.send)
+    governor = OrderGovernor(rate=1, burst=2, clock=clock)
+    proposals = ProposalCache(requests, client.send, max_subscriptions=4, governor=governor)
+    client.dispatch = Dispatcher({"proposal": lambda c, data: proposals.on_proposal(data)}, requests=requests)
+    proposals.want(MATCH, range(4), 10)
+    client.deliver()
+    assert len(client.session.proposal_subs) == 2 and governor.queued == 2
+    clock.now += 2
+    governor.pump()
+    client.deliver()
+    assert len(client.session.proposal_subs) == 4 and proposals.stats()["subscriptions"] == 4
+
+
+def test_a_new_stake_replaces_the_queued_subscribes():
+    clock = Clock()
+    server, client = stub()
+    requests = RequestLayer(client.send)
+    governor = OrderGovernor(rate=1, burst=2, clock=clock)
+    proposals = ProposalCache(requests, client.send, max_subscriptions=4, governor=governor)
+    client.dispatch = Dispatcher({"proposal": lambda c, data: proposals.on_proposal(data)}, requests=requests)
+    proposals.want(MATCH, range(4), 10)
+    client.deliver()
+    proposals.want(MATCH, range(4), 20)
+    assert governor.queued == 4  # 2 forgets and 2 subscribes at the new stake; the old ones were cancelled
+    for _ in range(6):
+        clock.now += 1
+        governor.pump()
+        client.deliver()
+    assert len(client.session.proposal_subs) == 4
+    assert sorted(entry.stake for entry in proposals._entries.values()) == [20] * 4
+    assert proposals.stats()["subscriptions"] == 4
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+import risk_sim
+import trader as trader_module
+from trader import Trader
+from common.risk_sim import Policy, simulate
+
+BALANCES = np.concatenate([[-50.0, 0.0, 0.01], np.linspace(1, 30000, 2999), np.arange(499.0, 501.0, 0.125)])
+
+
+def flat_stake(balances):
+    return np.full(np.shape(balances), 10.0)
+
+
+@pytest.mark.parametrize("mode", ["dynamic", "constant"])
+def test_match_stake_is_the_traders_stake(monkeypatch, mode):
+    monkeypatch.setattr(trader_module, "STAKING_MODE", mode)
+    monkeypatch.setattr(risk_sim, "STAKING_MODE", mode)
+    trader = Trader(None, trade_log=None, headless=True)
+    expected = []
+    for balance in BALANCES:
+        trader.balance = balance
+        expected.append(trader.calculate_stake())
+    assert risk_sim.match_stake(BALANCES).tolist() == expected
+
+
+def test_mean_profit_matches_the_analytic_expectation():
+    # 10 per trade, winning 8 per unit with probability 0.1: -1.0 per trade on average, sd 27
+    policy = Policy(flat_stake, [(0.1, 8.0), (0.9, -1.0)])
+    result = simulate(policy, paths=20000, horizon=100, balance=10000.0, seed=1)
+    assert not result.ruined.any()
+    assert result.final.mean() - 10000.0 == pytest.approx(-100.0, abs=4 * 27 * 10 / np.sqrt(20000))
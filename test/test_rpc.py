@@ -0,0 +1,74 @@
+import pytest
+
+from common.rpc import RequestLayer, WindowFull
+from conftest import Clock
+
+
+def layer(**kwargs):
+    sent = []
+    return RequestLayer(sent.append, clock=kwargs.pop("clock", Clock()), **kwargs), sent
+
+
+def test_a_full_window_refuses_requests_until_one_is_answered():
+    requests, sent = layer(window=2)
+    requests.request({"balance": 1})
+    requests.request({"balance": 1})
+    with pytest.raises(WindowFull):
+        requests.request({"balance": 1})
+    assert requests.rejected == 1 and len(sent) == 2
+    assert requests.resolve({"req_id": 1, "msg_type": "balance"})
+    requests.request({"balance": 1})
+    assert requests.in_flight == 2
+
+
+def test_an_unanswered_request_times_out_once():
+    clock = Clock()
+    requests, _ = layer(timeout=5, clock=clock)
+    answers = []
+    future = requests.request({"balance": 1}, callback=answers.append)
+    clock.now += 4
+    requests.expire()
+    assert not future.done()
+    clock.now += 1
+    requests.expire()
+    requests.expire()
+    assert [answer["error"]["code"] for answer in answers] == ["RequestTimeout"]
+    assert future.result() is answers[0] and requests.timed_out == 1
+    assert not requests.resolve({"req_id": 1, "msg_type": "balance"})  # no on_late: a late answer is not ours
+
+
+def test_a_late_response_goes_to_on_late_within_the_grace():
+    clock = Clock()
+    requests, _ = layer(timeout=5, grace=30, clock=clock)
+    late = []
+    for req_id in (1, 2):
+        requests.send("{}", req_id, "buy", on_late=late.append)
+    clock.now += 5
+    requests.expire()
+    assert requests.resolve({"req_id": 1, "msg_type": "buy"})
+    clock.now += 30
+    requests.expire()
+    assert not requests.resolve({"req_id": 2, "msg_type": "buy"})  # past the grace
+    assert [response["req_id"] for response in late] == [1] and requests.late_responses == 1
+
+
+def test_fail_all_resolves_everything_and_keeps_nothing_for_late_responses():
+    requests, _ = layer()
+    answers, late = [], []
+    requests.request({"balance": 1}, callback=answers.append)
+    requests.send("{}", requests.next_id(), "buy", callback=answers.append, on_late=late.append)
+    requests.fail_all()
+    assert [answer["error"]["code"] for answer in answers] == ["ConnectionClosed"] * 2
+    assert requests.in_flight == 0 and not requests.late
+    assert not requests.resolve({"req_id": 2, "msg_type": "buy"}) and late == []
+
+
+def test_a_request_the_transport_refuses_is_dropped_without_a_callback():
+    def refuse(message):
+        raise ConnectionError("closed")
+
+    requests = RequestLayer(refuse)
+    answers = []
+    with pytest.raises(ConnectionError):
+        requests.request({"balance": 1}, callback=answers.append)
+    assert requests.in_flight == 0 and answers == []
@@ -0,0 +1,48 @@
+from scheduler import TickScheduler
+
+
+def test_items_fire_after_their_delay_in_insertion_order():
+    scheduler = TickScheduler()
+    scheduler.schedule(2, "b")
+    scheduler.schedule(1, "a")
+    scheduler.schedule(2, "c")
+    assert scheduler.advance() == ["a"]
+    assert scheduler.advance() == ["b", "c"]
+    assert scheduler.advance() == [] and len(scheduler) == 0
+
+
+def test_a_delay_below_one_fires_on_the_next_tick():
+    scheduler = TickScheduler()
+    scheduler.schedule(0, "now")
+    scheduler.schedule(-3, "past")
+    scheduler.schedule(0.9, "fraction")
+    assert scheduler.advance() == ["now", "past", "fraction"]
+
+
+def test_cancel_by_digit():
+    scheduler = TickScheduler()
+    scheduler.schedule(1, "7 soon", digit=7)
+    scheduler.schedule(3, "7 later", digit=7)
+    scheduler.schedule(1, "3", digit=3)
+    assert scheduler.cancel_digit(7) == 2 and scheduler.cancel_digit(7) == 0
+    assert len(scheduler) == 1 and list(scheduler) == ["3"]
+    assert scheduler.advance() == ["3"]
+    scheduler.advance()
+    assert scheduler.advance() == []
+
+
+def test_cancel_by_strategy_spares_the_other_voters():
+    scheduler = TickScheduler()
+    scheduler.schedule(1, "both", digit=1, strategies=["pattern", "breakout"])
+    scheduler.schedule(1, "pattern", digit=2, strategies=["pattern"])
+    scheduler.schedule(1, "breakout", digit=3, strategies=["breakout"])
+    assert scheduler.cancel_strategy("pattern") == 2
+    assert scheduler.cancel_strategy("breakout") == 1  # "both" was already cancelled
+    assert scheduler.advance() == [] and len(scheduler) == 0
+
+
+def test_a_fired_item_can_no_longer_be_cancelled():
+    scheduler = TickScheduler()
+    scheduler.schedule(1, "fired", digit=5)
+    scheduler.advance()
+    assert scheduler.cancel_digit(5) == 0 and len(scheduler) == 0
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from backtest import run_backtest
+from config import PAYOUTS
+from common.codec import order_template
+from common.settlement import SimulatedExchange, contract_won, digit_contract_won, load_payouts
+
+
+@pytest.mark.parametrize("contract_type, barrier, exit_digit, won", [
+    ("DIGITMATCH", "3", 3, True),
+    ("DIGITMATCH", "3", 4, False),
+    ("DIGITDIFF", "3", 4, True),
+    ("DIGITDIFF", 3, 3, False),
+])
+def test_digit_contracts_settle_on_the_exit_digit(contract_type, barrier, exit_digit, won):
+    assert digit_contract_won(contract_type, barrier, exit_digit) is won
+    assert contract_won(contract_type, barrier, 100.0, 100 + exit_digit / 100) is won
+
+
+@pytest.mark.parametrize("contract_type, barrier, exit_quote, won", [
+    ("CALL", "+0.5", 100.6, True),
+    ("CALL", "+0.5", 100.5, False),  # level reached but not passed
+    ("CALL", "-0.5", 99.6, True),
+    ("PUT", "-0.5", 99.4, True),
+    ("PUT", "+0.5", 100.6, False),
+    ("CALL", "99.8", 99.9, True),  # absolute barrier
+])
+def test_call_and_put_settle_against_a_relative_or_absolute_barrier(contract_type, barrier, exit_quote, won):
+    assert contract_won(contract_type, barrier, 100.0, exit_quote) is won
+
+
+def test_unknown_contract_types_are_refused():
+    with pytest.raises(ValueError):
+        contract_won("ONETOUCH", "+1", 100.0, 101.0)
+    with pytest.raises(ValueError):
+        SimulatedExchange({"DIGITMATCH": 8.0}).send(order_template("1HZ10V", "DIGITDIFF").render(1, 10, 3))
+
+
+def test_the_exchange_pays_from_the_loaded_payout_table(tmp_path):
+    path = tmp_path / "payouts.json"
+    path.write_text(json.dumps({"DIGITMATCH": 5.0}))
+    payouts = load_payouts(str(path), PAYOUTS)
+    assert payouts == dict(PAYOUTS, DIGITMATCH=5.0) and load_payouts(None, PAYOUTS) == PAYOUTS
+    settled = []
+    exchange = SimulatedExchange(payouts, on_settle=settled.append, balance=100.0)
+    exchange.send(order_template("1HZ10V", "DIGITMATCH", duration=2).render(1, 10, 3))
+    exchange.send(order_template("1HZ10V", "DIGITDIFF", duration=2).render(2, 20, 3))
+    exchange.send(order_template("1HZ10V", "DIGITMATCH", duration=2).render(3, 10, 4))
+    assert exchange.balance == 60.0 and exchange.open_count() == 3
+    assert exchange.on_tick(1, 100.01) == [] and settled == []
+    exchange.on_tick(2, 100.03)
+    assert [(c["barrier"], c["status"], c["profit"]) for c in settled] == [("3", "won", 50.0), ("3", "lost", -20.0),
+                                                                          ("4", "lost", -10.0)]
+    assert exchange.balance == 120.0 and exchange.open_count() == 0
+
+
+def test_a_fixed_tick_backtest_books_every_contract_at_its_payout(tmp_path):
+    path = tmp_path / "payouts.json"
+    path.write_text(json.dumps({"DIGITMATCH": 5.0}))
+    # 70 ticks ending in 7, then 20 ending in 2: bursts on 7 win until the digits switch, then lose
+    ticks = [(1_700_000_000 + i, round(100 + i % 5 / 10 + (0.07 if i < 70 else 0.02), 2)) for i in range(90)]
+    report, trader, strategy = run_backtest(ticks, load_payouts(str(path), PAYOUTS),
+                                            configure=lambda strategy: setattr(strategy, "regime_filter", False))
+    settled = [row for row in trader.history.tail if row[3] != "pending"]
+    wins = [row[2] for row in settled if row[3] == "win"]
+    losses = [row[2] for row in settled if row[3] == "loss"]
+    assert (report.ticks, report.trades, len(wins), len(losses)) == (90, 12, 6, 6)
+    for _, digit, stake, outcome, profit in settled:
+        assert digit == "7" and profit == (round(6.0 * stake, 2) - stake if outcome == "win" else -stake)
+    assert report.summary()["pnl"] == round(5.0 * sum(wins) - sum(losses), 2)
+    assert report.summary()["staked"] == round(sum(wins) + sum(losses), 2)
+    assert trader.balance == pytest.approx(10000 + report.pnl)
@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+from conftest import SYMBOL, stub
+
+CONTRACT = {"amount": 10, "basis": "stake", "contract_type": "DIGITMATCH", "currency": "USD", "duration": 1,
+            "duration_unit": "t", "symbol": SYMBOL, "barrier": "5"}
+
+
+def response(client):
+    return client.session.outbox.get_nowait()
+
+
+@pytest.mark.parametrize("change", [{"symbol": None}, {"amount": "ten"}, {"amount": -1}, {"duration": 0}])
+def test_an_invalid_buy_is_refused_with_input_validation_failed(change):
+    server, client = stub()
+    client.send(json.dumps({"buy": 1, "price": 10, "parameters": {**CONTRACT, **change}}))
+    assert response(client)["error"]["code"] == "InputValidationFailed"
+    assert server.balance == 10000.0 and not server.contracts
+
+
+def test_an_invalid_proposal_is_refused_with_input_validation_failed():
+    server, client = stub()
+    client.send(json.dumps({"proposal": 1, **CONTRACT, "symbol": None}))
+    assert response(client)["error"]["code"] == "InputValidationFailed"
+
+
+def messages(client):
+    """Every queued server message, oldest first."""
+    queued = []
+    while not client.session.outbox.empty():
+        queued.append(response(client))
+    return queued
+
+
+def buy(client, **change):
+    client.send(json.dumps({"buy": 1, "price": 1000, "parameters": {**CONTRACT, **change}}))
+
+
+def test_a_bought_contract_settles_on_its_subscription():
+    server, client = stub(quotes=[5000.15, 5000.25])  # every exit digit is 5
+    buy(client)
+    buy(client, barrier="6")
+    won, lost = (message["buy"]["contract_id"] for message in messages(client) if message["msg_type"] == "buy")
+    for contract_id in (won, lost):
+        client.send(json.dumps({"proposal_open_contract": 1, "contract_id": contract_id, "subscribe": 1}))
+    opened = messages(client)
+    assert [message["proposal_open_contract"]["is_sold"] for message in opened] == [0, 0]
+    assert server.balance == 9980.0
+
+    server.emit_tick(server.feeds[SYMBOL])
+    settled = {message["proposal_open_contract"]["contract_id"]: message["proposal_open_contract"]
+               for message in messages(client) if message["msg_type"] == "proposal_open_contract"}
+    assert (settled[won]["status"], settled[won]["profit"]) == ("won", 80.0)
+    assert (settled[lost]["status"], settled[lost]["profit"]) == ("lost", -10)
+    assert server.balance == 10070.0 and not client.session.contract_subs
+
+
+def test_ticks_history_returns_the_range_and_streams_on_the_same_subscription():
+    server, client = stub()
+    feed = server.feeds[SYMBOL]
+    client.send(json.dumps({"ticks_history": SYMBOL, "end": "latest", "count": 5, "style": "ticks"}))
+    history = response(client)["history"]
+    assert history["times"] == list(range(feed.epoch - 4, feed.epoch + 1)) and history["prices"][-1] == feed.quote
+    client.send(json.dumps({"ticks_history": SYMBOL, "start": feed.epoch - 1, "end": "latest", "subscribe": 1}))
+    message = response(client)
+    assert len(message["history"]["times"]) == 2
+    server.emit_tick(feed)
+    assert response(client)["subscription"] == message["subscription"]
+    client.send(json.dumps({"ticks": SYMBOL, "subscribe": 1}))
+    assert response(client)["error"]["code"] == "AlreadySubscribed"
+
+
+def test_a_proposal_subscription_requotes_every_tick_until_forgotten():
+    server, client = stub()
+    client.send(json.dumps({"proposal": 1, "subscribe": 1, **CONTRACT}))
+    first = response(client)
+    assert first["proposal"]["ask_price"] == 10
+    assert first["proposal"]["payout"] == round(10 * (1 + server.payouts["DIGITMATCH"]), 2)
+    server.emit_tick(server.feeds[SYMBOL])
+    second = response(client)
+    assert second["subscription"] == first["subscription"] and second["proposal"]["id"] != first["proposal"]["id"]
+
+    client.send(json.dumps({"buy": second["proposal"]["id"], "price": 10}))
+    assert "contract_id" in response(client)["buy"]
+    client.send(json.dumps({"buy": second["proposal"]["id"], "price": 10}))  # each id buys once
+    assert response(client)["error"]["code"] == "InvalidContractProposal"
+
+    client.send(json.dumps({"forget": first["subscription"]["id"]}))
+    assert response(client)["forget"] == 1
+    server.emit_tick(server.feeds[SYMBOL])
+    assert messages(client) == []
+
+
+def test_proposal_subscriptions_stop_at_the_connection_limit():
+    server, client = stub()
+    for _ in range(server.max_proposal_subscriptions):
+        client.send(json.dumps({"proposal": 1, "subscribe": 1, **CONTRACT}))
+    client.send(json.dumps({"proposal": 1, "subscribe": 1, **CONTRACT}))
+    assert [message.get("error", {}).get("code") for message in messages(client)][-2:] == [None, "RateLimit"]
+
+
+def test_the_portfolio_lists_only_open_contracts():
+    server, client = stub()
+    buy(client)  # settles on the next tick
+    buy(client, duration=5)
+    settling, staying = (message["buy"]["contract_id"] for message in messages(client) if message["msg_type"] == "buy")
+    server.emit_tick(server.feeds[SYMBOL])
+    client.send(json.dumps({"portfolio": 1}))
+    assert [contract["contract_id"] for contract in response(client)["portfolio"]["contracts"]] == [staying]
+
+
+def test_sell_refuses_digit_contracts_and_sells_call_put_at_the_spot():
+    server, client = stub()
+    buy(client)
+    buy(client, contract_type="CALL", barrier="+0.10", duration=5)
+    digit, call = (message["buy"]["contract_id"] for message in messages(client) if message["msg_type"] == "buy")
+    client.send(json.dumps({"sell": digit, "price": 0}))
+    assert response(client)["error"]["code"] == "ResaleNotOffered"
+    client.send(json.dumps({"sell": call, "price": 0}))
+    sold = [message for message in messages(client) if message["msg_type"] == "sell"]
+    assert sold[0]["sell"]["contract_id"] == call and server.contracts[call]["is_sold"] == 1
+    client.send(json.dumps({"sell": call, "price": 0}))
+    assert response(client)["error"]["code"] == "InvalidSellContractProposal"
+
+
+def test_a_slow_client_loses_ticks_but_not_responses():
+    server, client = stub(queue_size=3)
+    client.send(json.dumps({"ticks": SYMBOL, "subscribe": 1}))
+    for _ in range(5):
+        server.emit_tick(server.feeds[SYMBOL])
+    assert client.session.outbox.qsize() == 3 and client.session.dropped == 3
+    buy(client)
+    assert [message["msg_type"] for message in messages(client)] == ["tick", "tick", "tick", "buy"]
@@ -0,0 +1,104 @@
+import asyncio
+import re
+
+from consensus import ConsensusStrategy
+from trader import Trader
+from common.budget import RiskBudget
+from common.codec import Dispatcher, dumps
+from common.supervisor import ConnectionSupervisor
+from conftest import Clock, SYMBOL, stub
+from loopback import Loopback
+
+
+class Connection(Loopback):
+    """A Loopback the supervisor can run: each run() opens a new session and plays the next script on it."""
+
+    def __init__(self, server, scripts, on_open):
+        super().__init__(server)
+        self.scripts = list(scripts)
+        self.on_open = on_open
+        self.loop = None
+        self.supervisor = None
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.reconnect()
+        self.on_open(self)
+        await self.scripts.pop(0)(self)
+        if not self.scripts:
+            self.supervisor.stop()
+
+    def close(self):
+        pass
+
+
+async def drop(connection):
+    pass
+
+
+def supervise(connection, **kwargs):
+    supervisor = connection.supervisor = ConnectionSupervisor(connection, **kwargs)
+    asyncio.run(supervisor.run_async())
+    return supervisor
+
+
+def delays(output):
+    return [float(delay) for delay in re.findall(r"Reconnecting in (\S+) seconds", output)]
+
+
+def test_the_backoff_doubles_from_min_delay_up_to_max_delay(capsys):
+    server, _ = stub()
+    connection = Connection(server, [drop] * 6, on_open=lambda client: None)
+    supervisor = supervise(connection, min_delay=0.001, max_delay=0.004)
+    assert delays(capsys.readouterr().out) == [0.001, 0.002, 0.004, 0.004, 0.004]
+    assert supervisor.connections == 6
+
+
+def test_the_backoff_resets_after_a_connection_outlives_stable_after(capsys):
+    async def stable(connection):
+        await asyncio.sleep(0.06)
+
+    server, _ = stub()
+    connection = Connection(server, [drop, drop, drop, stable, drop], on_open=lambda client: None)
+    supervise(connection, min_delay=0.001, max_delay=1, stable_after=0.05)
+    assert delays(capsys.readouterr().out) == [0.001, 0.002, 0.004, 0.001]
+
+
+def test_a_dropped_connection_keeps_the_trader_and_strategy_and_fails_pending_requests():
+    server, _ = stub()
+    clock = Clock()
+    failed = []
+
+    async def first(connection):
+        connection.deliver()
+        for _ in range(5):
+            connection.tick(SYMBOL)
+        trader.place_match_trade(3)  # filled, but the response is lost with the connection
+        trader.requests.request({"ping": 1}, callback=failed.append)
+
+    async def second(connection):
+        assert [data["error"]["code"] for data in failed] == ["ConnectionClosed"] and not trader.requests.pending
+        connection.deliver()  # authorize, then the portfolio that reconciles the lost buy
+        connection.tick(SYMBOL)
+
+    connection = Connection(server, [first, second],
+                            on_open=lambda client: client.send(dumps({"authorize": "token"})))
+    trader = Trader(connection, clock=clock, trade_log=None, headless=True, budget=RiskBudget(10000))
+    strategy = ConsensusStrategy(trader, clock=clock)
+    trader.balance = server.balance
+
+    def on_authorize(client, data):
+        trader.set_account_type(data, subscribe_balance=False)
+
+    def on_tick(client, data):
+        strategy.on_tick(trader.record_tick(data["tick"]))
+
+    connection.dispatch = Dispatcher({"authorize": on_authorize, "tick": on_tick}, requests=trader.requests)
+    supervise(connection, min_delay=0.001, on_disconnect=trader.requests.fail_all)
+
+    # Each subscription opens with the current tick: 1 + 5 ticks, then 1 + 1 after the reconnect
+    assert len(strategy.tick_buffer) == 8 and strategy.trader is trader
+    assert not trader.contracts.pending
+    (contract_id,) = trader.contracts.open
+    assert server.contracts[contract_id]["barrier"] == "3"
+    assert contract_id in connection.session.contract_subs
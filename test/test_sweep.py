@@ -0,0 +1,67 @@
+import csv
+
+import pytest
+
+from backtest import run_backtest
+from config import PAYOUTS
+from sweep import apply_params, configurations, parse_param, run_sweep, validate, write_results
+
+GRID = {"coverage_depth": [1, 3], "weight.most_frequent": [0.2, 0.4], "regime_filter": [False]}
+
+
+@pytest.fixture
+def ticks(tmp_path):
+    """90 ticks ending in 7, then in 2: a short history the consensus strategy trades on."""
+    path = tmp_path / "ticks.csv"
+    rows = [(1_700_000_000 + i, round(100 + i % 5 / 10 + (0.07 if i < 70 else 0.02), 2)) for i in range(90)]
+    path.write_text("epoch,quote\n" + "".join(f"{epoch},{quote}\n" for epoch, quote in rows))
+    return str(path), rows
+
+
+def test_a_grid_expands_to_every_combination_in_order():
+    assert configurations({"coverage_depth": [1, 3], "pattern_window": [8, 10, 15]}) == [
+        {"coverage_depth": depth, "pattern_window": window} for depth in (1, 3) for window in (8, 10, 15)]
+
+
+def test_random_search_draws_distinct_configurations_reproducibly():
+    grid = {"pattern_window": [8, 10, 15], "pattern_threshold": [3, 4, 5], "coverage_depth": [1, 3, 5]}
+    drawn = configurations(grid, samples=10, seed=1)
+    assert len(drawn) == 10 and len({tuple(c.values()) for c in drawn}) == 10
+    assert drawn == configurations(grid, samples=10, seed=1) != configurations(grid, samples=10, seed=2)
+    assert all(config in configurations(grid) for config in drawn)
+    assert len(configurations(grid, samples=100, seed=1)) == 27  # more samples than the grid has
+
+
+@pytest.mark.parametrize("grid", [{"pattern_windw": [8]}, {"weight.hunch": [0.5]}, {"trader": [None]}])
+def test_unknown_parameters_are_refused(grid):
+    with pytest.raises(ValueError):
+        validate(grid)
+
+
+def test_parameters_parse_as_python_literals():
+    assert validate(dict([parse_param("coverage_depth=1, 3"), parse_param(" regime_filter=True,False")])) == {
+        "coverage_depth": [1, 3], "regime_filter": [True, False]}
+    assert parse_param("weight.least_seen=0.3,") == ("weight.least_seen", [0.3])
+
+
+def test_an_in_process_sweep_ranks_the_same_results_a_direct_backtest_gives(ticks, tmp_path):
+    path, rows = ticks
+    configs = configurations(validate(GRID))
+    results = run_sweep([path], configs, PAYOUTS, workers=1)
+    assert [result["pnl"] for result in results] == sorted((result["pnl"] for result in results), reverse=True)
+    for result in results:
+        params = {name: result[name] for name in GRID}
+        report, _, _ = run_backtest(rows, PAYOUTS, configure=lambda strategy: apply_params(params, strategy))
+        assert (result["trades"], result["wins"], result["pnl"]) == (report.trades, report.wins, round(report.pnl, 2))
+    assert any(result["trades"] for result in results)
+
+    by_drawdown = run_sweep([path], configs, PAYOUTS, workers=1, rank_by="max_drawdown")
+    assert [result["max_drawdown"] for result in by_drawdown] == sorted(result["max_drawdown"] for result in results)
+
+    out = tmp_path / "results.csv"
+    write_results(str(out), results)
+    with open(out, newline="") as f:
+        table = list(csv.DictReader(f))
+    assert list(table[0]) == ["rank", *GRID, "trades", "wins", "hit_rate", "staked", "pnl", "max_drawdown"]
+    assert [row["rank"] for row in table] == ["1", "2", "3", "4"]
+    assert [float(row["pnl"]) for row in table] == [result["pnl"] for result in results]
@@ -0,0 +1,67 @@
+import pytest
+
+from common.tick_archive import (ArchiveLocked, HISTORY_LIMIT, TickArchive, archive_path, fcntl, history_request,
+                                 open_archive)
+from common.ticks import last_digit
+
+
+def archive(tmp_path, chunk_records=4, symbol="1HZ10V"):
+    return TickArchive(archive_path(str(tmp_path), symbol), chunk_records=chunk_records)
+
+
+def test_ticks_not_newer_than_the_last_one_are_skipped(tmp_path):
+    ticks = archive(tmp_path)
+    assert ticks.extend([(100, 5.01), (101, 5.02)]) == 2
+    assert not ticks.append(101, 5.03) and not ticks.append(99, 5.04)
+    assert ticks.add_history({"history": {"times": [100, 101, 102], "prices": [5.01, 5.02, 5.05]}}) == 1
+    assert ticks.last(10) == [(100, 5.01, 1), (101, 5.02, 2), (102, 5.05, 5)] and ticks.last_epoch == 102
+    ticks.close()
+
+
+def test_the_archive_grows_past_its_initial_mapping(tmp_path):
+    ticks = archive(tmp_path, chunk_records=4)
+    quotes = [round(5 + i / 100, 2) for i in range(11)]
+    ticks.extend((1000 + i, quote) for i, quote in enumerate(quotes))
+    assert len(ticks) == 11 and ticks.capacity == 12
+    assert list(ticks.ticks()) == [(1000 + i, quote) for i, quote in enumerate(quotes)]
+    assert ticks.digits(11) == [last_digit(quote) for quote in quotes]
+    assert list(ticks.ticks(1004, 1006)) == [(1004 + i, quotes[4 + i]) for i in range(3)]
+    ticks.close()
+
+
+def test_reopening_an_archive_keeps_its_ticks_and_appends_after_them(tmp_path):
+    ticks = archive(tmp_path)
+    ticks.extend([(100, 5.01), (101, 5.02), (102, 5.03), (103, 5.04), (104, 5.05)])
+    ticks.close()
+    reopened = archive(tmp_path)
+    assert len(reopened) == 5 and reopened.last_epoch == 104
+    assert not reopened.append(104, 5.06) and reopened.append(105, 5.06)
+    reopened.close()
+    readonly = TickArchive(archive_path(str(tmp_path), "1HZ10V"), readonly=True)
+    assert readonly.digits(2) == [5, 6]
+    with pytest.raises(ValueError):
+        readonly.append(106, 5.07)
+    readonly.close()
+
+
+def test_history_request_starts_after_the_newest_stored_tick(tmp_path):
+    assert history_request(None, "1HZ10V", count=300) == {"ticks_history": "1HZ10V", "end": "latest",
+                                                         "style": "ticks", "count": 300, "subscribe": 1}
+    ticks = archive(tmp_path)
+    assert history_request(ticks, "1HZ10V")["count"] == 1000  # cold archive
+    ticks.append(1700000000, 5.01)
+    request = history_request(ticks, "1HZ10V", subscribe=False)
+    assert request["start"] == 1700000001 and request["count"] == HISTORY_LIMIT and "subscribe" not in request
+    ticks.close()
+
+
+@pytest.mark.skipif(fcntl is None, reason="no flock on this platform")
+def test_a_second_writer_is_refused(tmp_path, capsys):
+    first = open_archive(str(tmp_path), "1HZ10V")
+    with pytest.raises(ArchiveLocked):
+        archive(tmp_path)
+    assert open_archive(str(tmp_path), "1HZ10V") is None and "disabled" in capsys.readouterr().out
+    first.close()
+    second = open_archive(str(tmp_path), "1HZ10V")
+    assert second is not None
+    second.close()
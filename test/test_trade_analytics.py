@@ -0,0 +1,98 @@
+import math
+import os
+import time
+
+import pytest
+
+from common.trade_analytics import (Trade, TradePairer, TradeStats, TradeStore, TradeStoreWriter, parse_timestamp,
+                                    read_rows)
+from conftest import ROOT
+
+LOG = os.path.join(ROOT, "trade_log.csv")
+
+
+def trades(n, start=1_748_000_000.0):
+    return [Trade(start + i, start + i - 2, i % 10, 1.0 + i % 3, "win" if i % 4 else "loss",
+                  0.9 if i % 4 else -(1.0 + i % 3), 14) for i in range(n)]
+
+
+def tallies(table):
+    return {key: (tally.trades, tally.wins, round(tally.pnl, 6)) for key, tally in table.items()}
+
+
+def test_both_timestamp_formats_of_the_sample_log_parse_to_local_epochs():
+    ctime = time.mktime((2025, 5, 24, 14, 15, 35, 0, 0, -1))
+    assert parse_timestamp("Sat May 24 14:15:35 2025") == ctime
+    assert parse_timestamp("2025-05-24 14:47:57") == ctime + 32 * 60 + 22
+    assert parse_timestamp(" 1748096135.5 ") == 1748096135.5
+    with pytest.raises(ValueError):
+        parse_timestamp("yesterday")
+    epochs = [row[0] for row in read_rows(LOG)]
+    assert epochs[0] == ctime and epochs == sorted(epochs)
+
+
+def test_settled_rows_pair_with_the_oldest_pending_row_of_their_digit_and_stake():
+    pairer = TradePairer()
+    for epoch, stake in ((100, 2.0), (101, 1.0), (102, 2.0)):
+        assert pairer.add(epoch, 3, stake, "pending", 0) is None
+    assert pairer.add(110, 3, 2.0, "win", 1.8).placed == 100
+    assert pairer.add(111, 3, 0.95, "loss", -0.95).placed == 101  # no 0.95 order: the digit's oldest
+    unpaired = pairer.add(112, 5, 1.0, "win", 0.9)
+    assert math.isnan(unpaired.placed) and pairer.unmatched == 1
+    pairer.finish()
+    assert pairer.unsettled == 1 and not pairer.pending
+
+
+def test_pending_rows_past_max_age_or_max_pending_count_as_unsettled():
+    pairer = TradePairer(max_age=60, max_pending=2, sweep_interval=0)
+    for epoch in (0, 1, 2):
+        pairer.add(epoch, 7, 1.0, "pending", 0)
+    assert pairer.unsettled == 1  # the third pushed out the first
+    pairer.add(100, 7, 1.0, "pending", 0)
+    trade = pairer.add(120, 7, 1.0, "win", 0.9)  # 100 pushed out 1, then 2 expired on the sweep
+    assert trade.placed == 100 and pairer.unsettled == 3 and pairer.unmatched == 0
+
+
+def test_a_store_round_trip_matches_the_streaming_stats(tmp_path):
+    path = str(tmp_path / "trades.tlc")
+    pairer, streamed = TradePairer(), TradeStats()
+    writer = TradeStoreWriter(path, block_rows=16)
+    for row in read_rows(LOG):
+        trade = pairer.add(*row)
+        if trade is not None:
+            streamed.add(trade)
+            writer.append(trade)
+    pairer.finish()
+    writer.close(pairer.unsettled, pairer.unmatched)
+    assert streamed.trades > 16 and len(writer.blocks) > 1
+
+    store = TradeStore(path)
+    stored = store.stats()
+    assert len(store) == streamed.trades
+    assert (stored.trades, stored.wins, stored.first, stored.last) == (streamed.trades, streamed.wins,
+                                                                        streamed.first, streamed.last)
+    assert stored.pnl == pytest.approx(streamed.pnl) and stored.staked == pytest.approx(streamed.staked)
+    assert stored.stakes == streamed.stakes and stored.settle_times == streamed.settle_times
+    assert tallies(stored.per_digit) == tallies(streamed.per_digit)
+    assert tallies(stored.per_hour) == tallies(streamed.per_hour)
+    assert (stored.unsettled, stored.unmatched) == (pairer.unsettled, pairer.unmatched)
+    store.close()
+
+
+def test_a_time_range_query_spans_block_boundaries(tmp_path):
+    path = str(tmp_path / "trades.tlc")
+    rows = trades(20)
+    writer = TradeStoreWriter(path, block_rows=4)
+    for trade in rows:
+        writer.append(trade)
+    writer.close()
+    store = TradeStore(path)
+    since, until = rows[5].settled - 0.5, rows[13].settled
+    columns = store.query(since, until)
+    expected = [trade for trade in rows if since <= trade.settled <= until]
+    assert columns["settled"].tolist() == [trade.settled for trade in expected]
+    assert columns["digit"].tolist() == [trade.digit for trade in expected]
+    assert store.stats(since, until).pnl == pytest.approx(sum(trade.profit for trade in expected))
+    assert store.stats(since, until).unsettled is None
+    assert len(store.query(rows[-1].settled + 1)["settled"]) == 0
+    store.close()
@@ -0,0 +1,78 @@
+import random
+import time
+from collections import Counter
+
+import pytest
+
+from trade_history import TradeHistory
+
+STRATEGIES = ["pattern", "most_frequent", "least_seen", "breakout"]
+
+
+class Rows:
+    """Records handed to a journal, as TradeJournal.record receives them."""
+
+    def __init__(self):
+        self.rows = []
+
+    def record(self, *row):
+        self.rows.append(row)
+
+
+def stream(n, seed=3):
+    """Pending rows with int digits and settlements with the contract's string barrier, as the Trader logs them."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        digit = rng.randrange(10)
+        stake = rng.choice([1.0, 2.5, 300.0])
+        outcome = rng.choice(["pending", "pending", "win", "loss", "expired"])
+        if outcome == "pending":
+            rows.append((1_700_000_000 + i, digit, stake, outcome, 0, rng.sample(STRATEGIES, rng.randint(0, 2))))
+        else:
+            profit = {"win": stake * 8.5, "loss": -stake, "expired": 0}[outcome]
+            rows.append((1_700_000_000 + i, str(digit), stake, outcome, profit,
+                         rng.sample(STRATEGIES, rng.randint(0, 4)) or None))
+    return rows
+
+
+def brute(rows):
+    """Every aggregate of a TradeHistory, recomputed from all its rows."""
+    settled = [row for row in rows if row[3] in ("win", "loss")]
+    per_digit, per_strategy = {}, {}
+    for epoch, digit, stake, outcome, profit, voted in settled:
+        for table, key in [(per_digit, int(digit))] + [(per_strategy, strat) for strat in voted or ()]:
+            tally = table.setdefault(key, {"settled": 0, "wins": 0, "pnl": 0.0})
+            tally["settled"] += 1
+            tally["wins"] += outcome == "win"
+            tally["pnl"] += profit
+    wins = sum(row[3] == "win" for row in settled)
+    return {
+        "rows": len(rows),
+        "settled": len(settled),
+        "wins": wins,
+        "win_rate": wins / len(settled) if settled else 0,
+        "pnl": round(sum(row[4] for row in settled), 2),
+        "digits": {key: dict(tally, pnl=round(tally["pnl"], 2)) for key, tally in sorted(per_digit.items())},
+        "strategies": {key: dict(tally, pnl=round(tally["pnl"], 2)) for key, tally in per_strategy.items()},
+        "digit_counts": Counter(int(row[1]) for row in rows),
+    }
+
+
+@pytest.mark.parametrize("tail_size", [1, 7, 100])
+def test_running_aggregates_and_the_tail_equal_a_recomputation(tail_size):
+    journal = Rows()
+    history = TradeHistory(tail_size, journal)
+    rows = stream(600)
+    for i, row in enumerate(rows, 1):
+        history.add(*row)
+        seen = rows[:i]
+        expected = brute(seen)
+        assert history.digit_counts == expected.pop("digit_counts"), i
+        assert history.summary() == expected, i
+        assert history.strategy_wins() == {strat: tally["wins"] for strat, tally in expected["strategies"].items()}
+        tail = [(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(epoch)), digit, stake, outcome, profit)
+                for epoch, digit, stake, outcome, profit, _ in seen[-tail_size:]]
+        assert list(history.tail) == tail and len(history) == len(tail)
+        assert history.last(3) == tail[-3:] and history.last(tail_size + 5) == tail
+    assert journal.rows == [row[:5] for row in rows]  # rows that fell off the tail are in the journal
@@ -0,0 +1,111 @@
+from config import REQUEST_TIMEOUT
+from trader import Trader
+from common.budget import RiskBudget
+from common.codec import Dispatcher
+from common.governor import OrderGovernor, SENT
+from conftest import Clock, stub
+AUTHORIZE = {"authorize": {"loginid": "VRTC0000001"}}
+
+
+def connect():
+    server, client = stub()
+    clock = Clock()
+    budget = RiskBudget(10000)
+    trader = Trader(client, clock=clock, trade_log=None, headless=True, budget=budget)
+    client.dispatch = Dispatcher({}, requests=trader.requests)
+    trader.set_account_type(AUTHORIZE, subscribe_balance=False, subscribe_ticks=False)
+    trader.balance = server.balance
+    return server, client, clock, trader
+
+
+def open_stake(trader):
+    return trader.budget.snapshot()["open_stake"]
+
+
+def test_a_buy_filled_after_its_timeout_is_tracked():
+    server, client, clock, trader = connect()
+    trader.place_match_trade(3)  # answered, but the answer is held back
+    clock.now += REQUEST_TIMEOUT + 1
+    trader.tick()
+    assert trader.requests.timed_out == 1 and len(trader.contracts.pending) == 1
+    assert open_stake(trader) == trader.current_stake  # may still be filled
+
+    client.deliver()
+    (contract_id,) = trader.contracts.open
+    assert trader.requests.late_responses == 1 and not trader.contracts.pending
+    assert contract_id in client.session.contract_subs  # subscribed for settlement
+    assert open_stake(trader) == trader.current_stake
+
+
+def test_a_late_fill_after_the_order_expired_is_counted_again():
+    server, client, clock, trader = connect()
+    trader.place_match_trade(3)
+    clock.now += REQUEST_TIMEOUT + 1
+    trader.tick()
+    clock.now += trader.contracts.ttl - 1
+    trader.tick()  # the order expires and its stake is released; the grace runs from the timeout
+    assert not trader.contracts.pending and open_stake(trader) == 0
+
+    client.deliver()  # the late response is still within the request layer's grace
+    assert len(trader.contracts.open) == 1 and open_stake(trader) == trader.current_stake
+
+
+def test_orders_cut_off_by_a_reconnect_are_reconciled_from_the_portfolio():
+    server, client, clock, trader = connect()
+    trader.place_match_trade(3)  # filled, but the response is lost with the connection
+    client.drop = True
+    trader.place_match_trade(7)  # never reaches the server
+    client.drop = False
+    client.reconnect()
+    trader.requests.fail_all()
+    assert len(trader.contracts.pending) == 2 and open_stake(trader) == 2 * trader.current_stake
+
+    trader.set_account_type(AUTHORIZE, subscribe_balance=False, subscribe_ticks=False)
+    client.deliver()
+    assert not trader.contracts.pending
+    (contract_id,) = trader.contracts.open
+    assert server.contracts[contract_id]["barrier"] == "3" and contract_id in client.session.contract_subs
+    assert open_stake(trader) == trader.current_stake
+
+
+def test_a_rejected_buy_releases_its_stake():
+    server, client, clock, trader = connect()
+    server.balance = 0
+    trader.place_match_trade(3)
+    client.deliver()
+    assert not trader.contracts.pending and not trader.contracts.open and open_stake(trader) == 0
+
+
+def test_a_contract_settling_after_it_expired_is_released_once():
+    server, client, clock, trader = connect()
+    trader.place_match_trade(3)
+    client.deliver()
+    (contract_id,) = trader.contracts.open
+    stake = trader.current_stake
+    clock.now += trader.contracts.ttl + 1
+    trader.tick()  # expired: its stake is released
+    trader.budget.reserve(50)  # another trader's open contract
+
+    sold = {"contract_id": contract_id, "is_sold": 1, "barrier": "3", "buy_price": stake, "profit": -stake}
+    contract, entry = trader.handle_contract_update({"msg_type": "proposal_open_contract", "proposal_open_contract": sold})
+    trader.log_trade(contract["barrier"], contract["buy_price"], "loss", contract["profit"])
+    assert entry is None
+    assert open_stake(trader) == 50 and trader.budget.snapshot()["pnl"] == -stake
+
+
+def test_a_coverage_run_under_an_empty_bucket_keeps_one_buy_per_tick():
+    server, client, clock, trader = connect()
+    trader.governor = OrderGovernor(rate=1, burst=1, max_wait=60, clock=clock)
+    assert trader.governor.submit(lambda: None) == SENT  # empties the bucket
+    trader.place_match_trade(3)
+    trader.place_match_trade(3)  # a repeat on the same tick
+    trader.fire_coverage_trades(3, [1, 2, 3])
+    for _ in range(3):
+        trader.tick()
+    assert trader.governor.queued == 4 and trader.governor.merged == 1
+
+    for _ in range(4):
+        clock.now += 1
+        trader.tick()
+    client.deliver()
+    assert server.buys == 4 and len(trader.contracts.open) == 4